@@ -6,15 +6,32 @@ from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
 from sklearn.feature_extraction.text import TfidfVectorizer
 import joblib
+from functools import lru_cache
 from pathlib import Path
 
-nltk.download('punkt_tab')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nltk.download('omw-1.4')
-nltk.download('punkt')
+NLTK_RESOURCES = {
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'omw-1.4': 'corpora/omw-1.4',
+    'punkt': 'tokenizers/punkt',
+}
+
+
+@lru_cache(maxsize=1)
+def ensure_nltk_data():
+    """Download the NLTK data the cleaner needs, once and only if it is missing
+    (``nltk.download`` contacts the index server even when everything is installed)."""
+
+    for package, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package, quiet=True)
+
 
 def classifier(text):
+    ensure_nltk_data()
     stop_words = set(stopwords.words('english'))
     lemmatizer = WordNetLemmatizer()
 
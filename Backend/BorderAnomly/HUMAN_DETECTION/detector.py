@@ -1,10 +1,19 @@
 from pathlib import Path
 
-from ultralytics import YOLO
 import cv2
-import winsound
 import time
 
+try:
+    import winsound
+except ImportError:  # pragma: no cover - Windows only, the alarm is silent elsewhere
+    winsound = None
+
+from Backend.common.cancellation import CancellationToken
+from Backend.common.detection_log import open_detection_log
+from Backend.common.inference import load_yolo
+from Backend.common.progress import ProgressCallback, reporter_for
+from Backend.common.roi import imgsz_for
+
 # Load YOLO model
 _BASE_DIR = Path(__file__).resolve().parent
 _MODEL_PATH = _BASE_DIR / "model.pt"
@@ -12,9 +21,13 @@ _MODEL_PATH = _BASE_DIR / "model.pt"
 if not _MODEL_PATH.exists():
     raise FileNotFoundError(f"Human detection model not found at {_MODEL_PATH}")
 
-model = YOLO(str(_MODEL_PATH))  # replace with your trained model path
+model = load_yolo(_MODEL_PATH, "human")  # replace with your trained model path
 
-def detect_humans(video_path: str, conf_threshold: float = 0.6, play_alarm_flag: bool = False):
+def detect_humans(video_path: str, conf_threshold: float = 0.6, play_alarm_flag: bool = False,
+                  progress: ProgressCallback | None = None,
+                  cancel: CancellationToken | None = None,
+                  detection_log: str | Path | None = None,
+                  preview_limit: int = 10):
     """
     Runs YOLO detection on a video file and returns a list of detections.
 
@@ -22,47 +35,97 @@ def detect_humans(video_path: str, conf_threshold: float = 0.6, play_alarm_flag:
         video_path (str): Path to the video file.
         conf_threshold (float): Confidence threshold for detection.
         play_alarm_flag (bool): Whether to play alarm on human detection.
+        progress (callable): Optional callback receiving progress and detection events.
+        cancel (CancellationToken): Optional token checked before every frame; when it
+            fires the detections found so far are returned.
+        detection_log (str | Path): Optional path of a columnar log. When given, every
+            detection goes to the log instead of an in-memory list.
+        preview_limit (int): Detections kept for the preview when logging.
 
     Returns:
-        List of dicts with frame_number, timestamp_sec, label, confidence.
+        List of dicts with frame_number (1-based), timestamp_sec, label, confidence,
+        bbox; with ``detection_log`` a summary dict with ``frames_processed``, totals,
+        ``preview_detections`` and the log name. The log and progress events use the
+        0-based frame index, like the other analyzers.
     """
     cap = cv2.VideoCapture(video_path)
     detections = []
+    detections_total = 0
+    frames_with_detections = 0
     frame_count = 0
+    previous_found = False
     start_time = time.time()
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    reporter = reporter_for(progress, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), fps)
+    log = open_detection_log(detection_log, fps)
 
     def play_alarm():
         duration = 500  # milliseconds
         freq = 1000     # Hz
-        winsound.Beep(freq, duration)
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_count += 1
-        timestamp = time.time() - start_time
-
-        # Run YOLO detection
-        results = model(frame, conf=conf_threshold, verbose=False)
-
-        for r in results:
-            for box in r.boxes:
-                cls_id = int(box.cls[0].item())
-                conf = float(box.conf[0].item())
-                label = model.names[cls_id]
-
-                if label.lower() in ["person", "human"]:
-                    if play_alarm_flag:
-                        play_alarm()
-                    detections.append({
-                        "frame_number": frame_count,
-                        "timestamp_sec": round(timestamp, 2),
-                        "label": label,
-                        "confidence": round(conf, 2)
-                    })
-
-    cap.release()
-    cv2.destroyAllWindows()
-    return detections
+        if winsound is not None:
+            winsound.Beep(freq, duration)
+
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if cancel is not None and cancel.should_stop(frame_count):
+                break
+
+            frame_index = frame_count
+            frame_count += 1
+            timestamp = time.time() - start_time
+
+            # Run YOLO detection
+            results = model(frame, conf=conf_threshold, verbose=False, imgsz=imgsz_for("human", frame.shape))
+            found = []
+
+            for r in results:
+                for box in r.boxes:
+                    cls_id = int(box.cls[0].item())
+                    conf = float(box.conf[0].item())
+                    label = model.names[cls_id]
+
+                    if label.lower() in ["person", "human"]:
+                        if play_alarm_flag:
+                            play_alarm()
+                        found.append({
+                            "frame_number": frame_count,
+                            "timestamp_sec": round(timestamp, 2),
+                            "label": label,
+                            "confidence": round(conf, 2),
+                            "bbox": [int(v) for v in box.xyxy[0].tolist()],
+                        })
+
+            if found:
+                detections_total += len(found)
+                frames_with_detections += 1
+                if log is None:
+                    detections.extend(found)
+                else:
+                    log.append(frame_index, found, [True] * len(found))
+                    if len(detections) < preview_limit:
+                        detections.extend(found[: preview_limit - len(detections)])
+
+            if reporter is not None:
+                # alert when people come into view, not again for every frame they stay in it
+                reporter.frame(frame_index, found, found if not previous_found else ())
+            previous_found = bool(found)
+
+        if reporter is not None:
+            reporter.finish()
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        log_info = log.close() if log is not None else {}
+
+    if log is None:
+        return detections
+    return {
+        "frames_processed": frame_count,
+        "total_detections": detections_total,
+        "unique_frames": frames_with_detections,
+        "preview_detections": detections,
+        **log_info,
+    }
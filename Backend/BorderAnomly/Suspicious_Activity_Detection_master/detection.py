@@ -2,37 +2,83 @@ import os
 from pathlib import Path
 
 import cv2
-from ultralytics import YOLO
+
+from Backend.common.cancellation import CancellationToken, stop_summary
+from Backend.common.detection_log import open_detection_log
+from Backend.common.inference import load_yolo
+from Backend.common.progress import ProgressCallback, reporter_for
+from Backend.common.rendering import OverlayItem, OverlayRenderer, color_for
+from Backend.common.roi import imgsz_for
+from Backend.common.video_output import POST_ROLL_SECONDS, PRE_ROLL_SECONDS, create_video_sink, release_sink
 
 
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_MODEL_PATH = BASE_DIR / "best.pt"
 DEFAULT_OUTPUT_DIR = BASE_DIR / "output video"
+# Loaded weights by path, shared by every request (and the API warm-up)
+_MODELS: dict[Path, object] = {}
+
+
+def get_model(model_path: str | os.PathLike = DEFAULT_MODEL_PATH):
+    model_path = Path(model_path).resolve()
+    if model_path not in _MODELS:
+        print(f"[INFO] Loading YOLO model from {model_path} ...")
+        _MODELS[model_path] = load_yolo(model_path, "suspicious")
+    return _MODELS[model_path]
 
 class ShopliftingDetectionBackend:
     def __init__(self, model_path: str | os.PathLike = DEFAULT_MODEL_PATH,
                  video_path: str | os.PathLike = BASE_DIR / "test.mp4",
-                 output_path: str | os.PathLike = BASE_DIR / "detected.mp4"):
+                 output_path: str | os.PathLike | None = BASE_DIR / "detected.mp4",
+                 output_mode: str = "full",
+                 pre_roll: float = PRE_ROLL_SECONDS,
+                 post_roll: float = POST_ROLL_SECONDS,
+                 hls: bool = False,
+                 progress: ProgressCallback | None = None,
+                 cancel: CancellationToken | None = None,
+                 detection_log: str | os.PathLike | None = None):
         self.model_path = Path(model_path)
         self.video_path = Path(video_path)
-        self.output_path = Path(output_path)
-
-    self.total_frames = 0
-    self.flagged_frames = 0
-    self.total_detections = 0
-    self.labels: set[str] = set()
-    self.summary: dict[str, float | int | list[str]] = {}
+        # ``None`` runs headless: no drawing and no video writing, summary only
+        self.output_path = Path(output_path) if output_path is not None else None
+        # "full" re-encodes the whole video, "clips" only writes clips around flagged frames
+        self.output_mode = output_mode
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        # also segment the full output into an HLS playlist while processing
+        self.hls = hls
+        # receives progress / detections / alert events while frames are processed
+        self.progress = progress
+        # checked before every frame; stopping early still produces a partial summary
+        self.cancel = cancel
+        # columnar log receiving every detection
+        self.detection_log = detection_log
+        self.log = None
+        self.reporter = None
+        self.out = None
+        self.renderer = OverlayRenderer() if self.output_path is not None else None
+
+        self.total_frames = 0
+        self.flagged_frames = 0
+        self.total_detections = 0
+        self.labels: set[str] = set()
+        # labels seen in the previous frame; an alert is sent when a label first appears
+        self.previous_labels: set[str] = set()
+        self.summary: dict[str, float | int | list[str]] = {}
 
         # Run the full pipeline
         self.load_model()
         self.open_video()
         self.setup_writer()
-        self.run_detection()
+        try:
+            self.run_detection()
+        except BaseException:
+            self.cleanup(failed=True)
+            raise
         self.cleanup()
 
     def load_model(self):
-        print(f"[INFO] Loading YOLO model from {self.model_path} ...")
-        self.model = YOLO(str(self.model_path))
+        self.model = get_model(self.model_path)
 
     def open_video(self):
         print(f"[INFO] Opening video: {self.video_path}")
@@ -44,12 +90,24 @@ class ShopliftingDetectionBackend:
         self.fps = int(self.cap.get(cv2.CAP_PROP_FPS))
         self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.reporter = reporter_for(self.progress, int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), self.fps)
+        self.log = open_detection_log(self.detection_log, self.fps)
 
     def setup_writer(self):
-        print(f"[INFO] Preparing output file: {self.output_path}")
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.output_path.parent.mkdir(parents=True, exist_ok=True)
-        self.out = cv2.VideoWriter(str(self.output_path), fourcc, self.fps, (self.width, self.height))
+        if self.output_path is None:
+            print("[INFO] Headless run, no output video will be written")
+            return
+        print(f"[INFO] Preparing output ({self.output_mode}): {self.output_path}")
+        self.out = create_video_sink(
+            self.output_path,
+            self.fps,
+            (self.width, self.height),
+            self.output_mode,
+            self.pre_roll,
+            self.post_roll,
+            hls=self.hls,
+            on_hls=self.reporter.hls if self.reporter is not None else None,
+        )
 
     def run_detection(self):
         print("[INFO] Starting detection...")
@@ -57,14 +115,19 @@ class ShopliftingDetectionBackend:
             ret, frame = self.cap.read()
             if not ret:
                 break
+            if self.cancel is not None and self.cancel.should_stop(self.total_frames):
+                print(f"[INFO] Stopping early: {self.cancel.reason}")
+                break
 
             self.total_frames += 1
             # run YOLO detection
-            results = self.model(frame)
-            annotated_frame = results[0].plot()
+            results = self.model(frame, imgsz=imgsz_for("suspicious", frame.shape))
 
             detections = results[0].boxes
             detections_count = len(detections) if detections is not None else 0
+            overlays: list[OverlayItem] = []
+            frame_labels: list[str] = []
+            frame_detections: list[dict] = []
             if detections_count:
                 self.flagged_frames += 1
                 self.total_detections += detections_count
@@ -72,10 +135,37 @@ class ShopliftingDetectionBackend:
                     cls_id = int(box.cls[0].item()) if hasattr(box.cls[0], "item") else int(box.cls[0])
                     label = self.model.names[int(cls_id)] if isinstance(self.model.names, (list, tuple)) else self.model.names.get(int(cls_id), str(cls_id))
                     self.labels.add(str(label))
+                    frame_labels.append(str(label))
+                    if self.renderer is None and self.reporter is None and self.log is None:
+                        continue
+                    x1, y1, x2, y2 = (int(v) for v in box.xyxy[0].tolist())
+                    conf = float(box.conf[0].item())
+                    if self.renderer is not None:
+                        overlays.append(OverlayItem((x1, y1, x2, y2), color_for(cls_id), f"{label} {conf:.2f}"))
+                    if self.reporter is not None or self.log is not None:
+                        frame_detections.append({
+                            "label": str(label),
+                            "confidence": round(conf, 3),
+                            "bbox": [x1, y1, x2, y2],
+                        })
 
             # save annotated frame
-            self.out.write(annotated_frame)
-
+            if self.out is not None:
+                self.out.write(
+                    self.renderer.render(frame, overlays),
+                    self.total_frames - 1,
+                    flagged=bool(detections_count),
+                    labels=frame_labels,
+                )
+            if self.log is not None and frame_detections:
+                self.log.append(self.total_frames - 1, frame_detections, [True] * len(frame_detections))
+            if self.reporter is not None:
+                alerts = [item for item in frame_detections if item["label"] not in self.previous_labels]
+                self.reporter.frame(self.total_frames - 1, frame_detections, alerts)
+            self.previous_labels = set(frame_labels)
+
+        if self.reporter is not None:
+            self.reporter.finish()
         print("[INFO] Detection finished.")
         suspicious_percentage = (
             round((self.flagged_frames / self.total_frames) * 100, 2)
@@ -87,35 +177,71 @@ class ShopliftingDetectionBackend:
             "detections_total": self.total_detections,
             "suspicious_percentage": suspicious_percentage,
             "labels_detected": sorted(self.labels),
+            **stop_summary(self.cancel),
         }
 
-    def cleanup(self):
+    def cleanup(self, failed: bool = False):
         print("[INFO] Releasing resources...")
         self.cap.release()
-        self.out.release()
+        if self.out is not None:
+            self.summary.update(release_sink(self.out, failed=failed))
+        if self.log is not None:
+            self.summary.update(self.log.close())
         cv2.destroyAllWindows()
-        print(f"✅ Detection complete, saved at {self.output_path}")
+        if failed:
+            return
+        if self.output_path is not None:
+            print(f"✅ Detection complete, saved at {self.output_path}")
+        else:
+            print("✅ Detection complete")
 
 
 def detect_shoplifting(video_path: str | os.PathLike,
                        model_path: str | os.PathLike = DEFAULT_MODEL_PATH,
-                       output_dir: str | os.PathLike = DEFAULT_OUTPUT_DIR) -> str:
-    """Run shoplifting detection on ``video_path`` and return the output video path."""
+                       output_dir: str | os.PathLike = DEFAULT_OUTPUT_DIR,
+                       render: bool = True,
+                       output_mode: str = "full",
+                       pre_roll: float = PRE_ROLL_SECONDS,
+                       post_roll: float = POST_ROLL_SECONDS,
+                       hls: bool = False,
+                       progress: ProgressCallback | None = None,
+                       cancel: CancellationToken | None = None,
+                       detection_log: str | os.PathLike | None = None,
+                       output_stem: str | None = None) -> dict:
+    """Run shoplifting detection on ``video_path`` and return the output video path and summary.
+
+    With ``render`` False no annotated video is produced and ``output_path`` is ``None``.
+    With ``output_mode="clips"`` only clips around flagged frames are written and listed
+    in ``summary["clips"]``; ``output_path`` is then ``None``. With ``hls`` the full output
+    is also segmented into ``summary["hls_playlist"]`` while it is written. ``progress``
+    receives frame counts and per-frame detections while the video is processed; ``cancel``
+    stops the run early with a partial summary. ``detection_log`` names a columnar log
+    that receives every detection. Outputs are named ``<output_stem>_output.*``
+    (default: the input's stem).
+    """
 
     video_path = Path(video_path)
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    output_path = output_dir / f"{video_path.stem}_output.mp4"
+    output_path = None
+    if render:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / f"{output_stem or video_path.stem}_output.mp4"
 
     backend = ShopliftingDetectionBackend(
         model_path=model_path,
         video_path=video_path,
         output_path=output_path,
+        output_mode=output_mode,
+        pre_roll=pre_roll,
+        post_roll=post_roll,
+        hls=hls,
+        progress=progress,
+        cancel=cancel,
+        detection_log=detection_log,
     )
     summary = backend.summary or {}
     return {
-        "output_path": str(output_path),
+        "output_path": str(output_path) if output_path is not None and output_mode == "full" else None,
         "summary": summary,
     }
 
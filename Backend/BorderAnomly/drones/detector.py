@@ -1,9 +1,18 @@
 import os
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import cv2
-from ultralytics import YOLO
+import numpy as np
+
+from Backend.common.batching import MicroBatcher
+from Backend.common.detections import Detection
+from Backend.common.images import load_frame
+from Backend.common.inference import load_yolo
+from Backend.common.metrics import stage
+from Backend.common.rendering import OverlayItem, color_for, draw_items
+from Backend.common.roi import Region, band_region, crop, imgsz_for, parse_band, to_frame_coords
+from Backend.common.tiling import TILE_SIZE, is_textured, merge_boxes, tile_regions
 
 
 def _resolve_model_path() -> str:
@@ -25,49 +34,116 @@ def _resolve_model_path() -> str:
 
 
 MODEL_PATH = _resolve_model_path()
-model = YOLO(MODEL_PATH)
+model = load_yolo(MODEL_PATH, "drones")
+
+# Sky band to search, e.g. DRONE_HORIZON_BAND="0-0.6" for the upper 60 % of the frame
+HORIZON_BAND = parse_band(os.getenv("DRONE_HORIZON_BAND"))
+
+# Tiled inference is opt-in: "on" always tiles, "auto" tiles inputs larger than two tiles
+TILING = os.getenv("DRONE_TILING", "off").lower()
+
+_batched_predict = MicroBatcher(lambda frames, imgsz: model(list(frames), verbose=False, imgsz=imgsz))
+
+_Boxes = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _boxes(result: Any, region: Optional[Region] = None) -> _Boxes:
+  """``(xyxy, class_ids, confidences)`` of one result, shifted out of ``region``."""
+
+  boxes = result.boxes
+  if boxes is None or len(boxes) == 0:
+    return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+  return (
+    to_frame_coords(boxes.xyxy.cpu().numpy(), region),
+    boxes.cls.cpu().numpy().astype(np.int64),
+    boxes.conf.cpu().numpy(),
+  )
+
+
+def _use_tiling(shape: Tuple[int, ...], tiled: Optional[bool]) -> bool:
+  if tiled is not None:
+    return tiled
+  if TILING == "auto":
+    return max(shape[:2]) > 2 * TILE_SIZE
+  return TILING in ("on", "1", "true")
+
+
+def predict_tiled(view: np.ndarray) -> Tuple[_Boxes, int]:
+  """SAHI-style inference: one pass over the whole view (at the drones' DETECTOR_IMGSZ)
+  for large drones plus overlapping tiles for distant ones, merged across tiles with
+  non-maximum merging. Flat tiles are skipped. Returns the boxes and the number of
+  tiles run."""
+
+  regions = [region for region in tile_regions(view.shape) if is_textured(crop(view, region))]
+  parts: List[_Boxes] = [_boxes(_batched_predict(view, imgsz=imgsz_for("drones", view.shape)))]
+  if regions:
+    # Tiles are inferred at their native size unless DETECTOR_IMGSZ asks for less
+    results = _batched_predict.map(
+      [crop(view, region) for region in regions], imgsz=imgsz_for("drones", (TILE_SIZE, TILE_SIZE))
+    )
+    parts.extend(_boxes(result, region) for result, region in zip(results, regions))
+
+  xyxy, confidences, class_ids = merge_boxes(
+    np.concatenate([part[0] for part in parts]),
+    np.concatenate([part[2] for part in parts]),
+    np.concatenate([part[1] for part in parts]),
+  )
+  return (xyxy, class_ids, confidences), len(regions)
 
 
 def detect_drones(
-  image_path: str,
+  image_path: Union[str, np.ndarray],
   output_path: Optional[str] = None,
-) -> Union[List[Dict], Dict[str, Optional[Union[str, List[Dict]]]]]:
-  """Run drone detection and optionally persist an annotated image."""
-
-  results = model(image_path)
-  detections: List[Dict] = []
+  write: bool = True,
+  tiled: Optional[bool] = None,
+) -> Union[List[Detection], Dict[str, Any]]:
+  """Run drone detection and optionally persist an annotated image.
+
+  ``image_path`` may also be an already decoded BGR frame (it is drawn on in
+  place). Boxes are only drawn when ``output_path`` is given; without it this is
+  a metadata-only call. With ``write`` False the annotated frame is returned as
+  ``annotated_frame`` instead of being written, so the caller can persist it.
+  ``tiled`` forces tiled inference on or off; by default ``DRONE_TILING`` (off) decides.
+  """
+
+  try:
+    frame = load_frame(image_path)
+  except FileNotFoundError as exc:
+    raise ValueError(str(exc)) from exc
+
+  region = band_region(frame.shape, HORIZON_BAND)
+  view = crop(frame, region)
+  if _use_tiling(view.shape, tiled):
+    (xyxy, class_ids, confidences), _ = predict_tiled(view)
+  else:
+    xyxy, class_ids, confidences = _boxes(_batched_predict(view, imgsz=imgsz_for("drones", view.shape)))
+  # Boxes come back in crop coordinates; shift them onto the full frame
+  xyxy = to_frame_coords(xyxy, region)
+  detections: List[Detection] = []
   annotated_frame = None
+  overlays: List[OverlayItem] = []
 
-  for r in results:
-    if annotated_frame is None:
-      annotated_frame = r.plot()  # returns BGR frame with drawn predictions
-
-    for box in r.boxes:
-      coords = box.xyxy[0].tolist()
-      cls_id = int(box.cls[0].item())
-      conf = float(box.conf[0].item())
-      label = model.names[cls_id]
-      detections.append(
-        {
-          "label": label,
-          "confidence": round(conf, 2),
-          "bbox": [int(coords[0]), int(coords[1]), int(coords[2]), int(coords[3])],
-        }
-      )
+  for coords, cls_id, conf in zip(xyxy.tolist(), class_ids.tolist(), confidences.tolist()):
+    label = model.names[cls_id]
+    bbox = tuple(int(v) for v in coords)
+    detections.append(Detection(label, bbox, round(conf, 2)))
+    if output_path:
+      overlays.append(OverlayItem(bbox, color_for(cls_id), f"{label} {conf:.2f}"))
+
+  if output_path and overlays:
+    # Draw straight onto the decoded source frame instead of r.plot()'s full copy
+    with stage("draw"):
+      annotated_frame = draw_items(frame, overlays)
 
   if output_path:
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     if annotated_frame is None:
       # No detections were drawn; persist the original frame so the frontend still receives an output.
-      original_frame = cv2.imread(image_path)
-      if original_frame is None:
-        annotated_frame = None
-      else:
-        annotated_frame = original_frame
-    if annotated_frame is not None:
-      cv2.imwrite(output_path, annotated_frame)
+      annotated_frame = frame
+    if not write:
+      return {"detections": detections, "annotated_path": output_path, "annotated_frame": annotated_frame}
 
-  if output_path:
-    return {"detections": detections, "annotated_path": output_path if annotated_frame is not None else None}
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    cv2.imwrite(output_path, annotated_frame)
+    return {"detections": detections, "annotated_path": output_path}
 
   return detections
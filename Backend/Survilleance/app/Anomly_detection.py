@@ -1,12 +1,28 @@
 from __future__ import annotations
 
 import datetime
+import os
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 import cv2
+import numpy as np
 from ultralytics import YOLO
 
+from Backend.common.batching import MicroBatcher
+from Backend.common.cancellation import CancellationToken, stop_summary
+from Backend.common.detection_log import open_detection_log
+from Backend.common.detections import ZoneDetection
+from Backend.common.images import load_frame
+from Backend.common.inference import load_yolo
+from Backend.common.progress import ProgressCallback, reporter_for
+from Backend.common.rendering import OverlayItem, OverlayRenderer, render_items
+from Backend.common.roi import Region, crop, expand_region, imgsz_for, points_region, to_frame_coords
+from Backend.common.video_output import POST_ROLL_SECONDS, PRE_ROLL_SECONDS, create_video_sink, release_sink
+
+from .Object_tracking import ByteTracker, ZoneAnalytics
+from .Restricted_zones import ZoneSet, load_zone_set
+
 
 class ObjectDetection:
     """Legacy interactive interface for restricted-area anomaly detection."""
@@ -21,7 +37,7 @@ class ObjectDetection:
     @classmethod
     def get_model(cls) -> YOLO:
         if cls.model is None:
-            cls.model = YOLO(str(cls.MODEL_PATH))
+            cls.model = load_yolo(cls.MODEL_PATH, "anomaly")
         return cls.model
 
     def __init__(self, mode: str = "image", path: str | None = None, cam_index: int = 0):
@@ -101,111 +117,242 @@ class ObjectDetection:
         cv2.destroyAllWindows()
 
 
-def analyze_frame(frame, conf: float = 0.5) -> Tuple[Any, List[Dict], List[Dict]]:
-    """Run detection on a frame and return the annotated frame with metadata."""
+def default_zone_config() -> Dict[str, Any]:
+    """Zone config equivalent to the legacy single ``RESTRICTED_AREA`` rectangle."""
 
-    model = ObjectDetection.get_model()
-    x1, y1, x2, y2 = ObjectDetection.RESTRICTED_AREA
+    return {
+        "camera_id": "default",
+        "zones": [
+            {
+                "name": "Restricted Area",
+                "rect": list(ObjectDetection.RESTRICTED_AREA),
+                "classes": list(ObjectDetection.RESTRICTED_OBJECTS),
+            }
+        ],
+    }
+
+
+def get_zone_set(camera_id: str | None = None) -> ZoneSet:
+    """Return the restricted zones configured for ``camera_id``."""
+
+    return load_zone_set(camera_id, default_zone_config())
+
+
+# Only run the model around the zones and counting lines (plus ROI_MARGIN); detections
+# elsewhere cannot trigger restricted events
+ZONE_ROI = os.getenv("ANOMALY_ZONE_ROI", "0") == "1"
+
+_batched_predict = MicroBatcher(
+    lambda frames, conf, imgsz: ObjectDetection.get_model()(list(frames), conf=conf, imgsz=imgsz)
+)
+
+
+def zone_region(zones: ZoneSet, shape: Tuple[int, ...]) -> Region | None:
+    """Region of interest covering every zone and line, or ``None`` for the full frame."""
+
+    if not ZONE_ROI:
+        return None
+    shape = shape[:2]
+    return expand_region(points_region([*zones.scaled_polygons(shape), *zones.scaled_lines(shape)]), shape)
 
-    detections: List[Dict] = []
-    restricted_events: List[Dict] = []
 
-    # Draw restricted area boundary
-    cv2.rectangle(frame, (x1, y1), (x2, y2), ObjectDetection.ALERT_COLOR, 2)
-    cv2.putText(
-        frame,
-        "Restricted Area",
-        (x1, y1 - 10),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.6,
-        ObjectDetection.ALERT_COLOR,
-        2,
+def detect_objects(
+    frame,
+    conf: float = 0.5,
+    region: Region | None = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Run the model on a frame and return ``(xyxy, class_ids, confidences)`` arrays.
+
+    With a ``region`` only that crop is inferred; boxes are in full-frame coordinates.
+    """
+
+    view = crop(frame, region)
+    results = [_batched_predict(view, conf=conf, imgsz=imgsz_for("anomaly", view.shape))]
+    if not results or results[0].boxes is None or len(results[0].boxes) == 0:
+        return np.zeros((0, 4), dtype=np.int32), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    boxes = results[0].boxes
+    return (
+        to_frame_coords(boxes.xyxy.cpu().numpy(), region).astype(np.int32),
+        boxes.cls.cpu().numpy().astype(np.int64),
+        boxes.conf.cpu().numpy(),
     )
 
-    results = model(frame, conf=conf)
-    if not results:
-        return frame, detections, restricted_events
 
-    for box in results[0].boxes:
-        bx1, by1, bx2, by2 = map(int, box.xyxy[0])
-        cls_name = model.names[int(box.cls[0])]
-        confidence = float(box.conf[0])
+def draw_zones(frame, zones: ZoneSet):
+    """Draw restricted zone boundaries and counting lines."""
 
-        cv2.rectangle(frame, (bx1, by1), (bx2, by2), ObjectDetection.NORMAL_COLOR, 2)
+    shape = frame.shape[:2]
+    for zone, polygon in zip(zones.zones, zones.scaled_polygons(shape)):
+        cv2.polylines(frame, [polygon.reshape(-1, 1, 2)], True, ObjectDetection.ALERT_COLOR, 2)
+        x1, y1 = polygon.min(axis=0)
         cv2.putText(
             frame,
-            f"{cls_name} {confidence:.2f}",
-            (bx1, by1 - 5),
+            zone.name,
+            (int(x1), int(y1) - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            ObjectDetection.ALERT_COLOR,
+            2,
+        )
+    for line, (p1, p2) in zip(zones.lines, zones.scaled_lines(shape)):
+        cv2.line(frame, tuple(int(v) for v in p1), tuple(int(v) for v in p2), ObjectDetection.NORMAL_COLOR, 2)
+        cv2.putText(
+            frame,
+            line.name,
+            (int(p1[0]), int(p1[1]) - 10),
             cv2.FONT_HERSHEY_SIMPLEX,
             0.5,
             ObjectDetection.NORMAL_COLOR,
             2,
         )
-
-        center_x, center_y = (bx1 + bx2) // 2, (by1 + by2) // 2
-        restricted = (
-            cls_name in ObjectDetection.RESTRICTED_OBJECTS
-            and x1 <= center_x <= x2
-            and y1 <= center_y <= y2
+    return frame
+
+
+def annotate_detections(
+    frame,
+    zones: ZoneSet,
+    xyxy: np.ndarray,
+    class_ids: np.ndarray,
+    confidences: np.ndarray,
+    track_ids: List[int] | None = None,
+    render: bool = True,
+    renderer: OverlayRenderer | None = None,
+) -> Tuple[Any, List[ZoneDetection], List[Dict]]:
+    """Test detections against the zones, optionally draw them and build the metadata records.
+
+    With a ``renderer`` the zones are expected to be its static layer; without one they
+    are drawn directly onto the frame.
+    """
+
+    names = ObjectDetection.get_model().names
+    detections: List[ZoneDetection] = []
+    restricted_events: List[Dict] = []
+    overlays: List[OverlayItem] = []
+
+    xyxy = np.asarray(xyxy, dtype=np.int32).reshape(-1, 4)
+    centers = (xyxy[:, :2] + xyxy[:, 2:]) // 2
+
+    # One vectorised lookup tests every detection against every zone
+    zone_bits = zones.match(centers, class_ids, names, frame.shape[:2])
+    membership = zones.membership(zone_bits)
+    zone_names = [zone.name for zone in zones.zones]
+    track_ids = track_ids if track_ids is not None else [None] * len(xyxy)
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+
+    for (bx1, by1, bx2, by2), class_id, confidence, (center_x, center_y), in_zones, track_id in zip(
+        xyxy.tolist(), class_ids.tolist(), confidences.tolist(), centers.tolist(), membership, track_ids
+    ):
+        cls_name = names[class_id]
+        hit_zones = [zone_names[index] for index in np.flatnonzero(in_zones)]
+        restricted = bool(hit_zones)
+
+        detection_record = ZoneDetection(
+            cls_name,
+            (bx1, by1, bx2, by2),
+            round(confidence, 4),
+            center=(center_x, center_y),
+            restricted=restricted,
+            zones=hit_zones,
+            track_id=track_id,
         )
-
-        detection_record = {
-            "label": cls_name,
-            "confidence": round(confidence, 4),
-            "bbox": [bx1, by1, bx2, by2],
-            "center": [center_x, center_y],
-            "restricted": restricted,
-        }
         detections.append(detection_record)
 
+        if render:
+            caption = f"{cls_name} {confidence:.2f}" if track_id is None else f"#{track_id} {cls_name} {confidence:.2f}"
+            overlays.append(OverlayItem((bx1, by1, bx2, by2), ObjectDetection.NORMAL_COLOR, caption))
+
         if restricted:
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-            cv2.rectangle(frame, (bx1, by1), (bx2, by2), ObjectDetection.ALERT_COLOR, 3)
-            cv2.putText(
-                frame,
-                f"🚨 {cls_name} {confidence:.2f} {timestamp}",
-                (bx1, by1 - 20),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                ObjectDetection.ALERT_COLOR,
-                2,
-            )
+            if render:
+                overlays.append(OverlayItem(
+                    (bx1, by1, bx2, by2),
+                    ObjectDetection.ALERT_COLOR,
+                    f"🚨 {cls_name} {confidence:.2f} {timestamp}",
+                    thickness=3,
+                    font_scale=0.6,
+                    text_offset=20,
+                ))
             restricted_events.append({
-                "label": cls_name,
-                "confidence": round(confidence, 4),
-                "bbox": [bx1, by1, bx2, by2],
-                "center": [center_x, center_y],
+                **detection_record.as_dict(),
                 "timestamp": timestamp,
             })
 
+    if render:
+        if renderer is None:
+            draw_zones(frame, zones)
+        render_items(frame, overlays, renderer)
+
     return frame, detections, restricted_events
 
 
+def analyze_frame(
+    frame,
+    conf: float = 0.5,
+    zones: ZoneSet | None = None,
+    render: bool = True,
+    renderer: OverlayRenderer | None = None,
+) -> Tuple[Any, List[ZoneDetection], List[Dict]]:
+    """Run detection on a frame and return the (optionally annotated) frame with metadata.
+
+    Inference runs on the untouched frame; overlays are drawn afterwards and skipped
+    entirely when ``render`` is False.
+    """
+
+    zones = zones or get_zone_set()
+    xyxy, class_ids, confidences = detect_objects(
+        frame, conf=conf, region=zone_region(zones, frame.shape)
+    )
+    return annotate_detections(
+        frame, zones, xyxy, class_ids, confidences, render=render, renderer=renderer
+    )
+
+
 def analyze_image(
-    image_path: str | Path,
+    image_path: str | Path | np.ndarray,
     output_path: str | Path | None = None,
     conf: float = 0.5,
+    camera_id: str | None = None,
+    render: bool = True,
+    write: bool = True,
 ) -> Dict:
-    """Run restricted-area detection on a still image."""
+    """Run restricted-area detection on a still image (a path or a decoded frame).
 
-    image_path = Path(image_path)
-    frame = cv2.imread(str(image_path))
-    if frame is None:
-        raise FileNotFoundError(f"Unable to read image: {image_path}")
+    Overlays are only drawn when an ``output_path`` is given and ``render`` is True.
+    With ``write`` False the annotated frame is returned as ``annotated_frame``
+    instead of being written, so the caller can persist it off the request path.
+    """
 
-    annotated, detections, restricted_events = analyze_frame(frame, conf=conf)
+    frame = load_frame(image_path)
 
-    if output_path is not None:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        cv2.imwrite(str(output_path), annotated)
+    zones = get_zone_set(camera_id)
+    render = render and output_path is not None
+    annotated, detections, restricted_events = analyze_frame(
+        frame, conf=conf, zones=zones, render=render
+    )
 
-    return {
+    summary = {
+        "camera_id": zones.camera_id,
         "detections_count": len(detections),
         "restricted_event_count": len(restricted_events),
         "detections": detections,
         "restricted_events": restricted_events,
     }
+    if render and not write:
+        summary["annotated_frame"] = annotated
+    elif render:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(output_path), annotated)
+    return summary
+
+
+def _stream_time(cap: cv2.VideoCapture, frame_index: int, fps: float) -> float:
+    """Timestamp (seconds) of the frame just read, from the container when it has one."""
+
+    position = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if position > 0 or frame_index == 0:
+        return max(position, 0.0) / 1000.0
+    return frame_index / fps
 
 
 def analyze_video(
@@ -213,8 +360,34 @@ def analyze_video(
     output_path: str | Path | None = None,
     conf: float = 0.5,
     max_logged_events: int = 50,
+    camera_id: str | None = None,
+    track: bool = True,
+    detect_every: int = 1,
+    render: bool = True,
+    output_mode: str = "full",
+    pre_roll: float = PRE_ROLL_SECONDS,
+    post_roll: float = POST_ROLL_SECONDS,
+    hls: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancellationToken | None = None,
+    detection_log: str | Path | None = None,
 ) -> Dict:
-    """Run restricted-area detection on a video and optionally persist an annotated copy."""
+    """Run restricted-area detection on a video and optionally persist an annotated copy.
+
+    With ``track`` enabled detections are associated into tracks and the summary carries
+    per-track zone enter / exit / dwell and line-crossing events instead of one event per
+    frame. ``detect_every`` runs the model only on every Nth frame and lets the tracker
+    coast in between. With ``render`` False (or no ``output_path``) nothing is drawn or
+    written and only the metadata is returned. ``output_mode="clips"`` writes only short
+    clips around frames with restricted events instead of the full annotated video; ``hls``
+    additionally segments the full video into an HLS playlist while it is written.
+    ``progress`` receives frame counts, per-frame detections and restricted events as they
+    are produced. ``cancel`` is checked before every frame; a stopped run still returns the
+    summary of the frames processed so far, flagged with ``stopped_early``.
+    ``detection_log`` is the path of a columnar log that receives every detection, while
+    the summary keeps only the first ``max_logged_events`` samples (and, when tracking,
+    the first ``max_logged_events`` zone events and alerts; totals count all of them).
+    """
 
     video_path = Path(video_path)
     cap = cv2.VideoCapture(str(video_path))
@@ -224,65 +397,160 @@ def analyze_video(
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
     fps = cap.get(cv2.CAP_PROP_FPS) or 24.0
+    reporter = reporter_for(progress, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), fps)
+    log = open_detection_log(detection_log, fps)
 
     writer = None
-    if output_path is not None and width > 0 and height > 0:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        writer = cv2.VideoWriter(
-            str(output_path),
-            cv2.VideoWriter_fourcc(*"mp4v"),
-            float(fps),
-            (width, height),
+    if render and output_path is not None and width > 0 and height > 0:
+        writer = create_video_sink(
+            output_path, fps, (width, height), output_mode, pre_roll, post_roll,
+            hls=hls, on_hls=reporter.hls if reporter is not None else None,
         )
 
+    zones = get_zone_set(camera_id)
+    render = writer is not None
+    renderer = OverlayRenderer(static=lambda layer: draw_zones(layer, zones)) if render else None
     frames_processed = 0
     detections_total = 0
     restricted_total = 0
+    zone_event_totals: Dict[str, int] = {zone.name: 0 for zone in zones.zones}
     sample_detections: List[Dict] = []
     restricted_events: List[Dict] = []
-
+    zone_events: List[Dict] = []
+    zone_event_total = 0
+    restricted_detection_total = 0
+
+    detect_every = max(1, int(detect_every))
+    tracker = None
+    analytics = None
+    if track:
+        tracker = ByteTracker(
+            high_thresh=conf,
+            low_thresh=min(0.1, conf),
+            max_missed=max(1, round(float(fps) / detect_every)),
+        )
+        analytics = ZoneAnalytics(zones, ObjectDetection.get_model().names, fps)
+
+    def record_zone_events(events: List[Dict]) -> List[Dict]:
+        """Count tracked zone events and keep the first ``max_logged_events``; return the alerts."""
+
+        nonlocal zone_event_total, restricted_total
+        alerts = [event for event in events if analytics.is_alert(event)]
+        zone_event_total += len(events)
+        restricted_total += len(alerts)
+        for event in alerts:
+            zone_event_totals[event["zone"]] += 1
+        zone_events.extend(events[: max_logged_events - len(zone_events)])
+        restricted_events.extend(alerts[: max_logged_events - len(restricted_events)])
+        return alerts
+
+    frame_time = 0.0
+    completed = False
     try:
         while True:
             ret, frame = cap.read()
             if not ret:
                 break
+            if cancel is not None and cancel.should_stop(frames_processed):
+                break
+
+            frame_index = frames_processed
+            if tracker is None:
+                annotated, detections, restricted = analyze_frame(
+                    frame, conf=conf, zones=zones, render=render, renderer=renderer
+                )
+            else:
+                if frame_index % detect_every == 0:
+                    xyxy, class_ids, confidences = detect_objects(
+                        frame, conf=tracker.low_thresh, region=zone_region(zones, frame.shape)
+                    )
+                    tracks, removed = tracker.step(xyxy, confidences, class_ids)
+                else:
+                    tracks, removed = tracker.step()
+
+                annotated, detections, restricted = annotate_detections(
+                    frame,
+                    zones,
+                    np.array([t.bbox for t in tracks], dtype=np.float32).reshape(-1, 4),
+                    np.array([t.class_id for t in tracks], dtype=np.int64),
+                    np.array([t.confidence for t in tracks], dtype=np.float32),
+                    track_ids=[t.track_id for t in tracks],
+                    render=render,
+                    renderer=renderer,
+                )
+                frame_time = _stream_time(cap, frame_index, fps)
+                new_alerts = record_zone_events(
+                    analytics.update(tracks, removed, frame_index, frame.shape[:2], frame_time)
+                )
 
-            annotated, detections, restricted = analyze_frame(frame, conf=conf)
             frames_processed += 1
             detections_total += len(detections)
-            restricted_total += len(restricted)
+            restricted_detection_total += len(restricted)
 
             if detections and len(sample_detections) < max_logged_events:
                 sample_detections.append({
-                    "frame_index": frames_processed - 1,
+                    "frame_index": frame_index,
                     "items": detections,
                 })
 
-            if restricted and len(restricted_events) < max_logged_events:
-                restricted_events.extend(
-                    {
-                        **event,
-                        "frame_index": frames_processed - 1,
-                    }
-                    for event in restricted
-                )
-
+            if tracker is None:
+                restricted_total += len(restricted)
+                for event in restricted:
+                    for zone_name in event["zones"]:
+                        zone_event_totals[zone_name] += 1
+                if restricted and len(restricted_events) < max_logged_events:
+                    restricted_events.extend(
+                        {
+                            **event,
+                            "frame_index": frame_index,
+                        }
+                        for event in restricted
+                    )
+
+            if log is not None and detections:
+                log.append(frame_index, detections, [det.restricted for det in detections])
             if writer is not None:
-                writer.write(annotated)
+                writer.write(annotated, frame_index, flagged=bool(restricted), labels=[e["label"] for e in restricted])
+            if reporter is not None:
+                reporter.frame(frame_index, detections, new_alerts if tracker is not None else restricted)
+
+        if tracker is not None:
+            record_zone_events(analytics.finish(tracker.tracks, max(frames_processed - 1, 0), frame_time))
+        if reporter is not None:
+            reporter.finish()
+        completed = True
     finally:
         cap.release()
-        if writer is not None:
-            writer.release()
+        output_info = release_sink(writer, failed=not completed)
+        log_info = log.close() if log is not None else {}
 
-    return {
+    summary = {
+        "camera_id": zones.camera_id,
         "frames_processed": frames_processed,
         "detections_total": detections_total,
         "restricted_event_total": restricted_total,
+        "zone_event_totals": zone_event_totals,
         "sample_detections": sample_detections,
         "restricted_events": restricted_events,
     }
 
+    if tracker is not None:
+        # One alert per track and zone (on entry, or once its dwell threshold is reached)
+        # replaces the per-frame restricted flood
+        summary.update({
+            "restricted_detection_total": restricted_detection_total,
+            "zone_event_total": zone_event_total,
+            "zone_events": zone_events,
+            "line_crossings": analytics.line_counts,
+            "tracks_total": tracker.tracks_created,
+            "detect_every": detect_every,
+        })
+
+    summary.update(output_info)
+    summary.update(log_info)
+    summary.update(stop_summary(cancel))
+    return summary
+
 
 if __name__ == "__main__":
     # Example usages:
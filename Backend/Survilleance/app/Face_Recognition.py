@@ -1,26 +1,72 @@
 from __future__ import annotations
 
 import os
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 
 import cv2
 import numpy as np
 import torch
 from facenet_pytorch import InceptionResnetV1, MTCNN
 
+from Backend.common.cancellation import CancellationToken, stop_summary
+from Backend.common.detection_log import open_detection_log
+from Backend.common.detections import FaceMatch
+from Backend.common.images import load_frame
+from Backend.common.inference import IMAGE_SUFFIXES, load_embedder
+from Backend.common.progress import ProgressCallback, reporter_for
+from Backend.common.rendering import OverlayItem, OverlayRenderer, render_items
+from Backend.common.video_output import POST_ROLL_SECONDS, PRE_ROLL_SECONDS, create_video_sink, release_sink
+
+MODULE_DIR = Path(__file__).resolve().parent
+DEFAULT_KNOWN_FACES_DIR = MODULE_DIR.parent / "known_faces"
+
+
+def face_crops(mtcnn: MTCNN, folder: str | Path = DEFAULT_KNOWN_FACES_DIR) -> Iterator[np.ndarray]:
+    """Aligned face crops from the images in ``folder``, exactly as the embedder sees them."""
+
+    for path in sorted(Path(folder).glob("*")):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        img = cv2.imread(str(path))
+        if img is None:
+            continue
+        faces = mtcnn(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        if faces is not None:
+            yield from faces.cpu().numpy().astype(np.float32)
+
+
 # ------------------------------
 # GLOBAL MODEL LOADING (1 Dafa)
 # ------------------------------
-DEVICE = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-print(f"[INFO] Using device: {DEVICE}")
+# lru_cache alone lets two threads (warm-up and a first request) both build the models;
+# re-entrant because building a face system builds the models
+_MODELS_LOCK = threading.RLock()
 
-# Models load once
-GLOBAL_MTCNN = MTCNN(keep_all=True, device=DEVICE)
-GLOBAL_RESNET = InceptionResnetV1(pretrained='casia-webface').eval().to(DEVICE)
 
-MODULE_DIR = Path(__file__).resolve().parent
-DEFAULT_KNOWN_FACES_DIR = MODULE_DIR.parent / "known_faces"
+def get_models() -> Tuple[torch.device, MTCNN, InceptionResnetV1, Callable[[Any], np.ndarray]]:
+    """Device, detector, embedding network and embedder, built once on first use.
+
+    Deferred so importing this module stays cheap: the casia-webface weights may
+    have to be downloaded and the embedder exported to ONNX.
+    """
+
+    with _MODELS_LOCK:
+        return _build_models()
+
+
+@lru_cache(maxsize=1)
+def _build_models() -> Tuple[torch.device, MTCNN, InceptionResnetV1, Callable[[Any], np.ndarray]]:
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    print(f"[INFO] Using device: {device}")
+    mtcnn = MTCNN(keep_all=True, device=device)
+    resnet = InceptionResnetV1(pretrained='casia-webface').eval().to(device)
+    # PyTorch by default; ONNX Runtime (optionally INT8) with INFERENCE_BACKEND=onnx,
+    # calibrated and checked on the known faces
+    embed = load_embedder(resnet, MODULE_DIR / "facenet_casia", samples=lambda: face_crops(mtcnn))
+    return device, mtcnn, resnet, embed
 
 
 class FaceRecognitionSystem:
@@ -32,11 +78,9 @@ class FaceRecognitionSystem:
         cam_index: int | None = None,
     ) -> None:
         # Use globally loaded models
-        self.mtcnn = GLOBAL_MTCNN
-        self.resnet = GLOBAL_RESNET
-        self.device = DEVICE
+        self.device, self.mtcnn, self.resnet, self.embed = get_models()
         self.face_db: Dict[str, np.ndarray] = {}
-        self.latest_detections: List[Dict[str, Any]] = []
+        self.latest_detections: List[FaceMatch] = []
         self.known_faces_folder = Path(known_faces_folder).resolve()
 
         # Step 1: Register known faces
@@ -78,7 +122,7 @@ class FaceRecognitionSystem:
             faces = self.mtcnn(rgb)
 
             if faces is not None:
-                emb = self.resnet(faces[0].unsqueeze(0).to(self.device)).detach().cpu().numpy()
+                emb = self.embed(faces[0].unsqueeze(0))
                 name = file_path.stem
                 self.face_db[name] = emb
                 print(f"[INFO] Registered {name}")
@@ -88,8 +132,15 @@ class FaceRecognitionSystem:
     # ------------------------------
     # Recognition Function
     # ------------------------------
-    def recognize(self, frame, distance_threshold: float = 0.9):
+    def recognize(
+        self,
+        frame,
+        distance_threshold: float = 0.9,
+        render: bool = True,
+        renderer: OverlayRenderer | None = None,
+    ):
         self.latest_detections = []
+        overlays: List[OverlayItem] = []
 
         if frame is None:
             return frame
@@ -101,7 +152,7 @@ class FaceRecognitionSystem:
         if faces is None or boxes is None:
             return frame
 
-        embeddings = self.resnet(faces.to(self.device)).detach().cpu().numpy()
+        embeddings = self.embed(faces)
 
         for (box, emb) in zip(boxes, embeddings):
             if box is None:
@@ -125,16 +176,18 @@ class FaceRecognitionSystem:
                 color = (0, 0, 255)
                 print(f"[DENIED] Unknown person detected. Distance={min_dist:.2f}")
 
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(frame, label, (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+            if render:
+                overlays.append(OverlayItem((x1, y1, x2, y2), color, label, font_scale=0.8, text_offset=10))
 
-            self.latest_detections.append({
-                "label": identity if authorized else "Unknown",
-                "distance": round(float(min_dist), 4) if min_dist != float("inf") else None,
-                "authorized": authorized,
-                "bbox": [x1, y1, x2, y2],
-            })
+            self.latest_detections.append(FaceMatch(
+                identity if authorized else "Unknown",
+                (x1, y1, x2, y2),
+                authorized=authorized,
+                distance=round(float(min_dist), 4) if min_dist != float("inf") else None,
+            ))
+
+        if render:
+            render_items(frame, overlays, renderer)
 
         return frame
 
@@ -191,40 +244,48 @@ def get_face_system(known_faces_folder: str | Path | None = None) -> FaceRecogni
     folder = Path(known_faces_folder) if known_faces_folder is not None else DEFAULT_KNOWN_FACES_DIR
     folder = folder.resolve()
 
-    system = FACE_SYSTEM_CACHE.get(folder)
-    if system is None:
-        system = FaceRecognitionSystem(known_faces_folder=folder)
-        FACE_SYSTEM_CACHE[folder] = system
+    with _MODELS_LOCK:
+        system = FACE_SYSTEM_CACHE.get(folder)
+        if system is None:
+            system = FaceRecognitionSystem(known_faces_folder=folder)
+            FACE_SYSTEM_CACHE[folder] = system
     return system
 
 
 def recognize_image(
-    image_path: str | Path,
+    image_path: str | Path | np.ndarray,
     output_path: str | Path | None = None,
     known_faces_folder: str | Path | None = None,
     distance_threshold: float = 0.9,
+    render: bool = True,
+    write: bool = True,
 ) -> Dict[str, Any]:
-    system = get_face_system(known_faces_folder)
-    image_path = Path(image_path)
-    frame = cv2.imread(str(image_path))
-    if frame is None:
-        raise FileNotFoundError(f"Unable to read image: {image_path}")
+    """Recognise faces in a still image (a path or a decoded frame).
 
-    annotated = system.recognize(frame, distance_threshold=distance_threshold)
-    detections = [det.copy() for det in getattr(system, "latest_detections", [])]
+    With ``write`` False the annotated frame is returned as ``annotated_frame``.
+    """
 
-    if output_path is not None:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        cv2.imwrite(str(output_path), annotated)
+    system = get_face_system(known_faces_folder)
+    frame = load_frame(image_path)
 
-    authorized = [det for det in detections if det.get("authorized")]
+    render = render and output_path is not None
+    annotated = system.recognize(frame, distance_threshold=distance_threshold, render=render)
+    detections = list(getattr(system, "latest_detections", []))
 
-    return {
+    authorized = [det for det in detections if det.authorized]
+
+    summary = {
         "detections_count": len(detections),
         "authorized_count": len(authorized),
         "detections": detections,
     }
+    if render and not write:
+        summary["annotated_frame"] = annotated
+    elif render:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(output_path), annotated)
+    return summary
 
 
 def recognize_video(
@@ -233,6 +294,14 @@ def recognize_video(
     known_faces_folder: str | Path | None = None,
     distance_threshold: float = 0.9,
     max_logged_events: int = 50,
+    render: bool = True,
+    output_mode: str = "full",
+    pre_roll: float = PRE_ROLL_SECONDS,
+    post_roll: float = POST_ROLL_SECONDS,
+    hls: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancellationToken | None = None,
+    detection_log: str | Path | None = None,
 ) -> Dict[str, Any]:
     system = get_face_system(known_faces_folder)
     video_path = Path(video_path)
@@ -243,40 +312,49 @@ def recognize_video(
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
     fps = cap.get(cv2.CAP_PROP_FPS) or 24.0
+    reporter = reporter_for(progress, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), fps)
+    log = open_detection_log(detection_log, fps)
 
     writer = None
-    if output_path is not None and width > 0 and height > 0:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        writer = cv2.VideoWriter(
-            str(output_path),
-            cv2.VideoWriter_fourcc(*"mp4v"),
-            float(fps),
-            (width, height),
+    if render and output_path is not None and width > 0 and height > 0:
+        writer = create_video_sink(
+            output_path, fps, (width, height), output_mode, pre_roll, post_roll,
+            hls=hls, on_hls=reporter.hls if reporter is not None else None,
         )
 
+    renderer = OverlayRenderer() if writer is not None else None
     frames_processed = 0
     detections_total = 0
+    authorized_total = 0
     authorized_events: List[Dict[str, Any]] = []
     sample_detections: List[Dict[str, Any]] = []
 
+    completed = False
     try:
         while True:
             ret, frame = cap.read()
             if not ret:
                 break
+            if cancel is not None and cancel.should_stop(frames_processed):
+                break
 
-            annotated = system.recognize(frame, distance_threshold=distance_threshold)
-            detections = [det.copy() for det in getattr(system, "latest_detections", [])]
+            annotated = system.recognize(
+                frame,
+                distance_threshold=distance_threshold,
+                render=renderer is not None,
+                renderer=renderer,
+            )
+            detections = list(getattr(system, "latest_detections", []))
             frames_processed += 1
             detections_total += len(detections)
 
-            authorized = [det for det in detections if det.get("authorized")]
+            authorized = [det for det in detections if det.authorized]
+            authorized_total += len(authorized)
             if authorized and len(authorized_events) < max_logged_events:
-                for det in authorized:
-                    enriched = det.copy()
-                    enriched.setdefault("frame_index", frames_processed - 1)
-                    authorized_events.append(enriched)
+                authorized_events.extend(
+                    {**det.as_dict(), "frame_index": frames_processed - 1}
+                    for det in authorized
+                )
 
             if detections and len(sample_detections) < max_logged_events:
                 sample_detections.append({
@@ -284,19 +362,32 @@ def recognize_video(
                     "items": detections,
                 })
 
+            if log is not None and detections:
+                log.append(frames_processed - 1, detections, [det.authorized for det in detections])
             if writer is not None:
-                writer.write(annotated)
+                # Clip events: matches, and unknown faces rejected against a non-empty database
+                events = [det for det in detections if det.authorized or det.distance is not None]
+                writer.write(annotated, frames_processed - 1, flagged=bool(events), labels=[d.label for d in events])
+            if reporter is not None:
+                reporter.frame(frames_processed - 1, detections, authorized)
+
+        if reporter is not None:
+            reporter.finish()
+        completed = True
     finally:
         cap.release()
-        if writer is not None:
-            writer.release()
+        output_info = release_sink(writer, failed=not completed)
+        log_info = log.close() if log is not None else {}
 
     return {
         "frames_processed": frames_processed,
         "detections_total": detections_total,
-        "authorized_events_total": len(authorized_events),
+        "authorized_events_total": authorized_total,
         "authorized_events": authorized_events,
         "sample_detections": sample_detections,
+        **output_info,
+        **log_info,
+        **stop_summary(cancel),
     }
 
 
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .Restricted_zones import ZoneSet
+
+
+# ------------------------------
+# Multi-object tracker (ByteTrack-style two-stage IoU association)
+# ------------------------------
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes."""
+
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def greedy_match(scores: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """Greedily pair rows and columns by descending score, ignoring pairs below ``threshold``."""
+
+    matches: List[Tuple[int, int]] = []
+    if scores.size == 0:
+        return matches
+
+    used_rows: set[int] = set()
+    used_cols: set[int] = set()
+    for flat_index in np.argsort(-scores, axis=None):
+        row, col = divmod(int(flat_index), scores.shape[1])
+        if scores[row, col] < threshold:
+            break
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        matches.append((row, col))
+    return matches
+
+
+@dataclass
+class Track:
+    track_id: int
+    bbox: np.ndarray  # float32 xyxy
+    class_id: int
+    confidence: float
+    first_frame: int
+    velocity: np.ndarray = field(default_factory=lambda: np.zeros(4, dtype=np.float32))  # per frame
+    hits: int = 1
+    missed: int = 0  # consecutive keyframes without a matching detection
+    last_observed: np.ndarray | None = None
+    last_frame: int = -1
+
+    def __post_init__(self) -> None:
+        if self.last_observed is None:
+            self.last_observed = self.bbox.copy()
+            self.last_frame = self.first_frame
+
+    def predict(self) -> None:
+        self.bbox = self.bbox + self.velocity
+
+    def update(self, bbox: np.ndarray, confidence: float, frame_index: int) -> None:
+        elapsed = max(1, frame_index - self.last_frame)
+        observed_velocity = (bbox - self.last_observed) / elapsed
+        self.velocity = (0.5 * self.velocity + 0.5 * observed_velocity).astype(np.float32)
+        self.bbox = bbox.astype(np.float32)
+        self.last_observed = self.bbox.copy()
+        self.last_frame = frame_index
+        self.confidence = confidence
+        self.hits += 1
+        self.missed = 0
+
+    @property
+    def center(self) -> np.ndarray:
+        return (self.bbox[:2] + self.bbox[2:]) / 2
+
+
+class ByteTracker:
+    """Associate per-frame detections into persistent tracks.
+
+    High-confidence detections are matched first; leftover tracks then get a second
+    chance against low-confidence detections, which keeps occluded objects alive
+    without letting weak detections spawn new tracks. Calling :meth:`step` with
+    ``None`` advances tracks by their velocity so detection can be skipped between
+    keyframes.
+
+    Only confirmed tracks (``min_hits`` matches, or born on the first frame) that were
+    matched on the last keyframe, or have missed at most ``max_coast`` keyframes, are
+    returned; lost tracks are kept for re-association for up to ``max_missed``
+    keyframes but not reported.
+    """
+
+    def __init__(
+        self,
+        high_thresh: float = 0.5,
+        low_thresh: float = 0.1,
+        match_iou: float = 0.3,
+        low_match_iou: float = 0.5,
+        max_missed: int = 30,
+        min_hits: int = 2,
+        max_coast: int = 0,
+    ) -> None:
+        self.high_thresh = high_thresh
+        self.low_thresh = low_thresh
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_missed = max_missed
+        self.min_hits = max(1, min_hits)
+        self.max_coast = max(0, min(max_coast, max_missed))
+        self.tracks: List[Track] = []
+        self.frame_index = -1
+        self._next_id = 1
+
+    @property
+    def tracks_created(self) -> int:
+        return self._next_id - 1
+
+    def _visible(self) -> List[Track]:
+        return [
+            track
+            for track in self.tracks
+            if track.missed <= self.max_coast and (track.hits >= self.min_hits or track.first_frame == 0)
+        ]
+
+    def _associate(self, tracks: List[Track], boxes: np.ndarray, class_ids: np.ndarray, threshold: float):
+        track_boxes = np.array([track.bbox for track in tracks], dtype=np.float32).reshape(-1, 4)
+        track_classes = np.array([track.class_id for track in tracks], dtype=np.int64)
+        scores = iou_matrix(track_boxes, boxes)
+        scores[track_classes[:, None] != class_ids[None, :]] = 0.0
+        return greedy_match(scores, threshold)
+
+    def step(
+        self,
+        boxes: np.ndarray | None = None,
+        confidences: np.ndarray | None = None,
+        class_ids: np.ndarray | None = None,
+    ) -> Tuple[List[Track], List[Track]]:
+        """Advance one frame; return ``(visible_tracks, removed_tracks)``."""
+
+        self.frame_index += 1
+        for track in self.tracks:
+            track.predict()
+
+        if boxes is None:
+            return self._visible(), []
+
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        class_ids = np.asarray(class_ids, dtype=np.int64).reshape(-1)
+
+        high = np.flatnonzero(confidences >= self.high_thresh)
+        low = np.flatnonzero((confidences >= self.low_thresh) & (confidences < self.high_thresh))
+
+        unmatched_tracks = list(range(len(self.tracks)))
+        matched_high: set[int] = set()
+        for stage, (stage_indices, threshold) in enumerate(((high, self.match_iou), (low, self.low_match_iou))):
+            if not unmatched_tracks or len(stage_indices) == 0:
+                continue
+            candidates = [self.tracks[index] for index in unmatched_tracks]
+            pairs = self._associate(candidates, boxes[stage_indices], class_ids[stage_indices], threshold)
+            matched_rows: set[int] = set()
+            for row, col in pairs:
+                det_index = int(stage_indices[col])
+                candidates[row].update(boxes[det_index], float(confidences[det_index]), self.frame_index)
+                matched_rows.add(row)
+                if stage == 0:
+                    matched_high.add(det_index)
+            unmatched_tracks = [index for row, index in enumerate(unmatched_tracks) if row not in matched_rows]
+
+        for index in unmatched_tracks:
+            self.tracks[index].missed += 1
+
+        for det_index in high.tolist():
+            if det_index in matched_high:
+                continue
+            self.tracks.append(Track(
+                track_id=self._next_id,
+                bbox=boxes[det_index].copy(),
+                class_id=int(class_ids[det_index]),
+                confidence=float(confidences[det_index]),
+                first_frame=self.frame_index,
+            ))
+            self._next_id += 1
+
+        removed = [track for track in self.tracks if track.missed > self.max_missed]
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        return self._visible(), removed
+
+
+# ------------------------------
+# Zone dwell / line-crossing analytics
+# ------------------------------
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """2-D cross product (z component), broadcasting over leading axes."""
+
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+@dataclass
+class _TrackZoneState:
+    bits: int
+    entered_at: np.ndarray  # per-zone stream time (seconds) of entry, -1 when outside
+    dwell_fired: int
+    center: np.ndarray
+    label: str
+
+
+class ZoneAnalytics:
+    """Turn track positions into compact enter / exit / dwell / line-crossing events.
+
+    :meth:`is_alert` tells which events raise an alert: ``dwell`` for zones with a
+    ``dwell_seconds`` threshold, ``enter`` for zones without one.
+
+    Dwell is measured in stream time: :meth:`update` takes the frame's timestamp, and
+    only falls back to ``frame_index / fps`` when the caller has none.
+    """
+
+    def __init__(self, zones: ZoneSet, names: Dict[int, str] | Sequence[str], fps: float) -> None:
+        self.zones = zones
+        self.names = names
+        self.fps = float(fps or 0.0)
+        self.dwell_seconds = np.array(
+            [zone.dwell_seconds if zone.dwell_seconds > 0 else np.inf for zone in zones.zones],
+            dtype=np.float64,
+        )
+        self.line_counts: Dict[str, Dict[str, int]] = {
+            line.name: {"in": 0, "out": 0} for line in zones.lines
+        }
+        self._dwell_zones = {zone.name for zone in zones.zones if zone.dwell_seconds > 0}
+        self._state: Dict[int, _TrackZoneState] = {}
+
+    def is_alert(self, event: Dict[str, Any]) -> bool:
+        if event["event"] == "dwell":
+            return True
+        return event["event"] == "enter" and event.get("zone") not in self._dwell_zones
+
+    def _time(self, frame_index: int, time_sec: float | None) -> float:
+        if time_sec is not None:
+            return float(time_sec)
+        if self.fps <= 0:
+            raise ValueError("Zone analytics need frame timestamps or the stream fps")
+        return frame_index / self.fps
+
+    def _event(self, kind: str, track: Track, frame_index: int, now: float, **extra: Any) -> Dict[str, Any]:
+        x1, y1, x2, y2 = (int(value) for value in track.bbox)
+        return {
+            "event": kind,
+            "track_id": track.track_id,
+            "label": self.names[track.class_id],
+            "confidence": round(track.confidence, 4),
+            "bbox": [x1, y1, x2, y2],
+            "frame_index": frame_index,
+            "time_sec": round(now, 2),
+            **extra,
+        }
+
+    def _zone_events(self, kind: str, track: Track, bits: int, frame_index: int, now: float, state: _TrackZoneState):
+        events = []
+        for index, zone in enumerate(self.zones.zones):
+            if not bits >> index & 1:
+                continue
+            extra: Dict[str, Any] = {"zone": zone.name}
+            if kind != "enter" and state.entered_at[index] >= 0:
+                extra["dwell_sec"] = round(now - state.entered_at[index], 2)
+            events.append(self._event(kind, track, frame_index, now, **extra))
+        return events
+
+    def _line_events(self, tracks: List[Track], previous: np.ndarray, current: np.ndarray, frame_index: int, now: float, shape):
+        events: List[Dict[str, Any]] = []
+        for line, (p1, p2) in zip(self.zones.lines, self.zones.scaled_lines(shape)):
+            direction = (p2 - p1).astype(np.float64)
+            side_prev = _cross(direction, previous - p1)
+            side_curr = _cross(direction, current - p1)
+            seg = current - previous
+            side_p1 = _cross(seg, p1 - previous)
+            side_p2 = _cross(seg, p2 - previous)
+            crossed = (side_prev * side_curr < 0) & (side_p1 * side_p2 < 0)
+            for index in np.flatnonzero(crossed):
+                track = tracks[index]
+                label = self.names[track.class_id]
+                if line.classes and label not in line.classes:
+                    continue
+                heading = "in" if side_curr[index] > 0 else "out"
+                self.line_counts[line.name][heading] += 1
+                events.append(self._event("line_cross", track, frame_index, now, line=line.name, direction=heading))
+        return events
+
+    def update(
+        self,
+        tracks: List[Track],
+        removed: List[Track],
+        frame_index: int,
+        shape: Tuple[int, int],
+        time_sec: float | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Compare this frame's track positions with the last ones and emit events.
+
+        ``time_sec`` is the frame's timestamp in the stream (default ``frame_index / fps``).
+        """
+
+        now = self._time(frame_index, time_sec)
+        events: List[Dict[str, Any]] = []
+        zone_count = len(self.zones.zones)
+
+        for track in removed:
+            state = self._state.pop(track.track_id, None)
+            if state is not None and state.bits:
+                events.extend(self._zone_events("exit", track, state.bits, frame_index, now, state))
+
+        if not tracks:
+            return events
+
+        centers = np.array([track.center for track in tracks], dtype=np.float64)
+        class_ids = np.array([track.class_id for track in tracks], dtype=np.int64)
+        bits = self.zones.match(centers.astype(np.int32), class_ids, self.names, shape).astype(np.uint64)
+
+        states = [self._state.get(track.track_id) for track in tracks]
+        previous_bits = np.array([state.bits if state else 0 for state in states], dtype=np.uint64)
+        previous_centers = np.array(
+            [state.center if state else center for state, center in zip(states, centers)],
+            dtype=np.float64,
+        )
+        entered = bits & ~previous_bits
+        exited = previous_bits & ~bits
+
+        for index in np.flatnonzero(entered | exited):
+            track = tracks[index]
+            state = states[index]
+            if state is None:
+                state = _TrackZoneState(0, np.full(zone_count, -1.0), 0, centers[index], self.names[track.class_id])
+                self._state[track.track_id] = state
+                states[index] = state
+            if exited[index]:
+                events.extend(self._zone_events("exit", track, int(exited[index]), frame_index, now, state))
+                for zone_index in range(zone_count):
+                    if int(exited[index]) >> zone_index & 1:
+                        state.entered_at[zone_index] = -1
+                        state.dwell_fired &= ~(1 << zone_index)
+            if entered[index]:
+                for zone_index in range(zone_count):
+                    if int(entered[index]) >> zone_index & 1:
+                        state.entered_at[zone_index] = now
+                events.extend(self._zone_events("enter", track, int(entered[index]), frame_index, now, state))
+
+        # Dwell: one vectorised comparison of time-in-zone against each zone threshold
+        inside = [index for index, state in enumerate(states) if state is not None and int(bits[index])]
+        if inside and np.isfinite(self.dwell_seconds).any():
+            entered_at = np.stack([states[index].entered_at for index in inside])
+            elapsed = np.where(entered_at >= 0, now - entered_at, -1)
+            due = elapsed >= self.dwell_seconds[None, :]
+            for row, index in enumerate(inside):
+                state = states[index]
+                fired = 0
+                for zone_index in np.flatnonzero(due[row]):
+                    fired |= 1 << int(zone_index)
+                new_bits = fired & ~state.dwell_fired
+                if new_bits:
+                    state.dwell_fired |= new_bits
+                    events.extend(self._zone_events("dwell", tracks[index], new_bits, frame_index, now, state))
+
+        if self.zones.lines:
+            events.extend(self._line_events(tracks, previous_centers, centers, frame_index, now, shape))
+
+        for index, track in enumerate(tracks):
+            state = states[index]
+            if state is None:
+                state = _TrackZoneState(0, np.full(zone_count, -1.0), 0, centers[index], self.names[track.class_id])
+                self._state[track.track_id] = state
+            state.bits = int(bits[index])
+            state.center = centers[index]
+
+        return events
+
+    def finish(self, tracks: List[Track], frame_index: int, time_sec: float | None = None) -> List[Dict[str, Any]]:
+        """Close out zones for tracks still alive at the end of the video."""
+
+        return self.update([], tracks, frame_index, (0, 0), time_sec)
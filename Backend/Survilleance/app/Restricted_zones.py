@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+MODULE_DIR = Path(__file__).resolve().parent
+ZONES_DIR = MODULE_DIR.parent / "zones"
+MAX_ZONES = 64
+
+
+@dataclass(frozen=True)
+class Zone:
+    """A restricted polygon with its own object classes and dwell threshold."""
+
+    name: str
+    polygon: np.ndarray  # (N, 2) int32 points in reference-frame pixels
+    classes: Tuple[str, ...] = ()  # empty -> every class is restricted
+    dwell_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "polygon": self.polygon.tolist(),
+            "classes": list(self.classes),
+            "dwell_seconds": self.dwell_seconds,
+        }
+
+
+@dataclass(frozen=True)
+class CountingLine:
+    """A directed tripwire; crossings to the left of ``p1 -> p2`` count as ``in``."""
+
+    name: str
+    points: np.ndarray  # (2, 2) int32 endpoints in reference-frame pixels
+    classes: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "points": self.points.tolist(), "classes": list(self.classes)}
+
+
+@dataclass
+class ZoneSet:
+    """All zones of one camera, rasterised into a per-pixel bitmask on first use.
+
+    Bit ``i`` of ``mask[y, x]`` is set when pixel ``(x, y)`` lies inside zone ``i``,
+    so testing every detection against every zone is a single fancy-index lookup.
+    """
+
+    camera_id: str
+    zones: List[Zone]
+    frame_size: Tuple[int, int] | None = None  # (width, height) the polygons were drawn on
+    lines: List[CountingLine] = field(default_factory=list)
+    _masks: Dict[Tuple[int, int], np.ndarray] = field(default_factory=dict, repr=False)
+    _class_bits: Dict[Tuple[Tuple[int, str], ...], np.ndarray] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self) -> None:
+        if len(self.zones) > MAX_ZONES:
+            raise ValueError(f"At most {MAX_ZONES} zones per camera are supported, got {len(self.zones)}")
+
+    @property
+    def dtype(self) -> np.dtype:
+        count = len(self.zones)
+        if count <= 8:
+            return np.dtype(np.uint8)
+        if count <= 16:
+            return np.dtype(np.uint16)
+        if count <= 32:
+            return np.dtype(np.uint32)
+        return np.dtype(np.uint64)
+
+    def _scale(self, points: List[np.ndarray], shape: Tuple[int, int]) -> List[np.ndarray]:
+        height, width = shape
+        if self.frame_size is None or tuple(self.frame_size) == (width, height):
+            return points
+
+        ref_w, ref_h = self.frame_size
+        scale = np.array([width / ref_w, height / ref_h])
+        return [np.round(item * scale).astype(np.int32) for item in points]
+
+    def scaled_polygons(self, shape: Tuple[int, int]) -> List[np.ndarray]:
+        """Return zone polygons scaled from ``frame_size`` to a frame of ``shape`` (h, w)."""
+
+        return self._scale([zone.polygon for zone in self.zones], shape)
+
+    def scaled_lines(self, shape: Tuple[int, int]) -> List[np.ndarray]:
+        """Return counting-line endpoints scaled to a frame of ``shape`` (h, w)."""
+
+        return self._scale([line.points for line in self.lines], shape)
+
+    def mask_for(self, shape: Tuple[int, int]) -> np.ndarray:
+        """Return (and cache) the zone bitmask for frames of ``shape`` (h, w)."""
+
+        key = (int(shape[0]), int(shape[1]))
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.zeros(key, dtype=self.dtype)
+            layer = np.zeros(key, dtype=np.uint8)
+            for index, polygon in enumerate(self.scaled_polygons(key)):
+                layer[:] = 0
+                cv2.fillPoly(layer, [polygon.reshape(-1, 1, 2)], 1)
+                mask[layer.astype(bool)] |= self.dtype.type(1 << index)
+            self._masks[key] = mask
+        return mask
+
+    def class_bits(self, names: Dict[int, str] | Sequence[str]) -> np.ndarray:
+        """Map every model class id to the bitmask of zones that restrict it."""
+
+        items = names.items() if isinstance(names, dict) else enumerate(names)
+        key = tuple((int(class_id), str(class_name)) for class_id, class_name in items)
+        bits = self._class_bits.get(key)
+        if bits is None:
+            lookup = dict(key)
+            bits = np.zeros(max(lookup, default=-1) + 1, dtype=self.dtype)
+            for class_id, class_name in lookup.items():
+                value = 0
+                for index, zone in enumerate(self.zones):
+                    if not zone.classes or class_name in zone.classes:
+                        value |= 1 << index
+                bits[class_id] = value
+            self._class_bits[key] = bits
+        return bits
+
+    def match(
+        self,
+        centers: np.ndarray,
+        class_ids: np.ndarray,
+        names: Dict[int, str] | Sequence[str],
+        shape: Tuple[int, int],
+    ) -> np.ndarray:
+        """Return a (N,) bitmask of the zones each detection center violates."""
+
+        if len(centers) == 0 or not self.zones:
+            return np.zeros(len(centers), dtype=self.dtype)
+
+        mask = self.mask_for(shape)
+        xs = np.clip(centers[:, 0], 0, shape[1] - 1)
+        ys = np.clip(centers[:, 1], 0, shape[0] - 1)
+        inside = (centers[:, 0] == xs) & (centers[:, 1] == ys)
+        hits = mask[ys, xs] & self.class_bits(names)[class_ids]
+        return np.where(inside, hits, 0).astype(self.dtype)
+
+    def membership(self, bits: np.ndarray) -> np.ndarray:
+        """Expand a bitmask vector into a (N, Z) boolean membership matrix."""
+
+        shifts = np.arange(len(self.zones), dtype=self.dtype)
+        return ((bits[:, None] >> shifts) & 1).astype(bool)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "camera_id": self.camera_id,
+            "frame_size": list(self.frame_size) if self.frame_size else None,
+            "zones": [zone.to_dict() for zone in self.zones],
+            "lines": [line.to_dict() for line in self.lines],
+        }
+
+
+def _parse_zone(raw: Dict[str, Any], index: int) -> Zone:
+    if "polygon" in raw:
+        points = raw["polygon"]
+    elif "rect" in raw:
+        x1, y1, x2, y2 = raw["rect"]
+        points = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+    else:
+        raise ValueError(f"Zone #{index} needs either 'polygon' or 'rect'")
+
+    polygon = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+    if len(polygon) < 3:
+        raise ValueError(f"Zone #{index} polygon needs at least 3 points")
+
+    return Zone(
+        name=str(raw.get("name") or f"zone_{index}"),
+        polygon=polygon,
+        classes=tuple(raw.get("classes") or ()),
+        dwell_seconds=float(raw.get("dwell_seconds", 0.0) or 0.0),
+    )
+
+
+def _parse_line(raw: Dict[str, Any], index: int) -> CountingLine:
+    points = np.asarray(raw.get("points", []), dtype=np.int32).reshape(-1, 2)
+    if len(points) != 2:
+        raise ValueError(f"Line #{index} needs exactly 2 points")
+
+    return CountingLine(
+        name=str(raw.get("name") or f"line_{index}"),
+        points=points,
+        classes=tuple(raw.get("classes") or ()),
+    )
+
+
+def zone_set_from_dict(payload: Dict[str, Any], camera_id: str = "default") -> ZoneSet:
+    """Build a :class:`ZoneSet` from a parsed camera config."""
+
+    frame_size = payload.get("frame_size")
+    return ZoneSet(
+        camera_id=str(payload.get("camera_id") or camera_id),
+        zones=[_parse_zone(raw, index) for index, raw in enumerate(payload.get("zones", []))],
+        frame_size=(int(frame_size[0]), int(frame_size[1])) if frame_size else None,
+        lines=[_parse_line(raw, index) for index, raw in enumerate(payload.get("lines", []))],
+    )
+
+
+# One entry per config path, replaced when the file's (mtime, size) stamp changes
+_ZONE_SET_CACHE: Dict[str, Tuple[Tuple[int, int] | None, ZoneSet]] = {}
+
+
+def clear_zone_cache(camera_id: str | None = None) -> None:
+    """Drop cached zone sets (all, or only ``camera_id``'s) so the next load re-reads them."""
+
+    if camera_id is None:
+        _ZONE_SET_CACHE.clear()
+        return
+    name = f"{Path(camera_id).name}.json"
+    for key in [key for key in _ZONE_SET_CACHE if Path(key).name == name]:
+        _ZONE_SET_CACHE.pop(key, None)
+
+
+def load_zone_set(camera_id: str | None, default: Dict[str, Any], zones_dir: Path = ZONES_DIR) -> ZoneSet:
+    """Load ``<zones_dir>/<camera_id>.json``, falling back to ``default``.
+
+    The cached set is reused while the file's modification time and size are unchanged,
+    so edits (and deleting the file) take effect without a restart.
+    """
+
+    camera = Path(camera_id or "default").name
+    config_path = zones_dir / f"{camera}.json"
+    try:
+        info = config_path.stat()
+        stamp: Tuple[int, int] | None = (info.st_mtime_ns, info.st_size)
+    except FileNotFoundError:
+        stamp = None
+
+    key = str(config_path)
+    cached = _ZONE_SET_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    payload = json.loads(config_path.read_text()) if stamp is not None else default
+    zone_set = zone_set_from_dict(payload, camera_id=camera)
+    _ZONE_SET_CACHE[key] = (stamp, zone_set)
+    return zone_set
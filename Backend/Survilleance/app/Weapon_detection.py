@@ -5,8 +5,20 @@ from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 import cv2
+import numpy as np
 from ultralytics import YOLO
 
+from Backend.common.batching import MicroBatcher
+from Backend.common.cancellation import CancellationToken, stop_summary
+from Backend.common.detection_log import open_detection_log
+from Backend.common.detections import WeaponDetection
+from Backend.common.images import load_frame
+from Backend.common.inference import load_yolo
+from Backend.common.progress import ProgressCallback, reporter_for
+from Backend.common.rendering import OverlayItem, OverlayRenderer, render_items
+from Backend.common.roi import imgsz_for
+from Backend.common.video_output import POST_ROLL_SECONDS, PRE_ROLL_SECONDS, create_video_sink, release_sink
+
 # ------------------------------
 # Global Model Load (lazy)
 # ------------------------------
@@ -20,15 +32,18 @@ def get_model() -> YOLO:
     global _MODEL
     if _MODEL is None:
         try:
-            _MODEL = YOLO(str(MODEL_PATH))
+            _MODEL = load_yolo(MODEL_PATH, "weapon")
             print(f"✅ Weapon detection model loaded successfully: {MODEL_PATH}")
         except Exception as exc:  # pragma: no cover - depends on environment
             print(f"❌ Error loading weapon detection model: {exc}")
             print("⚠️ Falling back to YOLOv8n...")
-            _MODEL = YOLO(str(FALLBACK_MODEL_PATH))
+            _MODEL = load_yolo(FALLBACK_MODEL_PATH, "weapon")
     return _MODEL
 
 
+_batched_predict = MicroBatcher(lambda frames, conf, imgsz: get_model()(list(frames), conf=conf, imgsz=imgsz))
+
+
 class ObjectDetection:
     def __init__(self, mode="image", path=None, cam_index=0, conf_thresh=0.3):
         """
@@ -120,13 +135,19 @@ class ObjectDetection:
 # ------------------------------
 # Reusable helpers for API integration
 # ------------------------------
-def detect_frame(frame, conf_thresh: float = 0.3) -> Tuple[Any, List[Dict]]:
-    """Annotate a frame with weapon detections and return metadata."""
+def detect_frame(
+    frame,
+    conf_thresh: float = 0.3,
+    render: bool = True,
+    renderer: OverlayRenderer | None = None,
+) -> Tuple[Any, List[WeaponDetection]]:
+    """Optionally annotate a frame with weapon detections and return metadata."""
 
     model = get_model()
-    detections: List[Dict] = []
+    detections: List[WeaponDetection] = []
+    overlays: List[OverlayItem] = []
 
-    results = model(frame, conf=conf_thresh)
+    results = [_batched_predict(frame, conf=conf_thresh, imgsz=imgsz_for("weapon", frame.shape))]
     for result in results:
         if result.boxes is None or len(result.boxes) == 0:
             continue
@@ -143,58 +164,61 @@ def detect_frame(frame, conf_thresh: float = 0.3) -> Tuple[Any, List[Dict]]:
 
             is_weapon = any(keyword in class_name.lower() for keyword in WEAPON_KEYWORDS)
 
-            bbox_color = (0, 0, 255) if is_weapon else (0, 255, 0)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), bbox_color, 2)
-            label_prefix = "🚨" if is_weapon else ""
-            cv2.putText(
-                frame,
-                f"{label_prefix} {class_name} {confidence:.2f}".strip(),
-                (x1, y1 - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                bbox_color,
-                2,
+            if render:
+                bbox_color = (0, 0, 255) if is_weapon else (0, 255, 0)
+                label_prefix = "🚨" if is_weapon else ""
+                overlays.append(OverlayItem(
+                    (x1, y1, x2, y2),
+                    bbox_color,
+                    f"{label_prefix} {class_name} {confidence:.2f}".strip(),
+                    font_scale=0.7,
+                    text_offset=10,
+                ))
+
+            detection_record = WeaponDetection(
+                class_name,
+                (x1, y1, x2, y2),
+                round(confidence, 4),
+                is_weapon=is_weapon,
+                timestamp=datetime.datetime.now().strftime("%H:%M:%S") if is_weapon else None,
             )
-
-            detection_record = {
-                "label": class_name,
-                "confidence": round(confidence, 4),
-                "bbox": [x1, y1, x2, y2],
-                "is_weapon": is_weapon,
-            }
-
-            if is_weapon:
-                detection_record["timestamp"] = datetime.datetime.now().strftime("%H:%M:%S")
-
             detections.append(detection_record)
 
+    if render:
+        render_items(frame, overlays, renderer)
+
     return frame, detections
 
 
 def analyze_image(
-    image_path: str | Path,
+    image_path: str | Path | np.ndarray,
     output_path: str | Path | None = None,
     conf_thresh: float = 0.3,
+    render: bool = True,
+    write: bool = True,
 ) -> Dict:
-    """Run weapon detection on a still image."""
+    """Run weapon detection on a still image (a path or a decoded frame).
 
-    image_path = Path(image_path)
-    frame = cv2.imread(str(image_path))
-    if frame is None:
-        raise FileNotFoundError(f"Unable to read image: {image_path}")
+    With ``write`` False the annotated frame is returned as ``annotated_frame``.
+    """
 
-    annotated, detections = detect_frame(frame, conf_thresh=conf_thresh)
+    frame = load_frame(image_path)
 
-    if output_path is not None:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        cv2.imwrite(str(output_path), annotated)
+    render = render and output_path is not None
+    annotated, detections = detect_frame(frame, conf_thresh=conf_thresh, render=render)
 
-    return {
+    summary = {
         "detections_count": len(detections),
-        "weapon_alerts": [det for det in detections if det.get("is_weapon")],
+        "weapon_alerts": [det for det in detections if det.is_weapon],
         "detections": detections,
     }
+    if render and not write:
+        summary["annotated_frame"] = annotated
+    elif render:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(output_path), annotated)
+    return summary
 
 
 def analyze_video(
@@ -202,8 +226,24 @@ def analyze_video(
     output_path: str | Path | None = None,
     conf_thresh: float = 0.3,
     max_logged_events: int = 50,
+    render: bool = True,
+    output_mode: str = "full",
+    pre_roll: float = PRE_ROLL_SECONDS,
+    post_roll: float = POST_ROLL_SECONDS,
+    hls: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancellationToken | None = None,
+    detection_log: str | Path | None = None,
 ) -> Dict:
-    """Run weapon detection on a video and optionally persist an annotated copy."""
+    """Run weapon detection on a video and optionally persist an annotated copy.
+
+    With ``render`` False (or no ``output_path``) nothing is drawn or written.
+    ``output_mode="clips"`` writes only short clips around frames with weapons.
+    ``hls`` also segments the full annotated video into an HLS playlist as it is written.
+    ``progress`` receives frame counts, per-frame detections and weapon alerts as they happen.
+    ``cancel`` is checked before every frame; an early stop returns the partial summary.
+    ``detection_log`` is the path of a columnar log that receives every detection.
+    """
 
     video_path = Path(video_path)
     cap = cv2.VideoCapture(str(video_path))
@@ -213,39 +253,45 @@ def analyze_video(
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
     fps = cap.get(cv2.CAP_PROP_FPS) or 24.0
+    reporter = reporter_for(progress, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), fps)
+    log = open_detection_log(detection_log, fps)
 
     writer = None
-    if output_path is not None and width > 0 and height > 0:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        writer = cv2.VideoWriter(
-            str(output_path),
-            cv2.VideoWriter_fourcc(*"mp4v"),
-            float(fps),
-            (width, height),
+    if render and output_path is not None and width > 0 and height > 0:
+        writer = create_video_sink(
+            output_path, fps, (width, height), output_mode, pre_roll, post_roll,
+            hls=hls, on_hls=reporter.hls if reporter is not None else None,
         )
 
+    renderer = OverlayRenderer() if writer is not None else None
     frames_processed = 0
     detections_total = 0
+    weapon_total = 0
     weapon_events: List[Dict] = []
     sample_detections: List[Dict] = []
 
+    completed = False
     try:
         while True:
             ret, frame = cap.read()
             if not ret:
                 break
+            if cancel is not None and cancel.should_stop(frames_processed):
+                break
 
-            annotated, detections = detect_frame(frame, conf_thresh=conf_thresh)
+            annotated, detections = detect_frame(
+                frame, conf_thresh=conf_thresh, render=renderer is not None, renderer=renderer
+            )
             frames_processed += 1
             detections_total += len(detections)
 
-            weapons = [det for det in detections if det.get("is_weapon")]
+            weapons = [det for det in detections if det.is_weapon]
+            weapon_total += len(weapons)
             if weapons and len(weapon_events) < max_logged_events:
-                for event in weapons:
-                    enriched = event.copy()
-                    enriched.setdefault("frame_index", frames_processed - 1)
-                    weapon_events.append(enriched)
+                weapon_events.extend(
+                    {**event.as_dict(), "frame_index": frames_processed - 1}
+                    for event in weapons
+                )
 
             if detections and len(sample_detections) < max_logged_events:
                 sample_detections.append({
@@ -253,19 +299,30 @@ def analyze_video(
                     "items": detections,
                 })
 
+            if log is not None and detections:
+                log.append(frames_processed - 1, detections, [det.is_weapon for det in detections])
             if writer is not None:
-                writer.write(annotated)
+                writer.write(annotated, frames_processed - 1, flagged=bool(weapons), labels=[w.label for w in weapons])
+            if reporter is not None:
+                reporter.frame(frames_processed - 1, detections, weapons)
+
+        if reporter is not None:
+            reporter.finish()
+        completed = True
     finally:
         cap.release()
-        if writer is not None:
-            writer.release()
+        output_info = release_sink(writer, failed=not completed)
+        log_info = log.close() if log is not None else {}
 
     return {
         "frames_processed": frames_processed,
         "detections_total": detections_total,
-        "weapon_event_total": len(weapon_events),
+        "weapon_event_total": weapon_total,
         "weapon_events": weapon_events,
         "sample_detections": sample_detections,
+        **output_info,
+        **log_info,
+        **stop_summary(cancel),
     }
 
 
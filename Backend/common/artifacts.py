@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from Backend.common.images import encode_image
+from Backend.common.metrics import ARTIFACT_WRITE_SECONDS
+from Backend.common.serialization import dumps
+
+PENDING_WAIT_SECONDS = 10.0
+BATCH_MAX_ITEMS = 64
+# "never": rely on the page cache, "batch": fsync files and their folders once per batch,
+# "always": fsync every file and its folder before the next write
+FSYNC_POLICIES = ("never", "batch", "always")
+FSYNC_POLICY = os.getenv("ARTIFACT_FSYNC", "never").lower()
+
+_Item = Tuple[Path, Callable[[], bytes], Future]
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # pragma: no cover - e.g. platforms without directory fds
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ArtifactWriter:
+    """Persist uploads, rendered outputs and JSON reports on a background thread.
+
+    Endpoints hand over bytes, frames or payloads and return their URLs straight
+    away. The writer drains its queue in batches; every file appears atomically
+    (temp file + rename) and is fsynced according to ``fsync``. ``wait`` lets the
+    files route block briefly on an artifact that is still queued.
+    """
+
+    def __init__(self, fsync: str = FSYNC_POLICY, batch_max: int = BATCH_MAX_ITEMS) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {', '.join(FSYNC_POLICIES)}")
+        self.fsync = fsync
+        self.batch_max = max(1, int(batch_max))
+        self.written = 0
+        self.batches = 0
+        self._queue: "queue.Queue[_Item]" = queue.Queue()
+        self._pending: Dict[Path, Future] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[_Item] = [self._queue.get()]
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_one(self, path: Path, produce: Callable[[], bytes]) -> None:
+        started = time.perf_counter()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "wb") as handle:
+            handle.write(produce())
+            if self.fsync != "never":
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+        if self.fsync == "always":
+            _fsync_dir(path.parent)
+        ARTIFACT_WRITE_SECONDS.observe(time.perf_counter() - started, kind=path.suffix.lstrip(".").lower() or "bin")
+
+    def _write_batch(self, batch: List[_Item]) -> None:
+        directories = set()
+        outcomes: List[Exception | None] = []
+        for path, produce, _ in batch:
+            try:
+                self._write_one(path, produce)
+                directories.add(path.parent)
+                outcomes.append(None)
+            except Exception as exc:  # pragma: no cover - disk errors are reported via the future
+                print(f"[ERROR] Failed to persist {path}: {exc}")
+                outcomes.append(exc)
+
+        if self.fsync == "batch":
+            for directory in directories:
+                _fsync_dir(directory)
+        self.written += len(batch)
+        self.batches += 1
+
+        # Callers only see completion once the batch is as durable as the policy promises
+        for (path, _, future), error in zip(batch, outcomes):
+            with self._lock:
+                if self._pending.get(path) is future:
+                    del self._pending[path]
+            if error is None:
+                future.set_result(path)
+            else:
+                future.set_exception(error)
+
+    def submit(self, path: str | Path, produce: Callable[[], bytes]) -> Future:
+        """Queue ``produce()``'s bytes to be written to ``path``."""
+
+        path = Path(path)
+        future: Future = Future()
+        with self._lock:
+            self._pending[path] = future
+            self._ensure_thread()
+        self._queue.put((path, produce, future))
+        return future
+
+    def write_bytes(self, path: str | Path, data: bytes) -> Future:
+        return self.submit(path, lambda: data)
+
+    def write_image(self, path: str | Path, frame: np.ndarray, params: Sequence[int] = ()) -> Future:
+        """Queue ``frame`` to be encoded (off the request path) and written to ``path``."""
+
+        return self.submit(path, lambda: encode_image(path, frame, params))
+
+    def write_json(self, path: str | Path, payload: Any) -> Future:
+        """Queue ``payload`` as compact JSON.
+
+        It is serialized right here, so endpoints may keep changing their response
+        (nested values included) after handing it over.
+        """
+
+        return self.write_bytes(path, dumps(payload))
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def is_pending(self, path: str | Path) -> bool:
+        with self._lock:
+            return Path(path) in self._pending
+
+    def wait(self, path: str | Path, timeout: float = PENDING_WAIT_SECONDS) -> bool:
+        """Block until a queued write of ``path`` finished; False if it failed or timed out."""
+
+        with self._lock:
+            future = self._pending.get(Path(path))
+        if future is None:
+            return True
+        try:
+            future.result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def flush(self, timeout: float = PENDING_WAIT_SECONDS) -> None:
+        """Wait for everything queued so far (e.g. on shutdown)."""
+
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+
+ARTIFACTS = ArtifactWriter()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Generic, List, Sequence, Tuple, TypeVar
+
+from Backend.common import profiling
+from Backend.common.metrics import record_stage
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesce concurrent single-item calls into one batched call of ``fn``.
+
+    Callers run on worker threads and call the batcher like a function. ``fn`` runs
+    one batch at a time, so it is the only way into a model that is not thread-safe.
+    A call made while the model is idle runs at once; calls arriving while a batch
+    runs queue up and go together (up to ``max_batch`` items) when it finishes. Each
+    caller gets its own element of the result back. Only calls with equal keyword
+    arguments share a batch, so per-request settings such as ``conf`` stay exact.
+
+    A batch runs on the thread of the caller that opened it. So that per-request
+    numbers stay fair, every caller is charged its share of the batch time (by item
+    count) as the ``inference`` stage, and a profiled request notes both its share
+    and the time its thread spent on other callers' items.
+    """
+
+    def __init__(self, fn: Callable[..., Sequence[R]], max_batch: int = BATCH_MAX_SIZE) -> None:
+        self.fn = fn
+        self.max_batch = max(1, int(max_batch))
+        self.batches = 0
+        self.items = 0
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._pending: Dict[Tuple[Tuple[str, Any], ...], List[Tuple[T, Future]]] = {}
+
+    def __call__(self, item: T, **kwargs: Any) -> R:
+        return self.map([item], **kwargs)[0]
+
+    def map(self, items: Sequence[T], **kwargs: Any) -> List[R]:
+        """Run several items (e.g. the tiles of one image) through the shared batches."""
+
+        key = tuple(sorted(kwargs.items()))
+        entries = [(item, Future()) for item in items]
+        with self._lock:
+            batch = self._pending.setdefault(key, [])
+            leader = not batch
+            batch.extend(entries)
+
+        ran = 0.0
+        if leader:
+            # Whoever opened the batch runs it once the model is free; until then
+            # later callers keep joining it
+            with self._run_lock:
+                with self._lock:
+                    if self._pending.get(key) is batch:
+                        del self._pending[key]
+                for start in range(0, len(batch), self.max_batch):
+                    ran += self._run(batch[start:start + self.max_batch], kwargs)
+
+        results = []
+        share = 0.0
+        try:
+            for _, future in entries:
+                result, seconds = future.result()
+                results.append(result)
+                share += seconds
+        finally:
+            if entries:
+                record_stage("inference", share)
+                profiling.record_batch(share, max(0.0, ran - share))
+        return results
+
+    def _run(self, batch: List[Tuple[T, Future]], kwargs: Dict[str, Any]) -> float:
+        """Run one batch and resolve its futures to ``(result, share of the batch time)``."""
+
+        started = time.perf_counter()
+        try:
+            results = self.fn([item for item, _ in batch], **kwargs)
+        except BaseException as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return time.perf_counter() - started
+
+        elapsed = time.perf_counter() - started
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result((result, elapsed / len(batch)))
+        return elapsed
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    name TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS uploads_digest ON uploads (digest);
+"""
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    """An upload as the API sees it: its public ``name`` and the blob holding the bytes."""
+
+    name: str
+    path: Path
+    digest: str
+    size: int
+    deduplicated: bool = False
+
+    @property
+    def stem(self) -> str:
+        return Path(self.name).stem
+
+
+class BlobStore:
+    """Content-addressed upload storage with a name -> blob mapping.
+
+    Bytes live once per content hash under two levels of hash-prefixed shard
+    directories (``ab/cd/abcd....mp4``), so identical uploads share one file and
+    no directory grows unboundedly flat. The public upload names (and with them
+    the existing ``/border/files`` URLs) map to blobs in a small SQLite table
+    kept next to the shards. ``is_pending(path)`` reports blobs an asynchronous
+    writer has queued but not finished, so they are not written twice.
+    """
+
+    def __init__(self, root: str | Path, is_pending: Callable[[Path], bool] | None = None) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.is_pending = is_pending
+        self._lock = threading.Lock()
+        self._put_lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / ".uploads.sqlite3"), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+
+    def blob_path(self, digest: str, suffix: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}{suffix}"
+
+    def put(
+        self,
+        data: bytes,
+        name: str,
+        writer: Callable[[Path, bytes], Any] | None = None,
+    ) -> StoredUpload:
+        """Store ``data`` under the public ``name``.
+
+        ``writer(path, data)`` may persist a new blob asynchronously (e.g. the
+        artifact writer); by default it is written here, atomically.
+        """
+
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        suffix = Path(name).suffix.lower()
+        path = self.blob_path(digest, suffix)
+        # Checking and queueing the write under one lock: two identical uploads in
+        # flight must not both write the blob
+        with self._put_lock:
+            if self.is_pending is not None and self.is_pending(path):
+                deduplicated = True
+            elif path.is_file():
+                deduplicated = True
+                # Referenced again: keep the blob young for the retention sweeper
+                os.utime(path)
+            else:
+                deduplicated = False
+                if writer is not None:
+                    writer(path, data)
+                else:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = path.with_name(f".{path.name}.tmp")
+                    tmp_path.write_bytes(data)
+                    os.replace(tmp_path, path)
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO uploads (name, digest, suffix, size, created) VALUES (?, ?, ?, ?, ?)",
+                (name, digest, suffix, len(data), time.time()),
+            )
+        return StoredUpload(name, path, digest, len(data), deduplicated)
+
+    def resolve(self, name: str) -> Path | None:
+        """Blob path for a public upload name, or ``None`` if unknown."""
+
+        with self._lock:
+            row = self._db.execute("SELECT digest, suffix FROM uploads WHERE name = ?", (name,)).fetchone()
+        return self.blob_path(*row) if row else None
+
+    def find(self, stem: str, suffixes: Iterable[str] | None = None) -> Path | None:
+        """Stored blob of the newest upload named ``stem`` plus a suffix, matched in any case
+        (``IMG.JPG`` for ``.jpg``); ``suffixes`` limits which suffixes count."""
+
+        pattern = stem.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + ".%"
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, digest, suffix FROM uploads WHERE name LIKE ? ESCAPE '\\' ORDER BY created DESC",
+                (pattern,),
+            ).fetchall()
+        allowed = {suffix.lower() for suffix in suffixes} if suffixes is not None else None
+        for name, digest, suffix in rows:
+            if Path(name).stem != stem or (allowed is not None and suffix not in allowed):
+                continue
+            path = self.blob_path(digest, suffix)
+            if path.is_file():
+                return path
+        return None
+
+    def prune(self) -> int:
+        """Forget names whose blob is gone (e.g. removed by retention) and remove the shard
+        directories that left empty; returns the number of names forgotten."""
+
+        with self._lock:
+            rows = self._db.execute("SELECT name, digest, suffix FROM uploads").fetchall()
+        missing = [(name, self.blob_path(digest, suffix)) for name, digest, suffix in rows]
+        missing = [(name, path) for name, path in missing if not path.exists()]
+        if missing:
+            with self._lock, self._db:
+                self._db.executemany("DELETE FROM uploads WHERE name = ?", [(name,) for name, _ in missing])
+        for shard in {path.parent for _, path in missing}:
+            for directory in (shard, shard.parent):
+                try:
+                    directory.rmdir()
+                except OSError:  # not empty (other blobs) or already gone
+                    break
+        return len(missing)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict
+
+
+class CancellationToken:
+    """Cooperative stop signal checked once per frame by the video loops.
+
+    A token stops an analysis when it is cancelled explicitly (client gone, job
+    cancelled), when ``deadline`` seconds have passed since it was created, or
+    once ``max_frames`` frames have been processed. The first reason wins and is
+    kept in ``reason`` so callers can report a partial result.
+
+    Loops check the token after reading a frame and before processing it, so
+    ``reason`` is only set when at least one frame was left unprocessed.
+    """
+
+    def __init__(self, deadline: float | None = None, max_frames: int | None = None) -> None:
+        self.deadline_at = time.monotonic() + deadline if deadline else None
+        self.max_frames = max_frames if max_frames and max_frames > 0 else None
+        self.reason: str | None = None
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if self.reason is None:
+            self.reason = reason
+        self._event.set()
+
+    def should_stop(self, frames_processed: int = 0) -> bool:
+        if self._event.is_set():
+            return True
+        if self.max_frames is not None and frames_processed >= self.max_frames:
+            self.cancel("max_frames")
+            return True
+        if self.deadline_at is not None and time.monotonic() >= self.deadline_at:
+            self.cancel("deadline")
+            return True
+        return False
+
+
+def stop_summary(token: CancellationToken | None) -> Dict[str, Any]:
+    """Summary fields describing whether (and why) an analysis stopped early."""
+
+    reason = token.reason if token is not None else None
+    return {"stopped_early": reason is not None, "stop_reason": reason}
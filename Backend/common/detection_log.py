@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is in requirements.txt
+    pa = None
+    pq = None
+
+LOG_FLUSH_ROWS = int(os.getenv("DETECTION_LOG_FLUSH_ROWS", "8192"))
+QUERY_LIMIT = 1000
+
+# Column layout shared by the Parquet and the NumPy format. ``track`` is -1 and
+# ``confidence`` NaN when the analyzer has no value; ``flagged`` marks alerts.
+LOG_DTYPE = np.dtype([
+    ("frame", np.int32),
+    ("time_sec", np.float32),
+    ("track", np.int32),
+    ("label", "U48"),
+    ("confidence", np.float32),
+    ("x1", np.int32),
+    ("y1", np.int32),
+    ("x2", np.int32),
+    ("y2", np.int32),
+    ("flagged", np.bool_),
+])
+LOG_COLUMNS = LOG_DTYPE.names
+
+
+class DetectionLog:
+    """Append-only columnar log of every detection of a video analysis.
+
+    Rows are buffered per column and flushed every ``flush_rows`` detections as a
+    Parquet row group (zstd) or, without pyarrow, as a NumPy structured-array chunk
+    appended to an ``.npy`` stream. The log is written to a temp file and renamed
+    on :meth:`close`, so readers never see a half-written log.
+    """
+
+    def __init__(self, path: str | Path, fps: float = 0.0, flush_rows: int = LOG_FLUSH_ROWS) -> None:
+        self.path = Path(path).with_suffix(".parquet" if pq is not None else ".npy")
+        self.fps = float(fps or 0.0)
+        self.flush_rows = max(1, int(flush_rows))
+        self.rows = 0
+        self._tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self._buffer: Dict[str, List[Any]] = {name: [] for name in LOG_COLUMNS}
+        self._writer: Any = None
+        self._handle: Any = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def append(
+        self,
+        frame_index: int,
+        detections: Iterable[Any],
+        flagged: Sequence[bool] | None = None,
+    ) -> None:
+        """Add one frame's detections (records or dicts with label/confidence/bbox/track_id)."""
+
+        buffer = self._buffer
+        time_sec = frame_index / self.fps if self.fps > 0 else float("nan")
+        for index, det in enumerate(detections):
+            x1, y1, x2, y2 = det.get("bbox") or (-1, -1, -1, -1)
+            confidence = det.get("confidence")
+            track = det.get("track_id")
+            buffer["frame"].append(frame_index)
+            buffer["time_sec"].append(time_sec)
+            buffer["track"].append(-1 if track is None else track)
+            buffer["label"].append(str(det.get("label", "")))
+            buffer["confidence"].append(float("nan") if confidence is None else confidence)
+            buffer["x1"].append(x1)
+            buffer["y1"].append(y1)
+            buffer["x2"].append(x2)
+            buffer["y2"].append(y2)
+            buffer["flagged"].append(bool(flagged[index]) if flagged is not None else False)
+        if len(buffer["frame"]) >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        count = len(self._buffer["frame"])
+        if not count:
+            return
+        chunk = np.empty(count, dtype=LOG_DTYPE)
+        for name in LOG_COLUMNS:
+            chunk[name] = self._buffer[name]
+            self._buffer[name].clear()
+
+        if pq is not None:
+            table = pa.table({name: chunk[name] for name in LOG_COLUMNS})
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._tmp_path, table.schema, compression="zstd")
+            self._writer.write_table(table)
+        else:
+            if self._handle is None:
+                self._handle = open(self._tmp_path, "wb")
+            np.save(self._handle, chunk, allow_pickle=False)
+        self.rows += count
+
+    def close(self) -> Dict[str, Any]:
+        """Flush, publish the log under its final name and return summary fields."""
+
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+        elif self._handle is not None:
+            self._handle.close()
+        elif pq is not None:
+            # No detections at all: still publish an empty, readable log
+            pq.write_table(pa.table({name: np.empty(0, dtype=LOG_DTYPE[name]) for name in LOG_COLUMNS}), self._tmp_path)
+        else:
+            with open(self._tmp_path, "wb") as handle:
+                np.save(handle, np.empty(0, dtype=LOG_DTYPE), allow_pickle=False)
+        self._writer = self._handle = None
+        os.replace(self._tmp_path, self.path)
+        return {"detection_log": self.path.name, "detection_log_rows": self.rows}
+
+
+def open_detection_log(path: str | Path | None, fps: float = 0.0) -> DetectionLog | None:
+    return DetectionLog(path, fps) if path is not None else None
+
+
+def iter_log_chunks(path: str | Path, columns: Sequence[str] | None = None) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield the log chunk by chunk as ``{column: array}`` without loading it whole."""
+
+    path = Path(path)
+    columns = list(columns or LOG_COLUMNS)
+    if path.suffix == ".parquet":
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet detection logs")
+        for batch in pq.ParquetFile(path).iter_batches(columns=columns):
+            yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in columns}
+        return
+
+    size = path.stat().st_size
+    with open(path, "rb") as handle:
+        while handle.tell() < size:
+            chunk = np.load(handle, allow_pickle=False)
+            yield {name: chunk[name] for name in columns}
+
+
+def query_log(
+    path: str | Path,
+    frame_start: int | None = None,
+    frame_end: int | None = None,
+    labels: Sequence[str] | None = None,
+    min_confidence: float | None = None,
+    flagged: bool | None = None,
+    limit: int = QUERY_LIMIT,
+) -> List[Dict[str, Any]]:
+    """Return up to ``limit`` rows matching every given filter, scanning chunk by chunk."""
+
+    rows: List[Dict[str, Any]] = []
+    for chunk in iter_log_chunks(path):
+        mask = np.ones(len(chunk["frame"]), dtype=bool)
+        if frame_start is not None:
+            mask &= chunk["frame"] >= frame_start
+        if frame_end is not None:
+            mask &= chunk["frame"] <= frame_end
+        if labels:
+            mask &= np.isin(chunk["label"].astype(str), list(labels))
+        if min_confidence is not None:
+            mask &= chunk["confidence"] >= min_confidence
+        if flagged is not None:
+            mask &= chunk["flagged"] == flagged
+
+        selected = np.flatnonzero(mask)[: limit - len(rows)]
+        if len(selected):
+            columns = {name: chunk[name][selected].tolist() for name in LOG_COLUMNS}
+            rows.extend(dict(zip(columns, values)) for values in zip(*columns.values()))
+        if len(rows) >= limit:
+            break
+    return rows
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+BBox = Tuple[int, int, int, int]
+
+
+@dataclass(slots=True)
+class Detection:
+    """One detected object. Slotted so video summaries with thousands of them stay small.
+
+    orjson serializes these natively, so responses and logs never walk them in
+    Python. Dict-style ``det["label"]`` / ``det.get(...)`` keeps callers written
+    against the old plain-dict records working.
+    """
+
+    label: str
+    bbox: BBox
+    confidence: float | None = None
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+@dataclass(slots=True)
+class ZoneDetection(Detection):
+    """Object checked against the restricted zones (anomaly detection)."""
+
+    center: Tuple[int, int] = (0, 0)
+    restricted: bool = False
+    zones: List[str] | None = None
+    track_id: int | None = None
+
+
+@dataclass(slots=True)
+class WeaponDetection(Detection):
+    is_weapon: bool = False
+    timestamp: str | None = None
+
+
+@dataclass(slots=True)
+class FaceMatch(Detection):
+    """Recognised (or unknown) face; ``distance`` is the embedding distance to the best match."""
+
+    authorized: bool = False
+    distance: float | None = None
+
+
+def bbox_array(detections: Sequence[Detection]) -> np.ndarray:
+    """``(N, 4)`` int32 array of the detections' boxes."""
+
+    if not detections:
+        return np.empty((0, 4), dtype=np.int32)
+    return np.asarray([det.bbox for det in detections], dtype=np.int32)
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from Backend.common.detection_log import iter_log_chunks
+
+EVENT_QUERY_LIMIT = 500
+EVENT_BATCH_MAX_ROWS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    module TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    label TEXT,
+    confidence REAL,
+    source TEXT,
+    upload TEXT,
+    frame INTEGER,
+    x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+    artifact TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_module_ts ON events (module, ts);
+CREATE INDEX IF NOT EXISTS events_label_ts ON events (label, ts);
+CREATE INDEX IF NOT EXISTS events_source_ts ON events (source, ts);
+CREATE INDEX IF NOT EXISTS events_confidence ON events (confidence);
+"""
+_COLUMNS = ("ts", "module", "kind", "label", "confidence", "source", "upload", "frame", "x1", "y1", "x2", "y2", "artifact")
+_INSERT = f"INSERT INTO events ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})"
+
+_Row = Tuple[Any, ...]
+# Rows ready to insert, or a deferred reader yielding them (a detection log to scan)
+_Item = Union[List[_Row], Callable[[], Iterable[List[_Row]]]]
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(str(path), timeout=30.0, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class EventIndex:
+    """SQLite index of detection events from every module, queryable by time, module,
+    label, confidence and source.
+
+    Endpoints hand rows to :meth:`add` (or a whole columnar log to :meth:`add_log`);
+    a background thread reads the logs and inserts rows in batched transactions so
+    indexing never blocks a response. Queries open their own read connection (WAL mode).
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _connect(self.path) as connection:
+            connection.executescript(_SCHEMA)
+        connection.close()
+        self._queue: "queue.Queue[_Item]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="event-index", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        connection = _connect(self.path)
+        while True:
+            item = self._queue.get()
+            items = 1
+            rows: List[_Row] = []
+            readers: List[Callable[[], Iterable[List[_Row]]]] = []
+            try:
+                while True:
+                    if callable(item):
+                        readers.append(item)
+                    else:
+                        rows.extend(item)
+                    if len(rows) >= EVENT_BATCH_MAX_ROWS:
+                        break
+                    item = self._queue.get_nowait()
+                    items += 1
+            except queue.Empty:
+                pass
+            try:
+                self._insert(connection, rows)
+                for reader in readers:
+                    try:
+                        for chunk in reader():
+                            self._insert(connection, chunk)
+                    except Exception as exc:  # pragma: no cover - e.g. a log deleted meanwhile
+                        print(f"[ERROR] Failed to index detection log: {exc}")
+            finally:
+                for _ in range(items):
+                    self._queue.task_done()
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, rows: List[_Row]) -> None:
+        if not rows:
+            return
+        try:
+            with connection:
+                connection.executemany(_INSERT, rows)
+        except sqlite3.Error as exc:  # pragma: no cover - a broken index must not break analyses
+            print(f"[ERROR] Failed to index {len(rows)} events: {exc}")
+
+    @property
+    def queued(self) -> int:
+        """Row batches and logs waiting to be committed."""
+
+        return self._queue.unfinished_tasks
+
+    def _put(self, item: _Item) -> None:
+        self._ensure_thread()
+        self._queue.put(item)
+
+    def _submit(self, rows: List[_Row]) -> int:
+        if rows:
+            self._put(rows)
+        return len(rows)
+
+    def add(
+        self,
+        module: str,
+        events: Iterable[Any],
+        kind: str = "detection",
+        source: str | None = None,
+        upload: str | None = None,
+        artifact: str | None = None,
+        ts: float | None = None,
+        fps: float = 0.0,
+    ) -> int:
+        """Queue detection records or event dicts (``label``, ``confidence``, ``bbox``,
+        ``frame_index``/``time_sec``, optional ``event`` kind) for indexing."""
+
+        ts = time.time() if ts is None else ts
+        rows: List[_Row] = []
+        for event in events:
+            x1, y1, x2, y2 = event.get("bbox") or (None, None, None, None)
+            frame = event.get("frame_index", event.get("frame_number"))
+            offset = event.get("time_sec")
+            if offset is None and frame is not None and fps > 0:
+                offset = frame / fps
+            rows.append((
+                ts + (offset or 0.0),
+                module,
+                event.get("event", kind),
+                event.get("label"),
+                event.get("confidence"),
+                source,
+                upload,
+                frame,
+                x1, y1, x2, y2,
+                artifact,
+            ))
+        return self._submit(rows)
+
+    def add_log(
+        self,
+        module: str,
+        log_path: str | Path,
+        kind: str = "alert",
+        flagged_only: bool = True,
+        source: str | None = None,
+        upload: str | None = None,
+        artifact: str | None = None,
+        ts: float | None = None,
+    ) -> None:
+        """Queue the rows of a columnar detection log (by default only flagged ones).
+
+        The log is read on the indexing thread, not by the caller.
+        """
+
+        ts = time.time() if ts is None else ts
+        self._put(partial(self._log_rows, module, Path(log_path), kind, flagged_only, source, upload, artifact, ts))
+
+    @staticmethod
+    def _log_rows(
+        module: str,
+        log_path: Path,
+        kind: str,
+        flagged_only: bool,
+        source: str | None,
+        upload: str | None,
+        artifact: str | None,
+        ts: float,
+    ) -> Iterator[List[_Row]]:
+        for chunk in iter_log_chunks(log_path):
+            selected = np.flatnonzero(chunk["flagged"]) if flagged_only else np.arange(len(chunk["frame"]))
+            if not len(selected):
+                continue
+            offsets = np.nan_to_num(chunk["time_sec"][selected].astype(np.float64))
+            confidences = chunk["confidence"][selected].astype(np.float64)
+            columns = zip(
+                (ts + offsets).tolist(),
+                chunk["label"][selected].astype(str).tolist(),
+                [None if np.isnan(c) else round(c, 4) for c in confidences.tolist()],
+                chunk["frame"][selected].tolist(),
+                *(chunk[name][selected].tolist() for name in ("x1", "y1", "x2", "y2")),
+            )
+            yield [
+                (row_ts, module, kind, label, confidence, source, upload, frame, x1, y1, x2, y2, artifact)
+                for row_ts, label, confidence, frame, x1, y1, x2, y2 in columns
+            ]
+
+    def query(
+        self,
+        module: str | None = None,
+        labels: Sequence[str] | None = None,
+        kind: str | None = None,
+        source: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        min_confidence: float | None = None,
+        limit: int = EVENT_QUERY_LIMIT,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Newest-first events matching every given filter."""
+
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (("module", module), ("kind", kind), ("source", source)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if labels:
+            clauses.append(f"label IN ({', '.join('?' for _ in labels)})")
+            params.extend(labels)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts <= ?")
+            params.append(until)
+        if min_confidence is not None:
+            clauses.append("confidence >= ?")
+            params.append(min_confidence)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT id, {', '.join(_COLUMNS)} FROM events {where} ORDER BY ts DESC LIMIT ? OFFSET ?"
+        connection = _connect(self.path)
+        try:
+            connection.row_factory = sqlite3.Row
+            return [dict(row) for row in connection.execute(sql, [*params, limit, offset])]
+        finally:
+            connection.close()
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Wait (up to ``timeout``) until every queued row is committed."""
+
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
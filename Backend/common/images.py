@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Sequence
+
+import cv2
+import numpy as np
+
+JPEG_QUALITY = 90
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Decode an uploaded image buffer into a BGR frame without touching disk."""
+
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR) if data else None
+    if frame is None:
+        raise ValueError("Uploaded file is not a readable image")
+    return frame
+
+
+def load_frame(image: str | Path | np.ndarray) -> np.ndarray:
+    """Return ``image`` as a BGR frame; paths are read from disk, arrays pass through."""
+
+    if isinstance(image, np.ndarray):
+        return image
+
+    frame = cv2.imread(str(image))
+    if frame is None:
+        raise FileNotFoundError(f"Unable to read image: {image}")
+    return frame
+
+
+def encode_image(path: str | Path, frame: np.ndarray, params: Sequence[int] = ()) -> bytes:
+    """Encode ``frame`` in the format implied by ``path``'s suffix."""
+
+    suffix = Path(path).suffix.lower() or ".jpg"
+    if not params and suffix in (".jpg", ".jpeg"):
+        params = (int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY)
+    ok, buffer = cv2.imencode(suffix, frame, list(params))
+    if not ok:
+        raise ValueError(f"Unable to encode image as {suffix}")
+    return buffer.tobytes()
+
+
+def side_by_side(original: np.ndarray, annotated: np.ndarray) -> np.ndarray:
+    """Original and annotated frames next to each other, annotated resized to match."""
+
+    if annotated.shape[:2] != original.shape[:2]:
+        annotated = cv2.resize(annotated, (original.shape[1], original.shape[0]), interpolation=cv2.INTER_LINEAR)
+    return cv2.hconcat([original, annotated])
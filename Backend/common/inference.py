@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from Backend.common.metrics import MODEL_LOAD_SECONDS, InstrumentedModel
+
+# "torch" (default), "onnx" (ONNX Runtime) or "openvino"; exported models are cached
+# next to their weights and reused on the next start.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+INFERENCE_INT8 = os.getenv("INFERENCE_INT8", "0") == "1"
+INFERENCE_IMGSZ = int(os.getenv("INFERENCE_IMGSZ", "640"))
+# Exported models that find fewer of the reference boxes than this, or whose boxes match
+# the reference less often than this (extra detections), are not used
+PARITY_MIN_MATCH = float(os.getenv("INFERENCE_PARITY_MIN_MATCH", "0.9"))
+PARITY_MIN_COSINE = float(os.getenv("INFERENCE_PARITY_MIN_COSINE", "0.99"))
+CALIBRATION_LIMIT = int(os.getenv("INFERENCE_CALIBRATION_IMAGES", "64"))
+# Real inputs (e.g. aligned face crops) the embedder parity check compares on
+PARITY_PROBES = 16
+
+_REPO_DIR = Path(__file__).resolve().parents[2]
+# Sample images shipped with the repo, per model; INFERENCE_CALIBRATION_DIR/<model> adds
+# site-specific footage
+CALIBRATION_DIRS: Dict[str, List[Path]] = {
+    "drones": [_REPO_DIR / "Backend" / "BorderAnomly" / "drones"],
+    "human": [_REPO_DIR / "Backend" / "BorderAnomly" / "HUMAN_DETECTION" / "Test"],
+    "anomaly": [_REPO_DIR / "Backend" / "Survilleance" / "test_anomly_images"],
+    "weapon": [_REPO_DIR / "Backend" / "Survilleance" / "weapon_test_images"],
+}
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def calibration_images(name: str, limit: int = CALIBRATION_LIMIT) -> List[Path]:
+    """Sample images of model ``name``'s own domain, for INT8 calibration and parity checks."""
+
+    extra = os.getenv("INFERENCE_CALIBRATION_DIR")
+    directories = ([Path(extra) / name] if extra else []) + CALIBRATION_DIRS.get(name, [])
+    images: List[Path] = []
+    for directory in directories:
+        if not directory.is_dir():
+            continue
+        for path in sorted(directory.rglob("*")):
+            if path.suffix.lower() in IMAGE_SUFFIXES and not {"outputs", "uploads"} & set(path.parts):
+                images.append(path)
+                if len(images) >= limit:
+                    return images
+    return images
+
+
+def letterbox(image: np.ndarray, imgsz: int = INFERENCE_IMGSZ) -> np.ndarray:
+    """YOLO-style preprocessing: fit into ``imgsz``, pad with grey, RGB, CHW, float in [0, 1]."""
+
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    resized = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    return np.ascontiguousarray(canvas[:, :, ::-1].transpose(2, 0, 1), dtype=np.float32) / 255.0
+
+
+class _CalibrationReader:
+    """``onnxruntime.quantization.CalibrationDataReader`` over preprocessed sample images."""
+
+    def __init__(self, input_name: str, arrays: Iterator[np.ndarray]) -> None:
+        self.input_name = input_name
+        self._arrays = arrays
+
+    def get_next(self) -> Dict[str, np.ndarray] | None:
+        array = next(self._arrays, None)
+        return None if array is None else {self.input_name: array[None]}
+
+    def rewind(self) -> None:  # pragma: no cover - only called by some calibrators
+        pass
+
+
+def quantize_onnx(
+    model_path: Path,
+    output_path: Path,
+    samples: Callable[[], Iterator[np.ndarray]] | None = None,
+) -> Path:
+    """INT8-quantize an ONNX model: static (QDQ, calibrated on ``samples``) or, without
+    samples, dynamic weight-only quantization."""
+
+    from onnxruntime import InferenceSession
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    if samples is None:
+        quantize_dynamic(str(model_path), str(output_path), weight_type=QuantType.QInt8)
+        return output_path
+
+    input_name = InferenceSession(str(model_path), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    quantize_static(
+        str(model_path),
+        str(output_path),
+        _CalibrationReader(input_name, samples()),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    return output_path
+
+
+def _iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def _boxes(result: Any) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 4)), np.empty(0), np.empty(0, dtype=int)
+    return boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy().astype(int)
+
+
+def yolo_parity(reference: Any, candidate: Any, images: Sequence[Path], conf: float = 0.25) -> Dict[str, Any]:
+    """Compare ``candidate`` detections with the PyTorch ``reference`` on ``images``.
+
+    Boxes are matched one-to-one, highest reference confidence first: a match needs
+    the same class and IoU >= 0.5. ``match_rate`` is the share of reference boxes
+    found, ``precision`` the share of candidate boxes that matched one, so both
+    missed and extra detections fail the check. Also reports the mean confidence
+    gap and both mean latencies.
+    """
+
+    matched = total = candidates = 0
+    conf_gaps: List[float] = []
+    timings = {"reference": 0.0, "candidate": 0.0}
+    for path in images:
+        frame = cv2.imread(str(path))
+        if frame is None:
+            continue
+        started = time.perf_counter()
+        ref = reference(frame, conf=conf, verbose=False)[0]
+        timings["reference"] += time.perf_counter() - started
+        started = time.perf_counter()
+        cand = candidate(frame, conf=conf, verbose=False)[0]
+        timings["candidate"] += time.perf_counter() - started
+
+        ref_xyxy, ref_conf, ref_cls = _boxes(ref)
+        cand_xyxy, cand_conf, cand_cls = _boxes(cand)
+        total += len(ref_xyxy)
+        candidates += len(cand_xyxy)
+        unused = np.ones(len(cand_xyxy), dtype=bool)
+        for index in np.argsort(-ref_conf):
+            available = np.flatnonzero(unused & (cand_cls == ref_cls[index]))
+            if not len(available):
+                continue
+            ious = _iou(ref_xyxy[index], cand_xyxy[available])
+            best = int(np.argmax(ious))
+            if ious[best] >= 0.5:
+                matched += 1
+                unused[available[best]] = False
+                conf_gaps.append(abs(float(ref_conf[index]) - float(cand_conf[available[best]])))
+
+    count = max(1, len(images))
+    match_rate = matched / total if total else 1.0
+    precision = matched / candidates if candidates else 1.0
+    return {
+        "images": len(images),
+        "reference_boxes": total,
+        "candidate_boxes": candidates,
+        "extra_boxes": candidates - matched,
+        "match_rate": round(match_rate, 4),
+        "precision": round(precision, 4),
+        "mean_conf_gap": round(float(np.mean(conf_gaps)), 4) if conf_gaps else 0.0,
+        "reference_ms": round(1000 * timings["reference"] / count, 2),
+        "candidate_ms": round(1000 * timings["candidate"] / count, 2),
+        "passed": match_rate >= PARITY_MIN_MATCH and precision >= PARITY_MIN_MATCH,
+    }
+
+
+def _parity_report_path(artifact: Path) -> Path:
+    return artifact.with_name(f"{artifact.name}.parity.json")
+
+
+def _export_yolo(weights: Path, images: List[Path], backend: str, int8: bool, imgsz: int) -> Path:
+    """Export ``weights`` once (INT8 calibrated on ``images``); later calls return the cached artifact."""
+
+    from ultralytics import YOLO
+
+    if backend == "onnx":
+        artifact = weights.with_name(f"{weights.stem}{'.int8' if int8 else ''}.onnx")
+        if artifact.exists():
+            return artifact
+        # An FP32 export already on disk is reused and kept; one made only to be quantized is not
+        fp32_path = weights.with_suffix(".onnx")
+        keep_fp32 = fp32_path.exists()
+        exported = fp32_path if keep_fp32 else Path(
+            YOLO(str(weights)).export(format="onnx", dynamic=True, simplify=True, imgsz=imgsz)
+        )
+        if not int8:
+            return exported if exported == artifact else Path(shutil.move(str(exported), artifact))
+
+        def samples() -> Iterator[np.ndarray]:
+            for path in images:
+                frame = cv2.imread(str(path))
+                if frame is not None:
+                    yield letterbox(frame, imgsz)
+
+        try:
+            return quantize_onnx(exported, artifact, samples)
+        finally:
+            if not keep_fp32:
+                exported.unlink(missing_ok=True)
+
+    if backend == "openvino":
+        artifact = weights.with_name(f"{weights.stem}{'_int8' if int8 else ''}_openvino_model")
+        if artifact.exists():
+            return artifact
+        model = YOLO(str(weights))
+        options: Dict[str, Any] = {"format": "openvino", "dynamic": True, "imgsz": imgsz}
+        with tempfile.TemporaryDirectory() as calibration_dir:
+            if int8:
+                # NNCF calibration reads a dataset yaml; point it at the model's sample images
+                images_dir = Path(calibration_dir) / "images"
+                images_dir.mkdir()
+                for path in images:
+                    shutil.copy(path, images_dir / path.name)
+                dataset = Path(calibration_dir) / "calibration.yaml"
+                dataset.write_text(json.dumps({"path": calibration_dir, "train": "images", "val": "images", "names": model.names}))
+                options.update(int8=True, data=str(dataset))
+            exported = Path(model.export(**options))
+        return exported if exported == artifact else Path(shutil.move(str(exported), artifact))
+
+    raise ValueError(f"Unknown inference backend {backend!r}; expected torch, onnx or openvino")
+
+
+def _load_yolo(weights: Path, name: str, backend: str, int8: bool, imgsz: int) -> Tuple[Any, str]:
+    from ultralytics import YOLO
+
+    if backend == "torch" or weights.suffix != ".pt":
+        return YOLO(str(weights)), "torch"
+
+    images = calibration_images(name)
+    if not images:
+        print(f"[WARN] No {name} sample images to check a {backend} export against; using PyTorch weights")
+        return YOLO(str(weights)), "torch"
+
+    try:
+        artifact = _export_yolo(weights, images, backend, int8, imgsz)
+        candidate = YOLO(str(artifact), task="detect")
+        report_path = _parity_report_path(artifact)
+        report = json.loads(report_path.read_text()) if report_path.exists() else {}
+        if "precision" not in report:
+            # Missing, or written before extra detections were checked
+            report = yolo_parity(YOLO(str(weights)), candidate, images[:16])
+            report_path.write_text(json.dumps(report, indent=2))
+        if not report.get("passed"):
+            print(f"[WARN] {artifact.name} failed the parity check ({report}); using PyTorch weights")
+            return YOLO(str(weights)), "torch"
+        print(f"[INFO] Using {backend}{' INT8' if int8 else ''} model {artifact.name}: {report}")
+        return candidate, f"{backend}-int8" if int8 else backend
+    except Exception as exc:  # pragma: no cover - depends on the optional runtimes
+        print(f"[WARN] {backend} backend unavailable for {weights.name} ({exc}); using PyTorch weights")
+        return YOLO(str(weights)), "torch"
+
+
+def load_yolo(
+    weights: str | Path,
+    name: str | None = None,
+    backend: str = INFERENCE_BACKEND,
+    int8: bool = INFERENCE_INT8,
+    imgsz: int = INFERENCE_IMGSZ,
+) -> Any:
+    """Load a YOLO model on the configured backend, falling back to PyTorch.
+
+    The first load exports (and optionally INT8-quantizes) the model and runs a parity
+    check against the PyTorch weights on the sample images of ``name``'s domain (see
+    :data:`CALIBRATION_DIRS`); the report is cached next to the export and an export
+    that failed it, or could not be checked, is never used. The model is returned
+    wrapped so its load time and every forward pass are recorded under ``name``.
+    """
+
+    weights = Path(weights)
+    name = name or weights.stem
+    started = time.perf_counter()
+    model, used = _load_yolo(weights, name, backend, int8, imgsz)
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model=name, backend=used)
+    return InstrumentedModel(model, name)
+
+
+def load_embedder(
+    module: Any,
+    cache_path: str | Path,
+    name: str = "face",
+    input_shape: Sequence[int] = (3, 160, 160),
+    backend: str = INFERENCE_BACKEND,
+    int8: bool = INFERENCE_INT8,
+    samples: Callable[[], Iterator[np.ndarray]] | None = None,
+) -> Callable[[Any], np.ndarray]:
+    """Wrap a PyTorch embedding network (e.g. InceptionResnetV1) as ``tensor -> ndarray``.
+
+    With the ``onnx`` backend the network is exported to ``cache_path`` and run by ONNX
+    Runtime after a cosine-similarity parity check on ``samples`` (real network inputs
+    such as aligned face crops). INT8 weights are calibrated on the same samples and
+    skipped without them. Like :func:`load_yolo`, load time and calls are recorded
+    under ``name``.
+    """
+
+    started = time.perf_counter()
+    embed, used = _load_embedder(module, Path(cache_path), input_shape, backend, int8, samples)
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model=name, backend=used)
+    return InstrumentedModel(embed, name)
+
+
+def _load_embedder(
+    module: Any,
+    cache_path: Path,
+    input_shape: Sequence[int],
+    backend: str,
+    int8: bool,
+    samples: Callable[[], Iterator[np.ndarray]] | None,
+) -> Tuple[Callable[[Any], np.ndarray], str]:
+    import torch
+
+    device = next(module.parameters()).device
+
+    def torch_embed(faces: Any) -> np.ndarray:
+        with torch.inference_mode():
+            return module(faces.to(device)).cpu().numpy()
+
+    if backend != "onnx":
+        # OpenVINO is only wired up for the YOLO detectors
+        return torch_embed, "torch"
+
+    try:
+        import onnxruntime as ort
+
+        probes = [sample for _, sample in zip(range(PARITY_PROBES), samples())] if samples is not None else []
+        if int8 and not probes:
+            print("[WARN] No samples to calibrate the INT8 embedder on; using FP32 ONNX")
+            int8 = False
+        artifact = cache_path.with_name(f"{cache_path.stem}{'.int8' if int8 else ''}.onnx")
+        if not artifact.exists():
+            fp32_path = cache_path.with_suffix(".onnx")
+            # Like the YOLO export, an FP32 model made only to be quantized is removed afterwards
+            keep_fp32 = not int8 or fp32_path.exists()
+            if not fp32_path.exists():
+                dummy = torch.randn(1, *input_shape, device=device)
+                torch.onnx.export(
+                    module, dummy, str(fp32_path),
+                    input_names=["faces"], output_names=["embeddings"],
+                    dynamic_axes={"faces": {0: "batch"}, "embeddings": {0: "batch"}},
+                    opset_version=17,
+                )
+            if int8:
+                try:
+                    quantize_onnx(fp32_path, artifact, samples)
+                finally:
+                    if not keep_fp32:
+                        fp32_path.unlink(missing_ok=True)
+
+        session = ort.InferenceSession(str(artifact), providers=["CPUExecutionProvider"])
+
+        def onnx_embed(faces: Any) -> np.ndarray:
+            array = faces.detach().cpu().numpy() if hasattr(faces, "detach") else np.asarray(faces)
+            return session.run(None, {"faces": array.astype(np.float32)})[0]
+
+        # Random tensors are far from what the network sees; only fall back to them for FP32
+        probe = torch.from_numpy(np.stack(probes)) if probes else torch.randn(4, *input_shape)
+        expected, actual = torch_embed(probe), onnx_embed(probe)
+        cosine = np.sum(expected * actual, axis=1) / (
+            np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1) + 1e-9
+        )
+        if float(cosine.min()) < PARITY_MIN_COSINE:
+            print(f"[WARN] {artifact.name} failed the parity check (cosine {cosine.min():.4f}); using PyTorch")
+            return torch_embed, "torch"
+        return onnx_embed, "onnx-int8" if int8 else "onnx"
+    except Exception as exc:  # pragma: no cover - depends on the optional runtimes
+        print(f"[WARN] ONNX embedder unavailable ({exc}); using PyTorch")
+        return torch_embed, "torch"
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Tuple
+
+from Backend.common.cancellation import CancellationToken
+
+JOB_HISTORY_LIMIT = 2000
+JOB_TTL_SECONDS = 3600.0
+TERMINAL_EVENTS = ("result", "error")
+# Per-frame events; only the last ``JOB_HISTORY_LIMIT`` of them are replayed
+FRAME_EVENTS = ("detections", "progress")
+
+
+class Job:
+    """One background analysis and the events it has published so far.
+
+    ``publish`` may be called from any thread (analyzers run in the threadpool);
+    events are fanned out to every subscriber's event loop. Late subscribers get
+    every status, alert and terminal event replayed first, plus the last
+    ``JOB_HISTORY_LIMIT`` per-frame events. ``token`` is the cancellation token
+    the job's analysis checks, so the job can be stopped.
+    """
+
+    def __init__(self, kind: str, token: CancellationToken | None = None) -> None:
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.token = token or CancellationToken()
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+        self.result: Any = None
+        self.error: Dict[str, Any] | None = None
+        self.frames_processed = 0
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=JOB_HISTORY_LIMIT)
+        self._kept: List[Dict[str, Any]] = []
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def publish(self, event: Dict[str, Any], status: str | None = None) -> None:
+        """Record and fan out ``event``; ``status`` is switched to in the same step.
+
+        Publishing the terminal event and finishing the job atomically means a
+        subscriber that sees the job finished also finds its result in the backlog.
+        """
+
+        with self._lock:
+            self._seq += 1
+            event = {"seq": self._seq, **event}
+            if event.get("type") in FRAME_EVENTS:
+                self._history.append(event)
+            else:
+                self._kept.append(event)
+            subscribers = list(self._subscribers)
+            if event.get("type") == "progress":
+                self.frames_processed = event.get("frames_processed", self.frames_processed)
+            if status is not None:
+                self.status = status
+                if self.finished:
+                    self.finished_at = time.time()
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:  # subscriber's loop already closed
+                pass
+
+    def start(self) -> None:
+        self.publish({"type": "status", "status": "running"}, status="running")
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Ask the running analysis to stop; returns False when the job already finished."""
+
+        if self.finished:
+            return False
+        self.token.cancel(reason)
+        self.publish({"type": "status", "status": "cancelling", "reason": self.token.reason})
+        return True
+
+    def finish(self, result: Any) -> None:
+        self.result = result
+        self.publish({"type": "result", "result": result}, status="done")
+
+    def fail(self, detail: str, status_code: int = 500) -> None:
+        self.error = {"detail": detail, "status_code": status_code}
+        self.publish({"type": "error", **self.error}, status="failed")
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield past and future events until the job finishes."""
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (loop, queue)
+        with self._lock:
+            backlog = list(heapq.merge(self._kept, self._history, key=lambda event: event["seq"]))
+            done = self.finished
+            if not done:
+                self._subscribers.append(subscriber)
+
+        try:
+            for event in backlog:
+                yield event
+            if done:
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if event.get("type") in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "frames_processed": self.frames_processed,
+            "stop_reason": self.token.reason,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRegistry:
+    """In-memory registry of streaming jobs; finished jobs expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = JOB_TTL_SECONDS) -> None:
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def create(self, kind: str, token: CancellationToken | None = None) -> Job:
+        job = Job(kind, token)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+_Labels = Tuple[str, ...]
+
+# Route template of the request being served; set by :class:`MetricsMiddleware` and
+# inherited by the worker threads the request hands work to
+_endpoint: ContextVar[str] = ContextVar("metrics_endpoint", default="")
+
+
+def current_endpoint() -> str:
+    return _endpoint.get() or "background"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[_Labels, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> _Labels:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """A settable gauge, or one computed at scrape time by ``collect``.
+
+    ``collect`` returns a number (unlabelled gauge) or ``{label values: number}``.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Callable[[], float | Dict[_Labels, float]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def samples(self) -> List[str]:
+        if self.collect is None:
+            return super().samples()
+        try:
+            collected = self.collect()
+        except Exception as exc:  # pragma: no cover - a broken collector must not break the scrape
+            print(f"[WARN] Metric {self.name} failed to collect: {exc}")
+            return []
+        if not isinstance(collected, dict):
+            collected = {(): collected}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in collected.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (not cumulative) counts, sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines: List[str] = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Process-wide metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name!r} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Callable[[], float | Dict[_Labels, float]] | None = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+REQUEST_SECONDS = METRICS.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "endpoint", "status")
+)
+STAGE_SECONDS = METRICS.histogram(
+    "stage_duration_seconds", "Time spent in each pipeline stage", ("endpoint", "stage")
+)
+INFERENCE_SECONDS = METRICS.histogram("inference_duration_seconds", "Model forward pass latency", ("model",))
+INFERENCE_IMAGES = METRICS.counter("inference_images_total", "Images passed through each model", ("model",))
+MODEL_LOAD_SECONDS = METRICS.gauge(
+    "model_load_seconds", "Time to load each model, including export and parity checks", ("model", "backend")
+)
+FRAMES_PROCESSED = METRICS.counter("frames_processed_total", "Video frames analysed", ("endpoint",))
+FRAMES_PER_SECOND = METRICS.gauge(
+    "analysis_frames_per_second", "Throughput of the most recent video analysis", ("endpoint",)
+)
+UPLOAD_BYTES = METRICS.counter("upload_bytes_total", "Bytes received in uploads", ("endpoint",))
+ARTIFACT_WRITE_SECONDS = METRICS.histogram(
+    "artifact_write_duration_seconds", "Background encode and write time per artifact", ("kind",)
+)
+
+
+@contextmanager
+def stage(name: str, endpoint: str | None = None) -> Iterator[None]:
+    """Time a block into ``stage_duration_seconds`` under the current request's endpoint."""
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started, endpoint)
+
+
+def record_stage(name: str, seconds: float, endpoint: str | None = None) -> None:
+    """Add an already measured duration to ``stage_duration_seconds``."""
+
+    STAGE_SECONDS.observe(seconds, endpoint=endpoint or current_endpoint(), stage=name)
+
+
+def record_throughput(endpoint: str, frames: int, seconds: float) -> None:
+    if frames > 0:
+        FRAMES_PROCESSED.inc(frames, endpoint=endpoint)
+        if seconds > 0:
+            FRAMES_PER_SECOND.set(frames / seconds, endpoint=endpoint)
+
+
+def _batch_size(source: Any) -> int:
+    if isinstance(source, (list, tuple)):
+        return len(source)
+    shape = getattr(source, "shape", None)
+    return int(shape[0]) if shape is not None and len(shape) == 4 else 1
+
+
+class InstrumentedModel:
+    """Transparent wrapper that times every call of a model into ``inference_duration_seconds``.
+
+    Attribute access (``names``, ``predict``, ...) goes straight to the wrapped model.
+    """
+
+    def __init__(self, model: Any, name: str) -> None:
+        self._model = model
+        self._metric_name = name
+
+    def __call__(self, source: Any, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return self._model(source, *args, **kwargs)
+        finally:
+            INFERENCE_SECONDS.observe(time.perf_counter() - started, model=self._metric_name)
+            INFERENCE_IMAGES.inc(_batch_size(source), model=self._metric_name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template (not raw path,
+    which would explode label cardinality) and exposing the route to :func:`stage`."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    @staticmethod
+    def _route(scope: Dict[str, Any]) -> str:
+        router = getattr(scope.get("app"), "router", None)
+        for route in getattr(router, "routes", ()):
+            match, _ = route.matches(scope)
+            if match.name == "FULL":
+                return getattr(route, "path", scope["path"])
+        return "unmatched"
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._route(scope)
+        token = _endpoint.set(endpoint)
+        status = {"code": 500}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=scope["method"], endpoint=endpoint, status=status["code"]
+            )
+            _endpoint.reset(token)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Mapping
+
+# Fraction of analyses profiled without being asked (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Whether clients may ask for a profile with ``X-Profile: 1`` or ``?profile=1``
+PROFILE_ON_REQUEST = os.getenv("PROFILE_ON_REQUEST", "1") != "0"
+# Functions listed in the text summary written next to the ``.prof`` file
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "40"))
+
+PROFILE_HEADER = "x-profile"
+_TRUTHY = {"1", "true", "yes", "on"}
+
+_session: ContextVar["ProfileSession | None"] = ContextVar("profile_session", default=None)
+
+
+class ProfileSession:
+    """CPU profile of one request's analysis, collected on the worker threads it uses.
+
+    Each ``run`` call profiles the calling thread only; helper threads started by the
+    analysis (frame prefetch, writers) are not included. Batched inference runs on
+    the thread of whichever request opened the batch, so the profile may contain
+    other requests' forward passes (or miss this one's); the summary states this
+    request's share of batch time next to the time spent on other requests.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self.batch_share = 0.0
+        self.batch_others = 0.0
+        self.path: Path | None = None
+        self._stats: pstats.Stats | None = None
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active (one tool per interpreter on 3.12+)
+            with self._lock:
+                self.skipped += 1
+            return fn(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.calls += 1
+                self.seconds += elapsed
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+
+    def save(self, directory: Path) -> Path | None:
+        """Write ``<name>_<timestamp>_profile.prof`` (for snakeviz / pstats) and a ``.txt`` summary."""
+
+        with self._lock:
+            stats = self._stats
+            if stats is None:
+                return None
+            directory.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+            path = directory / f"{self.name}_{timestamp}_profile.prof"
+            stats.dump_stats(str(path))
+
+            report = io.StringIO()
+            report.write(f"{self.name}: {self.calls} profiled call(s), {self.seconds:.3f}s")
+            if self.skipped:
+                report.write(f", {self.skipped} skipped (another profiler was active)")
+            if self.batch_share or self.batch_others:
+                report.write(
+                    f"\nbatched inference: {self.batch_share:.3f}s this request's share, "
+                    f"{self.batch_others:.3f}s run on its thread for other requests' items"
+                )
+            report.write("\n\n")
+            stats.stream = report
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_TOP)
+            path.with_suffix(".txt").write_text(report.getvalue(), encoding="utf-8")
+            self.path = path
+            return path
+
+
+def _truthy(value: str | None) -> bool:
+    return (value or "").strip().lower() in _TRUTHY
+
+
+def wanted(headers: Mapping[str, str], query: Mapping[str, str]) -> bool:
+    """Profile this request: asked for by header / query flag, or picked by the sample rate."""
+
+    if PROFILE_ON_REQUEST and (_truthy(headers.get(PROFILE_HEADER)) or _truthy(query.get("profile"))):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def activate(session: ProfileSession | None):
+    return _session.set(session)
+
+
+def deactivate(token) -> None:
+    _session.reset(token)
+
+
+def record_batch(share: float, others: float) -> None:
+    """Note batched inference time for the current request's profile, if it has one.
+
+    ``share`` is this request's part of the batches it took part in; ``others`` is the
+    time its thread spent running other requests' items.
+    """
+
+    session = _session.get()
+    if session is None:
+        return
+    with session._lock:
+        session.batch_share += share
+        session.batch_others += others
+
+
+def call(fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    """Run ``fn`` under the current request's profile, if it has one.
+
+    Meant for the worker thread side of ``run_in_threadpool``, which copies the
+    request context and therefore sees the active session.
+    """
+
+    session = _session.get()
+    if session is None:
+        return fn(*args, **kwargs)
+    return session.run(fn, *args, **kwargs)
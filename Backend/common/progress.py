@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Iterable
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+PROGRESS_INTERVAL_SECONDS = 0.5
+
+
+class ProgressReporter:
+    """Turn per-frame analyzer output into ``progress`` / ``detections`` / ``alert`` events.
+
+    ``detections`` and ``alert`` events are sent for every frame that has any;
+    ``progress`` events (frame counts) are throttled to one per ``interval`` seconds.
+    ``hls`` is sent once, when the first segment of a live playlist is on disk.
+    """
+
+    def __init__(
+        self,
+        callback: ProgressCallback,
+        total_frames: int = 0,
+        fps: float = 0.0,
+        interval: float = PROGRESS_INTERVAL_SECONDS,
+    ) -> None:
+        self.callback = callback
+        self.total_frames = max(0, int(total_frames))
+        self.fps = float(fps) or 0.0
+        self.interval = interval
+        self.frames_processed = 0
+        self._last_sent = 0.0
+
+    def _time(self, frame_index: int) -> float | None:
+        return round(frame_index / self.fps, 2) if self.fps else None
+
+    def frame(
+        self,
+        frame_index: int,
+        detections: Iterable[Dict[str, Any]] = (),
+        alerts: Iterable[Dict[str, Any]] = (),
+    ) -> None:
+        self.frames_processed += 1
+
+        detections = list(detections)
+        if detections:
+            self.callback({
+                "type": "detections",
+                "frame_index": frame_index,
+                "time_sec": self._time(frame_index),
+                "items": detections,
+            })
+        for alert in alerts:
+            self.callback({"type": "alert", "frame_index": frame_index, **alert})
+
+        now = time.monotonic()
+        if now - self._last_sent >= self.interval:
+            self._last_sent = now
+            self.callback(self._progress())
+
+    def _progress(self) -> Dict[str, Any]:
+        event: Dict[str, Any] = {
+            "type": "progress",
+            "frames_processed": self.frames_processed,
+            "total_frames": self.total_frames or None,
+        }
+        if self.total_frames:
+            event["percent"] = round(min(100.0, 100.0 * self.frames_processed / self.total_frames), 1)
+        return event
+
+    def hls(self, playlist: str) -> None:
+        self.callback({"type": "hls", "playlist": playlist})
+
+    def finish(self) -> None:
+        self.callback(self._progress())
+
+
+def reporter_for(callback: ProgressCallback | None, total_frames: int = 0, fps: float = 0.0) -> ProgressReporter | None:
+    return ProgressReporter(callback, total_frames, fps) if callback is not None else None
+
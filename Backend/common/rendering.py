@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import Callable, List, NamedTuple, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from Backend.common.metrics import stage
+
+Color = Tuple[int, int, int]
+
+# BGR colours for labels that have no fixed colour of their own
+PALETTE: Tuple[Color, ...] = (
+    (56, 56, 255),
+    (151, 157, 255),
+    (31, 112, 255),
+    (29, 178, 255),
+    (49, 210, 207),
+    (10, 249, 72),
+    (23, 204, 146),
+    (134, 219, 61),
+    (211, 188, 0),
+    (255, 115, 100),
+)
+
+
+def color_for(class_id: int) -> Color:
+    return PALETTE[int(class_id) % len(PALETTE)]
+
+
+class OverlayItem(NamedTuple):
+    """One box with an optional caption drawn above it."""
+
+    bbox: Tuple[int, int, int, int]
+    color: Color
+    text: str = ""
+    thickness: int = 2
+    font_scale: float = 0.5
+    text_offset: int = 5
+
+
+def draw_items(frame: np.ndarray, items: Sequence[OverlayItem]) -> np.ndarray:
+    """Draw ``items`` straight onto ``frame``."""
+
+    for item in items:
+        x1, y1, x2, y2 = item.bbox
+        cv2.rectangle(frame, (x1, y1), (x2, y2), item.color, item.thickness)
+        if item.text:
+            cv2.putText(
+                frame,
+                item.text,
+                (x1, y1 - item.text_offset),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                item.font_scale,
+                item.color,
+                2,
+            )
+    return frame
+
+
+class OverlayRenderer:
+    """Per-frame annotation for video loops.
+
+    Static overlays (zones, lines) are rasterised once per frame size and kept as the
+    flat indices and values of their pixels, so compositing them costs one scatter of
+    a few thousand bytes. Per-frame boxes change every frame and are drawn directly
+    with :func:`draw_items`.
+    """
+
+    def __init__(self, static: Callable[[np.ndarray], object] | None = None) -> None:
+        self.static = static
+        self._shape: Tuple[int, ...] | None = None
+        self._indices: np.ndarray | None = None
+        self._values: np.ndarray | None = None
+
+    def _reset(self, shape: Tuple[int, ...]) -> None:
+        layer = np.zeros(shape, dtype=np.uint8)
+        self.static(layer)
+        # A second pass on white finds the strokes that drawing black on black hides
+        coverage = np.full(shape, 255, dtype=np.uint8)
+        self.static(coverage)
+        touched = (layer != 0) | (coverage != 255)
+        if layer.ndim == 3:
+            # Every channel of a touched pixel
+            touched = touched.any(axis=-1, keepdims=True)
+        flat = layer.reshape(-1)
+        self._indices = np.flatnonzero(np.broadcast_to(touched, shape))
+        self._values = flat[self._indices]
+        self._shape = shape
+
+    def _draw_static(self, frame: np.ndarray) -> None:
+        if self.static is None:
+            return
+        if not frame.flags.c_contiguous:
+            self.static(frame)
+            return
+        if frame.shape != self._shape:
+            self._reset(frame.shape)
+        frame.reshape(-1)[self._indices] = self._values
+
+    def render(self, frame: np.ndarray, items: Sequence[OverlayItem]) -> np.ndarray:
+        with stage("draw"):
+            self._draw_static(frame)
+            draw_items(frame, items)
+        return frame
+
+
+def render_items(frame: np.ndarray, items: List[OverlayItem], renderer: OverlayRenderer | None = None) -> np.ndarray:
+    """Draw through ``renderer`` when one is given, otherwise directly."""
+
+    if renderer is not None:
+        return renderer.render(frame, items)
+    with stage("draw"):
+        return draw_items(frame, items)
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil is in requirements.txt
+    psutil = None
+
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "900"))
+# Files younger than this are never touched (videos still being written, fresh uploads)
+RETENTION_MIN_AGE_SECONDS = float(os.getenv("RETENTION_MIN_AGE_SECONDS", "600"))
+# Pause after every batch of deletions so a large sweep does not saturate the disk
+RETENTION_PAUSE_EVERY = 200
+RETENTION_PAUSE_SECONDS = 0.05
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
+def parse_duration(value: str) -> float:
+    """``"90"``, ``"30m"``, ``"12h"``, ``"7d"`` or ``"2w"`` in seconds."""
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", value.lower())
+    if not match:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return float(match.group(1)) * _DURATION_UNITS.get(match.group(2) or "s", 1)
+
+
+def parse_size(value: str) -> int:
+    """``"500M"``, ``"20G"`` or a plain byte count."""
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", value.lower())
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """What to keep in one file category.
+
+    Files older than ``ttl`` are deleted; when the directory exceeds ``max_bytes``
+    the oldest files go first. ``compact`` lists glob patterns of derived files
+    (comparison images, HLS copies of a kept MP4, ...) that are dropped once they
+    are older than ``compact_after``, and only if ``compact_if(path)`` allows it
+    (e.g. while the inputs to rebuild them from are kept).
+    """
+
+    category: str
+    directory: Path
+    ttl: float | None = None
+    max_bytes: int | None = None
+    compact: Tuple[str, ...] = ()
+    compact_after: float = 86400.0
+    compact_if: Callable[[Path], bool] | None = None
+
+
+def _scan(directory: Path) -> List[Tuple[float, int, str]]:
+    """``(mtime, size, path)`` of every file below ``directory``.
+
+    Dotfiles (in-progress temp files, the upload store's mapping database) are skipped.
+    """
+
+    entries: List[Tuple[float, int, str]] = []
+    stack = [str(directory)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as iterator:
+                for entry in iterator:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat = entry.stat(follow_symlinks=False)
+                            entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    except OSError:
+                        continue
+        except FileNotFoundError:
+            continue
+    return entries
+
+
+def _lower_priority() -> None:
+    """Run the calling thread at the lowest CPU and (where supported) I/O priority."""
+
+    thread_id = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, thread_id, 19)
+    except (AttributeError, OSError):  # pragma: no cover - not available on Windows
+        pass
+    if psutil is not None and hasattr(psutil, "IOPRIO_CLASS_IDLE"):
+        try:
+            # On Linux a thread id addresses just this thread
+            psutil.Process(thread_id).ionice(psutil.IOPRIO_CLASS_IDLE)
+        except (psutil.Error, OSError, ValueError):  # pragma: no cover - best effort
+            pass
+
+
+class RetentionManager:
+    """Enforce :class:`RetentionPolicy` rules on a low-priority background thread.
+
+    ``is_busy(path)`` lets the caller protect files that are still referenced (e.g.
+    artifacts queued for writing); ``on_sweep`` runs after every sweep (e.g. to drop
+    references to deleted files). Every sweep returns and keeps per-category stats.
+    """
+
+    def __init__(
+        self,
+        policies: Sequence[RetentionPolicy],
+        interval: float = RETENTION_INTERVAL_SECONDS,
+        min_age: float = RETENTION_MIN_AGE_SECONDS,
+        is_busy: Callable[[Path], bool] | None = None,
+        on_sweep: Callable[[], object] | None = None,
+    ) -> None:
+        self.policies = list(policies)
+        self.interval = max(1.0, float(interval))
+        self.min_age = max(0.0, float(min_age))
+        self.is_busy = is_busy
+        self.on_sweep = on_sweep
+        self.last_run: Dict[str, Dict[str, float]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._deleted_since_pause = 0
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        _lower_priority()
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as exc:  # pragma: no cover - keep sweeping on the next interval
+                print(f"[ERROR] Retention sweep failed: {exc}")
+
+    def _delete(self, path: str) -> bool:
+        if self.is_busy is not None and self.is_busy(Path(path)):
+            return False
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return True
+        except OSError as exc:
+            print(f"[WARN] Retention could not delete {path}: {exc}")
+            return False
+        self._deleted_since_pause += 1
+        if self._deleted_since_pause >= RETENTION_PAUSE_EVERY:
+            self._deleted_since_pause = 0
+            time.sleep(RETENTION_PAUSE_SECONDS)
+        return True
+
+    def apply(self, policy: RetentionPolicy, now: float | None = None) -> Dict[str, float]:
+        """Compact, expire and then enforce the quota of one category."""
+
+        now = time.time() if now is None else now
+        stats = {"compacted": 0, "expired": 0, "evicted": 0, "freed_bytes": 0, "bytes": 0, "files": 0}
+        kept: List[Tuple[float, int, str]] = []
+        for mtime, size, path in _scan(policy.directory):
+            age = now - mtime
+            name = os.path.basename(path)
+            if age < self.min_age:
+                kept.append((mtime, size, path))
+                continue
+            if (
+                policy.compact
+                and age >= policy.compact_after
+                and any(fnmatch.fnmatch(name, pattern) for pattern in policy.compact)
+                and (policy.compact_if is None or policy.compact_if(Path(path)))
+            ):
+                if self._delete(path):
+                    stats["compacted"] += 1
+                    stats["freed_bytes"] += size
+                    continue
+            if policy.ttl is not None and age >= policy.ttl:
+                if self._delete(path):
+                    stats["expired"] += 1
+                    stats["freed_bytes"] += size
+                    continue
+            kept.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in kept)
+        if policy.max_bytes is not None and total > policy.max_bytes:
+            for mtime, size, path in sorted(kept):
+                if total <= policy.max_bytes:
+                    break
+                if now - mtime < self.min_age:
+                    continue
+                if self._delete(path):
+                    stats["evicted"] += 1
+                    stats["freed_bytes"] += size
+                    total -= size
+        stats["bytes"] = total
+        stats["files"] = len(kept) - stats["evicted"]
+        return stats
+
+    def run_once(self, now: float | None = None) -> Dict[str, Dict[str, float]]:
+        results = {policy.category: self.apply(policy, now) for policy in self.policies}
+        if self.on_sweep is not None:
+            self.on_sweep()
+        self.last_run = results
+        return results
+
+
+def overrides_from_env(value: str | None, parse: Callable[[str], float]) -> Dict[str, float]:
+    """``"drones-inputs=7d,human-videos=3d"`` style per-category settings."""
+
+    overrides: Dict[str, float] = {}
+    for item in (value or "").split(","):
+        name, _, setting = item.partition("=")
+        if name.strip() and setting.strip():
+            overrides[name.strip()] = parse(setting)
+    return overrides
+
+
+def policies_from_env(
+    categories: Dict[str, Path],
+    default_ttls: Dict[str, float | None],
+    compact: Dict[str, Iterable[str]] | None = None,
+    compact_if: Dict[str, Callable[[Path], bool]] | None = None,
+) -> List[RetentionPolicy]:
+    """Build one policy per category; ``RETENTION_TTL`` / ``RETENTION_QUOTA`` override the defaults."""
+
+    ttls = overrides_from_env(os.getenv("RETENTION_TTL"), parse_duration)
+    quotas = overrides_from_env(os.getenv("RETENTION_QUOTA"), parse_size)
+    compact_after = parse_duration(os.getenv("RETENTION_COMPACT_AFTER", "1d"))
+    compact = compact or {}
+    compact_if = compact_if or {}
+    return [
+        RetentionPolicy(
+            category=category,
+            directory=directory,
+            ttl=ttls.get(category, default_ttls.get(category)),
+            max_bytes=int(quotas[category]) if category in quotas else None,
+            compact=tuple(compact.get(category, ())),
+            compact_after=compact_after,
+            compact_if=compact_if.get(category),
+        )
+        for category, directory in categories.items()
+    ]
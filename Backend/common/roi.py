@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import math
+import os
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+Region = Tuple[int, int, int, int]  # x1, y1, x2, y2 in full-frame pixels
+
+DEFAULT_IMGSZ = 640
+IMGSZ_STRIDE = 32
+# Extra context around a region of interest, as a fraction of its width / height
+ROI_MARGIN = float(os.getenv("ROI_MARGIN", "0.15"))
+
+
+def _endpoint_settings(value: str | None) -> Dict[str, int]:
+    settings: Dict[str, int] = {}
+    for item in (value or "").split(","):
+        name, _, setting = item.partition("=")
+        if name.strip() and setting.strip():
+            settings[name.strip()] = int(setting)
+    return settings
+
+
+# Per-endpoint inference size, e.g. ``DETECTOR_IMGSZ="drones=1280,human=480"``
+DETECTOR_IMGSZ = _endpoint_settings(os.getenv("DETECTOR_IMGSZ"))
+
+
+def imgsz_for(endpoint: str, shape: Tuple[int, ...]) -> int:
+    """Inference size for ``endpoint`` on an input of ``shape`` (h, w, ...).
+
+    The configured size (default 640) is never larger than the input's long side
+    rounded up to the model stride, so small crops are not upscaled for nothing.
+    """
+
+    requested = DETECTOR_IMGSZ.get(endpoint, DEFAULT_IMGSZ)
+    longest = IMGSZ_STRIDE * math.ceil(max(shape[0], shape[1]) / IMGSZ_STRIDE)
+    return max(IMGSZ_STRIDE, min(requested, longest))
+
+
+def expand_region(region: Region | None, shape: Tuple[int, ...], margin: float = ROI_MARGIN) -> Region | None:
+    """Grow ``region`` by ``margin`` and clip it to the frame.
+
+    Returns ``None`` (run on the full frame) when there is no region or it covers
+    most of the frame anyway.
+    """
+
+    if region is None:
+        return None
+    height, width = shape[:2]
+    x1, y1, x2, y2 = region
+    pad_x = round((x2 - x1) * margin)
+    pad_y = round((y2 - y1) * margin)
+    x1, y1 = max(0, x1 - pad_x), max(0, y1 - pad_y)
+    x2, y2 = min(width, x2 + pad_x), min(height, y2 + pad_y)
+    if x2 <= x1 or y2 <= y1 or (x2 - x1) * (y2 - y1) >= 0.9 * width * height:
+        return None
+    return int(x1), int(y1), int(x2), int(y2)
+
+
+def points_region(points: Iterable[np.ndarray]) -> Region | None:
+    """Bounding box of several point arrays (polygons, line endpoints)."""
+
+    stacked = [np.asarray(item).reshape(-1, 2) for item in points]
+    if not stacked:
+        return None
+    merged = np.concatenate(stacked)
+    x1, y1 = merged.min(axis=0)
+    x2, y2 = merged.max(axis=0)
+    return int(x1), int(y1), int(x2) + 1, int(y2) + 1
+
+
+def parse_band(value: str | None) -> Tuple[float, float] | None:
+    """``"0-0.6"`` -> the horizontal band between 0 % and 60 % of the frame height."""
+
+    if not value:
+        return None
+    top, _, bottom = value.partition("-")
+    top, bottom = float(top), float(bottom)
+    if not 0.0 <= top < bottom <= 1.0:
+        raise ValueError(f"Invalid band {value!r}; expected 'top-bottom' fractions of the frame height")
+    return top, bottom
+
+
+def band_region(shape: Tuple[int, ...], band: Tuple[float, float] | None) -> Region | None:
+    if band is None:
+        return None
+    height, width = shape[:2]
+    return 0, int(height * band[0]), width, math.ceil(height * band[1])
+
+
+def crop(frame: np.ndarray, region: Region | None) -> np.ndarray:
+    """View of ``frame`` inside ``region`` (no copy)."""
+
+    if region is None:
+        return frame
+    x1, y1, x2, y2 = region
+    return frame[y1:y2, x1:x2]
+
+
+def to_frame_coords(xyxy: np.ndarray, region: Region | None) -> np.ndarray:
+    """Map ``(N, 4)`` boxes from crop coordinates back to the full frame."""
+
+    if region is None or not len(xyxy):
+        return xyxy
+    return xyxy + np.array([region[0], region[1], region[0], region[1]], dtype=xyxy.dtype)
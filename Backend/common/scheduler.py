@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
+
+PRIORITY_IMAGE = 0
+PRIORITY_VIDEO = 1
+
+
+class Overloaded(Exception):
+    """Raised when a wait queue is full; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, pool: str, retry_after: int) -> None:
+        super().__init__(f"{pool} is at capacity, retry in {retry_after}s")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class _Pool:
+    """``limit`` concurrent holders plus a bounded priority queue of waiters."""
+
+    def __init__(self, name: str, limit: int, max_waiting: int) -> None:
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.max_waiting = max(0, int(max_waiting))
+        self.active = 0
+        self.avg_seconds = 1.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def retry_after(self) -> int:
+        backlog = self.waiting + self.active + 1
+        return max(1, math.ceil(self.avg_seconds * backlog / self.limit))
+
+    def check(self) -> None:
+        if self.active >= self.limit and self.waiting >= self.max_waiting:
+            raise Overloaded(self.name, self.retry_after())
+
+    async def acquire(self, priority: int) -> None:
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return
+
+        self.check()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self.release()
+            raise
+
+    def release(self, elapsed: float | None = None) -> None:
+        if elapsed is not None:
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * elapsed
+        self.active -= 1
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+                return
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "avg_seconds": round(self.avg_seconds, 3),
+        }
+
+
+class Scheduler:
+    """Admission control for model work.
+
+    Every model has its own concurrency limit and bounded wait queue; video jobs
+    also hold a slot of the shared ``video`` pool so long analyses cannot take
+    every core. Waiters are served by priority, so images overtake queued videos.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        max_waiting: int = 16,
+        video_limit: int = 2,
+        video_max_waiting: int = 8,
+    ) -> None:
+        self.pools = {name: _Pool(name, limit, max_waiting) for name, limit in limits.items()}
+        self.video = _Pool("video", video_limit, video_max_waiting)
+
+    def _pools_for(self, model: str, priority: int) -> List[_Pool]:
+        pools = [self.pools[model]]
+        if priority >= PRIORITY_VIDEO:
+            pools.insert(0, self.video)
+        return pools
+
+    def check(self, model: str, priority: int = PRIORITY_IMAGE) -> None:
+        """Raise :class:`Overloaded` now if the request could not even be queued."""
+
+        for pool in self._pools_for(model, priority):
+            pool.check()
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = PRIORITY_IMAGE) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            for pool in self._pools_for(model, priority):
+                await pool.acquire(priority)
+                started = time.monotonic()
+                stack.callback(lambda p=pool, s=started: p.release(time.monotonic() - s))
+            yield
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {name: pool.stats() for name, pool in {**self.pools, "video": self.video}.items()}
+
+
+def limits_from_env(defaults: Dict[str, int], value: str | None) -> Dict[str, int]:
+    """Override ``defaults`` with a ``"drone=2,anomaly=1"`` style setting."""
+
+    limits = dict(defaults)
+    for item in (value or "").split(","):
+        name, _, limit = item.partition("=")
+        if name.strip() and limit.strip().isdigit():
+            limits[name.strip()] = int(limit)
+    return limits
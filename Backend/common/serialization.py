@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack responses are optional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def json_default(obj: Any) -> Any:
+    """Fallback for values the encoders do not know (numpy types, detections, paths, ...)."""
+
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if hasattr(obj, "dtype"):  # numpy scalars
+        return float(obj) if obj.dtype.kind in "fc" else int(obj)
+    if hasattr(obj, "as_dict"):  # Backend.common.detections records
+        return obj.as_dict()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON; uses orjson (with native numpy support) when available."""
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                payload,
+                default=json_default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            # e.g. integers beyond 64 bit; the stdlib encoder copes with those
+            pass
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+def packb(payload: Any) -> bytes:
+    """MessagePack encoding of ``payload``; raises RuntimeError when msgpack is not installed."""
+
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack.packb(payload, default=json_default, use_bin_type=True)
+
+
+def wants_msgpack(accept: str | None) -> bool:
+    """True when an ``Accept`` header asks for MessagePack and it can be produced."""
+
+    return msgpack is not None and any(media in (accept or "") for media in MSGPACK_MEDIA_TYPES)
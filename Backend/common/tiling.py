@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from Backend.common.roi import Region
+
+TILE_SIZE = int(os.getenv("TILE_SIZE", "640"))
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
+# Tiles whose strongest Laplacian response stays below this are flat (clipped sky,
+# night, lens cover) and cannot hide a target
+TILE_MIN_TEXTURE = float(os.getenv("TILE_MIN_TEXTURE", "24"))
+# Boxes of the same class overlapping by more than this (intersection over the
+# smaller box) are one object cut by a tile border
+MERGE_IOS = float(os.getenv("TILE_MERGE_IOS", "0.5"))
+
+
+def tile_regions(shape: Tuple[int, ...], tile: int = TILE_SIZE, overlap: float = TILE_OVERLAP) -> List[Region]:
+    """Overlapping ``tile`` x ``tile`` regions covering a frame of ``shape``.
+
+    The last row and column are aligned to the frame edge instead of padded.
+    """
+
+    height, width = shape[:2]
+    step = max(1, int(tile * (1.0 - overlap)))
+
+    def starts(length: int) -> List[int]:
+        if length <= tile:
+            return [0]
+        positions = list(range(0, length - tile, step))
+        positions.append(length - tile)
+        return positions
+
+    return [
+        (x, y, min(width, x + tile), min(height, y + tile))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def is_textured(view: np.ndarray, threshold: float = TILE_MIN_TEXTURE) -> bool:
+    """Whether a tile has any edge strong enough to be worth a forward pass.
+
+    Uses the peak rather than the mean response: a drone a few pixels wide in an
+    otherwise empty sky still produces a strong local edge.
+    """
+
+    gray = cv2.cvtColor(view, cv2.COLOR_BGR2GRAY) if view.ndim == 3 else view
+    response = cv2.Laplacian(gray, cv2.CV_16S, ksize=3)
+    return float(np.abs(response).max(initial=0)) >= threshold
+
+
+def merge_boxes(
+    xyxy: np.ndarray,
+    scores: np.ndarray,
+    classes: np.ndarray,
+    threshold: float = MERGE_IOS,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Class-aware greedy non-maximum merging (SAHI's NMM) on intersection-over-smaller.
+
+    Strongest box first, every remaining box of the same class overlapping it by more
+    than ``threshold`` is folded into it: the merged box spans their union and keeps
+    the best score. Halves of an object split at a tile border thus come back as the
+    whole object, and duplicates from overlapping tiles collapse into one box.
+    Returns the merged ``(xyxy, scores, classes)``.
+    """
+
+    xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32)
+    classes = np.asarray(classes, dtype=np.int64)
+    areas = np.maximum(xyxy[:, 2] - xyxy[:, 0], 0) * np.maximum(xyxy[:, 3] - xyxy[:, 1], 0)
+    order = np.argsort(-scores, kind="stable")
+    merged: List[np.ndarray] = []
+    keep: List[int] = []
+    while len(order):
+        best, rest = order[0], order[1:]
+        x1 = np.maximum(xyxy[best, 0], xyxy[rest, 0])
+        y1 = np.maximum(xyxy[best, 1], xyxy[rest, 1])
+        x2 = np.minimum(xyxy[best, 2], xyxy[rest, 2])
+        y2 = np.minimum(xyxy[best, 3], xyxy[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        ios = inter / np.maximum(np.minimum(areas[best], areas[rest]), 1e-6)
+        folded = (classes[rest] == classes[best]) & (ios > threshold)
+        group = xyxy[np.concatenate(([best], rest[folded]))]
+        merged.append(np.concatenate((group[:, :2].min(axis=0), group[:, 2:].max(axis=0))))
+        keep.append(int(best))
+        order = rest[~folded]
+    if not keep:
+        return np.zeros((0, 4), dtype=np.float32), scores[:0], classes[:0]
+    return np.stack(merged), scores[keep], classes[keep]
@@ -0,0 +1,441 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Tuple
+
+import cv2
+import numpy as np
+
+from Backend.common.metrics import stage
+from Backend.common.serialization import dumps
+
+OUTPUT_MODES = ("full", "clips")
+PRE_ROLL_SECONDS = 2.0
+POST_ROLL_SECONDS = 2.0
+PRE_ROLL_MEMORY_BYTES = 256 * 1024 * 1024
+# Tail of ffmpeg's log kept for error messages
+FFMPEG_ERROR_BYTES = 4096
+HLS_SEGMENT_SECONDS = 2.0
+
+
+@lru_cache(maxsize=1)
+def find_ffmpeg() -> str | None:
+    """Return the ffmpeg binary (``FFMPEG_BINARY`` or ``PATH``), or ``None`` when unavailable."""
+
+    configured = os.getenv("FFMPEG_BINARY")
+    if configured:
+        return shutil.which(configured) or (configured if Path(configured).is_file() else None)
+    return shutil.which("ffmpeg")
+
+
+def _even(value: float) -> int:
+    return max(2, int(value) // 2 * 2)
+
+
+@dataclass(frozen=True)
+class VideoEncoder:
+    """How annotated videos are encoded.
+
+    ``codec="h264"`` pipes raw frames into a local ffmpeg (libx264, yuv420p,
+    ``+faststart``) so the result plays inline in browsers; when ffmpeg is missing
+    it falls back to OpenCV's ``mp4v``. ``max_width`` downscales wider frames,
+    keeping the aspect ratio.
+    """
+
+    codec: str = "h264"
+    crf: int = 23
+    preset: str = "veryfast"
+    max_width: int | None = None
+
+    def output_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        width, height = size
+        if self.max_width and width > self.max_width:
+            return _even(self.max_width), _even(height * self.max_width / width)
+        if self.codec == "h264":
+            # yuv420p needs even dimensions
+            return _even(width), _even(height)
+        return width, height
+
+    def open_with_hls(
+        self, path: str | Path, playlist_path: str | Path, fps: float, size: Tuple[int, int]
+    ) -> "FFmpegWriter | None":
+        """One H.264 encode written both as ``path`` (mp4) and as an HLS playlist
+        (``<stem>.m3u8`` + ``<stem>_NNNNN.ts``) through ffmpeg's tee muxer, or ``None``
+        without ffmpeg."""
+
+        ffmpeg = find_ffmpeg()
+        if ffmpeg is None:
+            return None
+
+        path, playlist_path = Path(path), Path(playlist_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        playlist_path.parent.mkdir(parents=True, exist_ok=True)
+        segment_pattern = playlist_path.with_name(f"{playlist_path.stem}_%05d.ts")
+        hls_options = ":".join((
+            "f=hls",
+            f"hls_time={HLS_SEGMENT_SECONDS}",
+            "hls_list_size=0",
+            "hls_playlist_type=event",
+            "hls_flags=independent_segments+temp_file",
+            f"hls_segment_filename={_tee_escape(str(segment_pattern), ':]')}",
+        ))
+        slaves = (
+            f"[f=mp4:movflags=+faststart]{path}",
+            f"[{hls_options}]{playlist_path}",
+        )
+        output_args = [
+            # Segment boundaries need keyframes; the mp4 simply gets one every segment
+            "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+            "-map", "0:v",
+            "-f", "tee",
+        ]
+        target = "|".join(_tee_escape(slave, "|") for slave in slaves)
+        return FFmpegWriter(ffmpeg, path, fps, size, self, output_args, target=target)
+
+    def open(self, path: str | Path, fps: float, size: Tuple[int, int]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        ffmpeg = find_ffmpeg() if self.codec == "h264" else None
+        if ffmpeg is not None:
+            return FFmpegWriter(ffmpeg, path, fps, size, self)
+        return OpenCVWriter(path, fps, size, self.output_size(size) if self.max_width else size)
+
+
+def _tee_escape(text: str, specials: str) -> str:
+    """Backslash-escape ``specials`` (plus ``\\`` and ``'``) for one level of ffmpeg's tee syntax."""
+
+    return "".join(f"\\{char}" if char in specials or char in "\\'" else char for char in text)
+
+
+def encoder_from_env() -> VideoEncoder:
+    """Build the default encoder from ``VIDEO_CODEC``, ``VIDEO_CRF``, ``VIDEO_PRESET`` and ``VIDEO_MAX_WIDTH``."""
+
+    max_width = int(os.getenv("VIDEO_MAX_WIDTH", "0") or 0)
+    return VideoEncoder(
+        codec=os.getenv("VIDEO_CODEC", "h264").lower(),
+        crf=int(os.getenv("VIDEO_CRF", "23")),
+        preset=os.getenv("VIDEO_PRESET", "veryfast"),
+        max_width=max_width or None,
+    )
+
+
+DEFAULT_ENCODER = encoder_from_env()
+
+
+class OpenCVWriter:
+    """``cv2.VideoWriter`` (mp4v) that resizes frames when a smaller output size is requested."""
+
+    def __init__(self, path: Path, fps: float, size: Tuple[int, int], output_size: Tuple[int, int]) -> None:
+        self.path = path
+        self._resize = tuple(output_size) != tuple(size)
+        self._output_size = tuple(output_size)
+        self._writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), float(fps), self._output_size)
+
+    def isOpened(self) -> bool:
+        return self._writer.isOpened()
+
+    def write(self, frame: np.ndarray) -> None:
+        if self._resize:
+            frame = cv2.resize(frame, self._output_size, interpolation=cv2.INTER_AREA)
+        self._writer.write(frame)
+
+    def release(self) -> None:
+        self._writer.release()
+
+
+class FFmpegWriter:
+    """Pipe BGR frames into ``ffmpeg`` and encode them as H.264 (mp4 unless ``output_args`` say otherwise)."""
+
+    def __init__(
+        self,
+        ffmpeg: str,
+        path: Path,
+        fps: float,
+        size: Tuple[int, int],
+        encoder: VideoEncoder,
+        output_args: List[str] | None = None,
+        target: str | None = None,
+    ) -> None:
+        self.path = path
+        width, height = size
+        out_width, out_height = encoder.output_size(size)
+        command = [
+            ffmpeg,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}",
+            "-r", f"{float(fps) or 24.0:.3f}",
+            "-i", "-",
+            "-an",
+        ]
+        if (out_width, out_height) != (width, height):
+            command += ["-vf", f"scale={out_width}:{out_height}:flags=area"]
+        command += [
+            "-c:v", "libx264",
+            "-preset", encoder.preset,
+            "-crf", str(encoder.crf),
+            "-pix_fmt", "yuv420p",
+            *(output_args if output_args is not None else ["-movflags", "+faststart"]),
+            target if target is not None else str(path),
+        ]
+        self._size = (width, height)
+        # A file rather than a pipe: nobody reads stderr until release(), and a full pipe
+        # would block ffmpeg (and then this writer) on a long or noisy encode
+        self._log = tempfile.TemporaryFile()
+        try:
+            self._process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=self._log,
+            )
+        except BaseException:
+            self._log.close()
+            raise
+
+    def isOpened(self) -> bool:
+        return self._process.poll() is None
+
+    def write(self, frame: np.ndarray) -> None:
+        if (frame.shape[1], frame.shape[0]) != self._size:
+            frame = cv2.resize(frame, self._size)
+        try:
+            self._process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+        except BrokenPipeError as exc:
+            raise RuntimeError(f"ffmpeg stopped while writing {self.path.name}: {self._stderr()}") from exc
+
+    def _stderr(self) -> str:
+        if self._log.closed:
+            return ""
+        size = self._log.seek(0, os.SEEK_END)
+        self._log.seek(max(0, size - FFMPEG_ERROR_BYTES))
+        return self._log.read().decode(errors="replace").strip()
+
+    def release(self) -> None:
+        if self._process.stdin and not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = self._process.wait()
+        error = self._stderr()
+        self._log.close()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {self.path.name}: {error}")
+
+
+def open_video_writer(
+    path: str | Path,
+    fps: float,
+    size: Tuple[int, int],
+    encoder: VideoEncoder | None = None,
+):
+    """Open a writer for ``size`` (width, height) frames, creating parent folders."""
+
+    return (encoder or DEFAULT_ENCODER).open(path, fps, size)
+
+
+def hls_playlist_path(output_path: str | Path) -> Path:
+    """Playlist written next to ``output_path`` when HLS output is requested."""
+
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.m3u8")
+
+
+class FullVideoSink:
+    """Write every frame into one annotated copy of the input.
+
+    With ``hls`` the same encode is also segmented into an HLS playlist while
+    processing runs, so playback can start before the mp4 is finished;
+    ``on_hls(playlist_name)`` is called once the first segment is on disk.
+    """
+
+    def __init__(
+        self,
+        output_path: str | Path,
+        fps: float,
+        size: Tuple[int, int],
+        encoder: VideoEncoder | None = None,
+        hls: bool = False,
+        on_hls: Callable[[str], Any] | None = None,
+    ) -> None:
+        self.output_path = Path(output_path)
+        encoder = encoder or DEFAULT_ENCODER
+        self._hls_requested = hls
+        self._playlist: Path | None = None
+        self._on_hls = on_hls
+        self._hls_check_every = max(1, int(round((float(fps) or 24.0) * HLS_SEGMENT_SECONDS / 4)))
+        self._writer = None
+        if hls:
+            playlist = hls_playlist_path(self.output_path)
+            self._writer = encoder.open_with_hls(self.output_path, playlist, fps, size)
+            if self._writer is not None:
+                self._playlist = playlist
+        if self._writer is None:
+            self._writer = open_video_writer(self.output_path, fps, size, encoder)
+
+    def _announce_hls(self) -> None:
+        # ffmpeg (temp_file flag) only renames the playlist into place once a segment is complete
+        if self._on_hls is not None and self._playlist is not None and self._playlist.exists():
+            self._on_hls(self._playlist.name)
+            self._on_hls = None
+
+    def write(self, frame: np.ndarray, frame_index: int, flagged: bool = False, labels: Iterable[str] = ()) -> None:
+        with stage("video_write"):
+            self._writer.write(frame)
+            if self._on_hls is not None and frame_index % self._hls_check_every == 0:
+                self._announce_hls()
+
+    def release(self) -> Dict[str, Any]:
+        self._writer.release()
+        if not self._hls_requested:
+            return {}
+        self._announce_hls()
+        return {"hls_playlist": self._playlist.name if self._playlist is not None else None}
+
+
+class ClipRecorder:
+    """Write short clips around flagged frames plus a JSON index of them.
+
+    The last ``pre_roll`` seconds are kept in memory (bounded by
+    ``PRE_ROLL_MEMORY_BYTES``) so each clip starts before the first flagged frame;
+    a clip is closed once ``post_roll`` seconds pass without another flagged frame.
+    Clips are named ``<stem>_clip_NNN.mp4`` next to ``output_path`` and indexed in
+    ``<stem>_clips.json``.
+    """
+
+    def __init__(
+        self,
+        output_path: str | Path,
+        fps: float,
+        size: Tuple[int, int],
+        pre_roll: float = PRE_ROLL_SECONDS,
+        post_roll: float = POST_ROLL_SECONDS,
+        encoder: VideoEncoder | None = None,
+    ) -> None:
+        self.output_path = Path(output_path)
+        self.encoder = encoder
+        self.fps = float(fps) or 24.0
+        self.size = size
+        frame_bytes = max(1, size[0] * size[1] * 3)
+        pre_frames = min(int(round(pre_roll * self.fps)), PRE_ROLL_MEMORY_BYTES // frame_bytes)
+        self.post_frames = max(0, int(round(post_roll * self.fps)))
+        self.index_path = self.output_path.with_name(f"{self.output_path.stem}_clips.json")
+
+        self._pre_frames = max(0, pre_frames)
+        self._buffer: Deque[Tuple[int, np.ndarray]] = deque(maxlen=self._pre_frames)
+        self._writer = None
+        self._current: Dict[str, Any] | None = None
+        self._remaining = 0
+        self.clips: List[Dict[str, Any]] = []
+
+    def _open_clip(self, first_index: int) -> None:
+        clip_path = self.output_path.with_name(f"{self.output_path.stem}_clip_{len(self.clips) + 1:03d}.mp4")
+        self._writer = open_video_writer(clip_path, self.fps, self.size, self.encoder)
+        self._current = {
+            "filename": clip_path.name,
+            "start_frame": first_index,
+            "end_frame": first_index,
+            "flagged_frames": 0,
+            "labels": set(),
+        }
+
+    def _close_clip(self) -> None:
+        if self._writer is None or self._current is None:
+            return
+        self._writer.release()
+        clip = self._current
+        clip["start_sec"] = round(clip["start_frame"] / self.fps, 2)
+        clip["end_sec"] = round((clip["end_frame"] + 1) / self.fps, 2)
+        clip["labels"] = sorted(clip["labels"])
+        self.clips.append(clip)
+        self._writer = None
+        self._current = None
+
+    def write(self, frame: np.ndarray, frame_index: int, flagged: bool = False, labels: Iterable[str] = ()) -> None:
+        with stage("video_write"):
+            self._write(frame, frame_index, flagged, labels)
+
+    def _write(self, frame: np.ndarray, frame_index: int, flagged: bool, labels: Iterable[str]) -> None:
+        if flagged:
+            if self._writer is None:
+                first_index = self._buffer[0][0] if self._buffer else frame_index
+                self._open_clip(first_index)
+                for _, buffered in self._buffer:
+                    self._writer.write(buffered)
+                self._buffer.clear()
+            self._current["flagged_frames"] += 1
+            self._current["labels"].update(labels)
+            self._remaining = self.post_frames
+
+        if self._writer is not None:
+            if flagged or self._remaining > 0:
+                self._writer.write(frame)
+                self._current["end_frame"] = frame_index
+                if not flagged:
+                    self._remaining -= 1
+                return
+            self._close_clip()
+
+        if self._pre_frames:
+            self._buffer.append((frame_index, frame))
+
+    def release(self) -> Dict[str, Any]:
+        self._close_clip()
+        self._buffer.clear()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.index_path.write_bytes(dumps({"fps": self.fps, "clips": self.clips}))
+        return {"clips": self.clips, "clip_index": self.index_path.name}
+
+
+def release_sink(sink, failed: bool = False) -> Dict[str, Any]:
+    """Release ``sink`` (``None`` is allowed) and return its summary entries.
+
+    Analyzers call this from ``finally`` with ``failed=True`` when the analysis raised:
+    a release error (e.g. ffmpeg rejecting a half-written stream) is then logged
+    instead of replacing the original exception.
+    """
+
+    if sink is None:
+        return {}
+    if not failed:
+        return sink.release()
+    try:
+        return sink.release()
+    except Exception as exc:
+        print(f"[WARN] Failed to release video output after an earlier error: {exc}")
+        return {}
+
+
+def create_video_sink(
+    output_path: str | Path,
+    fps: float,
+    size: Tuple[int, int],
+    output_mode: str = "full",
+    pre_roll: float = PRE_ROLL_SECONDS,
+    post_roll: float = POST_ROLL_SECONDS,
+    encoder: VideoEncoder | None = None,
+    hls: bool = False,
+    on_hls: Callable[[str], Any] | None = None,
+):
+    """Return the sink for ``output_mode``: the whole annotated video or event clips only.
+
+    ``hls`` applies to full output only; clips are short enough to download whole.
+    ``on_hls(playlist_name)`` is called when the playlist becomes playable.
+    """
+
+    if output_mode == "full":
+        return FullVideoSink(output_path, fps, size, encoder=encoder, hls=hls, on_hls=on_hls)
+    if output_mode == "clips":
+        return ClipRecorder(output_path, fps, size, pre_roll=pre_roll, post_roll=post_roll, encoder=encoder)
+    raise ValueError(f"Unknown output mode {output_mode!r}; expected one of {', '.join(OUTPUT_MODES)}")
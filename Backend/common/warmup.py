@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class Component:
+    """A module imported on first use; ``warm(module)`` then loads its models.
+
+    Loading happens once under a lock, so a request that arrives during background
+    warm-up waits for it instead of loading the same weights a second time.
+    """
+
+    def __init__(self, name: str, module: str, warm: Callable[[ModuleType], Any] | None = None) -> None:
+        self.name = name
+        self.module_name = module
+        self.warm = warm
+        self.state = PENDING
+        self.error: str | None = None
+        self.seconds: float | None = None
+        self._module: ModuleType | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def module(self) -> ModuleType | None:
+        """The loaded module, or ``None`` while it still has to be loaded."""
+
+        return self._module
+
+    def load(self) -> ModuleType:
+        if self._module is not None:
+            return self._module
+        with self._lock:
+            if self._module is None:
+                self.state, self.error = LOADING, None
+                started = time.perf_counter()
+                try:
+                    module = importlib.import_module(self.module_name)
+                    if self.warm is not None:
+                        self.warm(module)
+                except BaseException as exc:
+                    self.state, self.error = FAILED, f"{type(exc).__name__}: {exc}"
+                    raise
+                finally:
+                    self.seconds = round(time.perf_counter() - started, 3)
+                self._module, self.state = module, READY
+        return self._module
+
+    def status(self) -> Dict[str, Any]:
+        return {"state": self.state, "seconds": self.seconds, "error": self.error}
+
+
+class Components:
+    """Named ``Component``s with a background warm-up thread and a readiness view."""
+
+    def __init__(self, components: Iterable[Component]) -> None:
+        self._components = {component.name: component for component in components}
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self.required: List[str] = list(self._components)
+
+    def __getitem__(self, name: str) -> Component:
+        return self._components[name]
+
+    def load(self, name: str) -> ModuleType:
+        return self._components[name].load()
+
+    def start(self, names: Iterable[str] | None = None, required: Iterable[str] | None = None) -> None:
+        """Load ``names`` (default all) in a daemon thread.
+
+        Readiness waits for those of them listed in ``required`` (default: all of them).
+        Those are warmed first, so slow optional components cannot hold readiness back.
+        """
+
+        if self._thread is not None:
+            return
+        names = self._known(names)
+        required = set(self._known(required))
+        self.required = [name for name in names if name in required]
+        warm = self.required + [name for name in names if name not in required]
+        self._thread = threading.Thread(target=self._warm, args=(warm,), name="warmup", daemon=True)
+        self._thread.start()
+
+    def _known(self, names: Iterable[str] | None) -> List[str]:
+        return [name for name in (names if names is not None else self._components) if name in self._components]
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Skip the components not loaded yet and wait up to ``timeout`` for the current one."""
+
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _warm(self, names: List[str]) -> None:
+        for name in names:
+            if self._stopping.is_set():
+                return
+            try:
+                self._components[name].load()
+            except Exception as exc:
+                print(f"[WARN] Warm-up of {name} failed: {exc}")
+
+    @property
+    def ready(self) -> bool:
+        return all(self._components[name].state == READY for name in self.required)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: component.status() for name, component in self._components.items()}
@@ -1,27 +1,69 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from starlette.concurrency import run_in_threadpool
+import asyncio
 import io
-import json
-from datetime import datetime
+import mimetypes
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 import uvicorn
 import numpy as np
 import cv2
 
 # Import our custom modules
-from Backend.AIThreatIntelligence.email_classify import email_extract
-from Backend.AIThreatIntelligence.IDS import predict_from_csv
-from Backend.Survilleance.app import Anomly_detection as anomaly_detection
-from Backend.Survilleance.app import Face_Recognition as face_recognition
-from Backend.Survilleance.app import Weapon_detection as weapon_detection
+from Backend.common.artifacts import ARTIFACTS
+from Backend.common.blob_store import BlobStore, StoredUpload
+from Backend.common.cancellation import CancellationToken, stop_summary
+from Backend.common.detection_log import QUERY_LIMIT, query_log
+from Backend.common.event_index import EVENT_QUERY_LIMIT, EventIndex
+from Backend.common.images import decode_image, side_by_side
+from Backend.common.jobs import JobRegistry
+from Backend.common.metrics import (
+    METRICS,
+    PROMETHEUS_CONTENT_TYPE,
+    STAGE_SECONDS,
+    UPLOAD_BYTES,
+    MetricsMiddleware,
+    current_endpoint,
+    record_throughput,
+    stage,
+)
+from Backend.common.retention import RetentionManager, parse_duration, policies_from_env
+from Backend.common import profiling
+from Backend.common.progress import ProgressCallback
+from Backend.common.scheduler import PRIORITY_IMAGE, PRIORITY_VIDEO, Overloaded, Scheduler, limits_from_env
+from Backend.common.serialization import dumps, packb, wants_msgpack
+from Backend.common.video_output import find_ffmpeg
+from Backend.common.warmup import FAILED, Component, Components
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Start retention sweeps and model warm-up; on shutdown stop both and write out
+    everything still queued (artifacts, event index rows)."""
+
+    if os.getenv("RETENTION_ENABLED", "1") != "0":
+        RETENTION.start()
+    COMPONENTS.start(_component_names(WARMUP_MODULES), required=_component_names(READY_MODULES))
+    try:
+        yield
+    finally:
+        RETENTION.stop()
+        await run_in_threadpool(COMPONENTS.stop)
+        await run_in_threadpool(ARTIFACTS.flush)
+        await run_in_threadpool(EVENT_INDEX.flush)
+
 
 app = FastAPI(
     title="AI Defence Platform API",
     description="Endpoints for Threat Intelligence, Border Anomaly, and AI Surveillance modules",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -35,11 +77,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 BASE_DIR = Path(__file__).resolve().parent
 BORDER_ANOMALY_DIR = BASE_DIR / "Backend" / "BorderAnomly"
 DRONE_UPLOAD_DIR = BORDER_ANOMALY_DIR / "drones" / "uploads"
 DRONE_OUTPUT_DIR = BORDER_ANOMALY_DIR / "drones" / "outputs"
+DRONE_LOG_DIR = BORDER_ANOMALY_DIR / "drones" / "logs"
 HUMAN_UPLOAD_DIR = BORDER_ANOMALY_DIR / "HUMAN_DETECTION" / "uploads"
 HUMAN_LOG_DIR = BORDER_ANOMALY_DIR / "HUMAN_DETECTION" / "logs"
 SUSPICIOUS_UPLOAD_DIR = BORDER_ANOMALY_DIR / "Suspicious_Activity_Detection_master" / "uploads"
@@ -64,6 +108,7 @@ SURV_KNOWN_FACES_DIR = SURVEILLANCE_DIR / "known_faces"
 for directory in (
     DRONE_UPLOAD_DIR,
     DRONE_OUTPUT_DIR,
+    DRONE_LOG_DIR,
     HUMAN_UPLOAD_DIR,
     HUMAN_LOG_DIR,
     SUSPICIOUS_UPLOAD_DIR,
@@ -85,36 +130,73 @@ for directory in (
 ):
     directory.mkdir(parents=True, exist_ok=True)
 
-def _get_drone_detector():
-    try:
-        from Backend.BorderAnomly.drones.detector import detect_drones as detect_drones_from_path
+# Uploads are content-addressed per category; public upload names map to blobs
+UPLOAD_STORES = {
+    directory: BlobStore(directory, is_pending=ARTIFACTS.is_pending)
+    for directory in (
+        DRONE_UPLOAD_DIR,
+        HUMAN_UPLOAD_DIR,
+        SUSPICIOUS_UPLOAD_DIR,
+        SURV_ANOMALY_UPLOAD_DIR,
+        SURV_WEAPON_UPLOAD_DIR,
+        SURV_FACE_UPLOAD_DIR,
+    )
+}
 
-        return detect_drones_from_path
-    except Exception as exc:  # pragma: no cover - runtime dependency issues
-        raise HTTPException(status_code=500, detail=f"Drone detector unavailable: {exc}") from exc
+def _warm_email(module) -> None:
+    from Backend.AIThreatIntelligence.classifier import ensure_nltk_data
 
+    ensure_nltk_data()
+
+
+# Analysis modules import torch / ultralytics / pandas and load weights at import time, so the
+# API imports them on first use or in the background warm-up; /health/ready reports progress
+COMPONENTS = Components([
+    Component("ids", "Backend.AIThreatIntelligence.IDS"),
+    Component("email", "Backend.AIThreatIntelligence.email_classify", warm=_warm_email),
+    Component("drone", "Backend.BorderAnomly.drones.detector"),
+    Component("human", "Backend.BorderAnomly.HUMAN_DETECTION.detector"),
+    Component("suspicious", "Backend.BorderAnomly.Suspicious_Activity_Detection_master.detection", warm=lambda module: module.get_model()),
+    Component("anomaly", "Backend.Survilleance.app.Anomly_detection", warm=lambda module: module.ObjectDetection.get_model()),
+    Component("weapon", "Backend.Survilleance.app.Weapon_detection", warm=lambda module: module.get_model()),
+    Component("face", "Backend.Survilleance.app.Face_Recognition", warm=lambda module: module.get_face_system()),
+])
+# Components loaded in the background at startup, e.g. "drone,weapon"; "all" (default) or "" for none
+WARMUP_MODULES = os.getenv("WARMUP_MODULES", "all")
+# Warmed components /health/ready waits for. The threat-intelligence ones are left out by
+# default: the email classifier needs NLTK downloads and a mail server and may never load.
+READY_MODULES = os.getenv("READY_MODULES", "drone,human,suspicious,anomaly,weapon,face")
 
-def _get_human_detector():
-    try:
-        from Backend.BorderAnomly.HUMAN_DETECTION.detector import detect_humans as detect_humans_from_path
 
-        return detect_humans_from_path
-    except Exception as exc:  # pragma: no cover
-        raise HTTPException(status_code=500, detail=f"Human detector unavailable: {exc}") from exc
+def _component_names(value: str) -> list[str] | None:
+    """``"all"`` -> ``None`` (every component), otherwise the comma-separated names."""
 
+    return None if value.strip() == "all" else [name.strip() for name in value.split(",") if name.strip()]
 
-def _get_suspicious_detector():
+
+async def _load(name: str, label: str):
+    """Module behind component ``name``; a first load (import + weights) runs off the event loop."""
+
+    component = COMPONENTS[name]
     try:
-        from Backend.BorderAnomly.Suspicious_Activity_Detection_master.detection import (
-            detect_shoplifting,
-        )
+        return component.module or await run_in_threadpool(component.load)
+    except Exception as exc:  # pragma: no cover - runtime dependency issues
+        raise HTTPException(status_code=500, detail=f"{label} unavailable: {exc}") from exc
+
+
+async def _get_drone_detector():
+    return (await _load("drone", "Drone detector")).detect_drones
+
+
+async def _get_human_detector():
+    return (await _load("human", "Human detector")).detect_humans
+
 
-        return detect_shoplifting
-    except Exception as exc:  # pragma: no cover
-        raise HTTPException(status_code=500, detail=f"Suspicious activity detector unavailable: {exc}") from exc
+async def _get_suspicious_detector():
+    return (await _load("suspicious", "Suspicious activity detector")).detect_shoplifting
 
 
-def _store_upload(data: bytes, directory: Path, original_name: str | None, fallback_suffix: str) -> Path:
+def _upload_path(data: bytes, directory: Path, original_name: str | None, fallback_suffix: str) -> Path:
     if not data:
         raise HTTPException(status_code=400, detail="Uploaded file is empty")
 
@@ -123,26 +205,60 @@ def _store_upload(data: bytes, directory: Path, original_name: str | None, fallb
     suffix = Path(raw_name).suffix or fallback_suffix
     timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
     safe_name = f"{stem}_{timestamp}{suffix}"
-    path = directory / safe_name
-    path.write_bytes(data)
-    return path
+    return directory / safe_name
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    with stage("upload_read"):
+        data = await file.read()
+    UPLOAD_BYTES.inc(len(data), endpoint=current_endpoint())
+    return data
+
+
+def _store_upload(
+    data: bytes, directory: Path, original_name: str | None, fallback_suffix: str, name: str | None = None
+) -> StoredUpload:
+    """Store an upload in its category's content-addressed store (identical bytes are kept once).
+
+    ``name`` is the public name when the caller picked one up front (see ``_upload_path``).
+    """
+
+    name = name or _upload_path(data, directory, original_name, fallback_suffix).name
+    with stage("store_upload"):
+        return UPLOAD_STORES[directory].put(data, name)
+
+
+def _stage_upload(data: bytes, directory: Path, original_name: str | None, fallback_suffix: str) -> StoredUpload:
+    """Like ``_store_upload`` but a new blob is written in the background (images decoded from memory)."""
+
+    name = _upload_path(data, directory, original_name, fallback_suffix).name
+    with stage("store_upload"):
+        return UPLOAD_STORES[directory].put(data, name, writer=ARTIFACTS.write_bytes)
+
+
+def _decode_upload(data: bytes) -> np.ndarray:
+    if not data:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    try:
+        return decode_image(data)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _persist_annotated(summary: dict[str, Any], output_path: Path) -> bool:
+    """Queue the ``annotated_frame`` an analyzer returned; drop it from the JSON summary."""
+
+    frame = summary.pop("annotated_frame", None) if isinstance(summary, dict) else None
+    if frame is None:
+        return False
+    ARTIFACTS.write_image(output_path, frame)
+    return True
 
 
 def _write_json(path: Path, payload: Any) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Custom JSON serializer to handle numpy types and other objects
-    def json_serializer(obj):
-        if hasattr(obj, 'dtype'):  # numpy types
-            return float(obj) if obj.dtype.kind in 'fc' else int(obj)
-        elif isinstance(obj, (np.bool_, bool)):
-            return bool(obj)
-        elif hasattr(obj, 'tolist'):  # numpy arrays
-            return obj.tolist()
-        else:
-            return str(obj)
-    
-    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False, default=json_serializer))
+    """Queue ``payload`` as a JSON report; the files route waits for pending writes."""
+
+    ARTIFACTS.write_json(path, payload)
 
 
 def _is_video(name: str, content_type: str | None = None) -> bool:
@@ -163,28 +279,334 @@ def _is_image(name: str, content_type: str | None = None) -> bool:
     )
 
 
-def _create_side_by_side_image(original_path: Path, annotated_path: Path, output_path: Path) -> Path | None:
-    """Persist a side-by-side composite of original and annotated frames."""
+def _queue_side_by_side_image(original: np.ndarray, annotated: np.ndarray, output_path: Path) -> Path | None:
+    """Build a side-by-side composite from in-memory frames and persist it in the background."""
 
     try:
-        original = cv2.imread(str(original_path))
-        annotated = cv2.imread(str(annotated_path)) if annotated_path.exists() else None
-        if original is None or annotated is None:
-            return None
-
-        if annotated.shape[:2] != original.shape[:2]:
-            annotated = cv2.resize(annotated, (original.shape[1], original.shape[0]), interpolation=cv2.INTER_LINEAR)
-
-        composite = cv2.hconcat([original, annotated])
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        cv2.imwrite(str(output_path), composite, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
-        return output_path
+        composite = side_by_side(original, annotated)
     except Exception:
         return None
+    ARTIFACTS.write_image(output_path, composite, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
+    return output_path
+
+def _attach_clip_urls(summary: Any, category: str) -> str | None:
+    """Add download URLs to event clips in ``summary``; return the clip index URL if any."""
+
+    if not isinstance(summary, dict) or not summary.get("clips") and not summary.get("clip_index"):
+        return None
+
+    for clip in summary.get("clips", []):
+        if isinstance(clip, dict) and clip.get("filename"):
+            clip["url"] = f"/border/files/{category}/{clip['filename']}"
+    index_name = summary.get("clip_index")
+    return f"/border/files/{category}/{index_name}" if index_name else None
+
+
+def _hls_url(summary: Any, category: str) -> str | None:
+    playlist = summary.get("hls_playlist") if isinstance(summary, dict) else None
+    return f"/border/files/{category}/{playlist}" if playlist else None
+
+
+def _live_hls_url(enabled: bool, upload_name: str, suffix: str, category: str) -> str | None:
+    """URL of the playlist a full-output run will write (``<upload stem><suffix>.m3u8``), known
+    before the run starts; ``None`` when it will not be written."""
+
+    if not enabled or find_ffmpeg() is None:
+        return None
+    return f"/border/files/{category}/{Path(upload_name).stem}{suffix}.m3u8"
+
+
+def _with_hls_url(progress: ProgressCallback | None, category: str) -> ProgressCallback | None:
+    """Add the download ``url`` to the ``hls`` event sent once the playlist is playable."""
+
+    if progress is None:
+        return None
+
+    def publish(event: dict[str, Any]) -> None:
+        if event.get("type") == "hls":
+            event = {**event, "url": f"/border/files/{category}/{event['playlist']}"}
+        progress(event)
+
+    return publish
+
+
+def _detection_log_url(summary: Any, category: str) -> str | None:
+    log_name = summary.get("detection_log") if isinstance(summary, dict) else None
+    return f"/border/files/{category}/{log_name}" if log_name else None
+
+
+EVENT_INDEX = EventIndex(os.getenv("EVENT_INDEX_PATH", str(BASE_DIR / "Backend" / "events.sqlite3")))
+
+
+def _index_analysis(
+    module: str,
+    summary: Any,
+    log_dir: Path,
+    started_at: float,
+    source: str | None,
+    upload: str,
+    artifact: str | None = None,
+    events: Any = (),
+    kind: str = "alert",
+    flagged_only: bool = True,
+) -> None:
+    """Queue an analysis for ``EVENT_INDEX``: explicit ``events`` plus its detection log rows
+    (read by the index's own thread)."""
+
+    if isinstance(summary, dict):
+        record_throughput(current_endpoint(), int(summary.get("frames_processed") or 0), time.time() - started_at)
+    try:
+        EVENT_INDEX.add(module, events, kind=kind, source=source, upload=upload, artifact=artifact, ts=started_at)
+        log_name = summary.get("detection_log") if isinstance(summary, dict) else None
+        if log_name:
+            EVENT_INDEX.add_log(
+                module,
+                log_dir / log_name,
+                kind=kind,
+                flagged_only=flagged_only,
+                source=source,
+                upload=upload,
+                artifact=artifact,
+                ts=started_at,
+            )
+    except Exception as exc:  # pragma: no cover - indexing must never fail an analysis
+        print(f"[WARN] Failed to index {module} events: {exc}")
+
+
+JOBS = JobRegistry()
+_JOB_TASKS: set[asyncio.Task] = set()
+
+
+async def _run_job(job, work) -> None:
+    job.start()
+    try:
+        job.finish(await work(job.publish))
+    except HTTPException as exc:
+        job.fail(str(exc.detail), exc.status_code)
+    except Exception as exc:  # pragma: no cover - defensive
+        job.fail(f"Job failed: {exc}")
+
+
+def _start_job(
+    kind: str, work, token: CancellationToken | None = None, accepted: dict[str, Any] | None = None
+) -> JSONResponse:
+    """Run ``work(progress)`` in the background and return where to follow it.
+
+    ``accepted`` adds fields known before the work starts (e.g. ``hls_url``) to the response.
+    """
+
+    job = JOBS.create(kind, token)
+    task = asyncio.create_task(_run_job(job, work))
+    _JOB_TASKS.add(task)
+    task.add_done_callback(_JOB_TASKS.discard)
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "accepted",
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}",
+            "events_url": f"/jobs/{job.id}/events",
+            "cancel_url": f"/jobs/{job.id}/cancel",
+            **(accepted or {}),
+        },
+    )
+
+
+# Concurrent analyses per model; override with MODEL_CONCURRENCY="drone=4,anomaly=1".
+# Models whose every inference goes through a MicroBatcher (drone, anomaly, weapon) allow a full
+# micro-batch in flight; the others run one analysis at a time. Videos are capped by VIDEO_CONCURRENCY.
+MODEL_CONCURRENCY = limits_from_env(
+    {"drone": 8, "human": 1, "suspicious": 1, "anomaly": 8, "weapon": 8, "face": 1},
+    os.getenv("MODEL_CONCURRENCY"),
+)
+SCHEDULER = Scheduler(
+    MODEL_CONCURRENCY,
+    max_waiting=int(os.getenv("MODEL_MAX_WAITING", "16")),
+    video_limit=int(os.getenv("VIDEO_CONCURRENCY", "2")),
+    video_max_waiting=int(os.getenv("VIDEO_MAX_WAITING", "8")),
+)
+
+
+METRICS.gauge(
+    "scheduler_active", "Analyses running per scheduler pool", ("pool",),
+    collect=lambda: {(name,): stats["active"] for name, stats in SCHEDULER.stats().items()},
+)
+METRICS.gauge(
+    "scheduler_waiting", "Analyses queued per scheduler pool", ("pool",),
+    collect=lambda: {(name,): stats["waiting"] for name, stats in SCHEDULER.stats().items()},
+)
+METRICS.gauge(
+    "queue_depth", "Items waiting in background writer queues", ("queue",),
+    collect=lambda: {("artifacts",): ARTIFACTS.queued, ("event_index",): EVENT_INDEX.queued},
+)
+
+
+def _overloaded(exc: Overloaded) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Server busy: {exc}",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@asynccontextmanager
+async def _admitted(model: str, priority: int):
+    """Hold a scheduler slot for ``model`` (the wait is the ``queue_wait`` stage); a full
+    wait queue becomes ``429`` with ``Retry-After``."""
+
+    started = time.perf_counter()
+    try:
+        async with SCHEDULER.slot(model, priority):
+            STAGE_SECONDS.observe(time.perf_counter() - started, endpoint=current_endpoint(), stage="queue_wait")
+            yield
+    except Overloaded as exc:
+        raise _overloaded(exc) from exc
+
+
+async def _run_admitted(model: str, priority: int, run, progress: ProgressCallback | None = None) -> Any:
+    async with _admitted(model, priority):
+        return await run(progress)
+
+
+# Where each model's profiles go: its ``logs`` directory, as a file category
+PROFILE_CATEGORIES = {
+    "drone": "drones-logs",
+    "human": "human-logs",
+    "suspicious": "suspicious-logs",
+    "anomaly": "surveillance-anomaly-logs",
+    "weapon": "surveillance-weapon-logs",
+    "face": "surveillance-face-logs",
+}
+
+
+async def _analyze(fn, *args, **kwargs) -> Any:
+    """``run_in_threadpool`` for the analysis call (the ``analyze`` stage), profiled when
+    the request is being profiled."""
+
+    with stage("analyze"):
+        return await run_in_threadpool(profiling.call, fn, *args, **kwargs)
+
+
+@asynccontextmanager
+async def _profiling(request: Request, model: str):
+    """Profile ``_analyze`` calls made inside the block when the request asks for it
+    (``X-Profile: 1`` / ``?profile=1``) or is sampled; yields the session or ``None``."""
+
+    if not profiling.wanted(request.headers, request.query_params):
+        yield None
+        return
+    session = profiling.ProfileSession(model)
+    context = profiling.activate(session)
+    try:
+        yield session
+    finally:
+        profiling.deactivate(context)
+        try:
+            await run_in_threadpool(session.save, FILE_CATEGORY_MAP[PROFILE_CATEGORIES[model]])
+        except Exception as exc:  # pragma: no cover - profiling must never fail an analysis
+            print(f"[WARN] Failed to save {model} profile: {exc}")
+
+
+def _with_profile(payload: Any, session: profiling.ProfileSession | None, model: str) -> Any:
+    if session is not None and session.path is not None and isinstance(payload, dict):
+        payload["profile_url"] = f"/border/files/{PROFILE_CATEGORIES[model]}/{session.path.name}"
+    return payload
+
+
+def _profiled(request: Request, model: str, run):
+    async def profiled_run(progress: ProgressCallback | None = None) -> Any:
+        async with _profiling(request, model) as session:
+            result = await run(progress)
+        return _with_profile(result, session, model)
+
+    return profiled_run
+
+
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+async def _watch_disconnect(request: Request, token: CancellationToken) -> None:
+    while not token.cancelled:
+        if await request.is_disconnected():
+            token.cancel("client_disconnected")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+async def _run_until_disconnect(request: Request, token: CancellationToken, work) -> Any:
+    """Await ``work`` while cancelling ``token`` if the client goes away."""
+
+    watcher = asyncio.create_task(_watch_disconnect(request, token))
+    try:
+        return await work
+    finally:
+        watcher.cancel()
+
+
+# Streaming and work bounds shared by every video analysis endpoint (described in the OpenAPI schema)
+STREAM_PARAM = Query(
+    False,
+    description=(
+        "Return a job id at once (202) and push progress, detections and alerts on "
+        "/jobs/{job_id}/events. With hls=true the 202 already carries hls_url and an "
+        "hls event says when the playlist plays."
+    ),
+)
+DEADLINE_PARAM = Query(
+    None,
+    description=(
+        "Stop video analysis after this many seconds. Like a client disconnect, this "
+        "returns a partial summary flagged with stopped_early."
+    ),
+)
+MAX_FRAMES_PARAM = Query(None, description="Stop video analysis after this many frames (partial summary, stopped_early).")
+
+
+async def _dispatch(
+    request: Request,
+    token: CancellationToken,
+    run,
+    model: str,
+    priority: int,
+    stream: bool = False,
+    kind: str = "",
+    accepted: dict[str, Any] | None = None,
+):
+    """Run ``run(progress)`` under admission control, inline or as a streamed job.
+
+    ``accepted`` is merged into a streamed job's ``202`` response.
+    """
+
+    run = _profiled(request, model, run)
+    if stream:
+        try:
+            SCHEDULER.check(model, priority)
+        except Overloaded as exc:
+            raise _overloaded(exc) from exc
+        return _start_job(kind, lambda progress: _run_admitted(model, priority, run, progress), token, accepted)
+    return _respond(request, await _run_until_disconnect(request, token, _run_admitted(model, priority, run)))
+
+
+def _respond(request: Request, payload: Any) -> Response:
+    """Encode ``payload`` directly (no recursive ``jsonable_encoder`` walk); MessagePack on request."""
+
+    if isinstance(payload, Response):
+        return payload
+    with stage("serialize"):
+        if wants_msgpack(request.headers.get("accept")):
+            return Response(content=packb(payload), media_type="application/msgpack")
+        return Response(content=dumps(payload), media_type="application/json")
+
+
+def _sse(event: dict[str, Any]) -> str:
+    data = dumps(event).decode()
+    return f"id: {event.get('seq', '')}\nevent: {event.get('type', 'message')}\ndata: {data}\n\n"
+
 
 FILE_CATEGORY_MAP = {
     "drones-inputs": DRONE_UPLOAD_DIR,
     "drones-reports": DRONE_OUTPUT_DIR,
+    "drones-logs": DRONE_LOG_DIR,
     "human-videos": HUMAN_UPLOAD_DIR,
     "human-logs": HUMAN_LOG_DIR,
     "suspicious-inputs": SUSPICIOUS_UPLOAD_DIR,
@@ -201,6 +623,71 @@ FILE_CATEGORY_MAP = {
     "surveillance-face-logs": SURV_FACE_LOG_DIR,
 }
 
+# Default TTLs by kind of category; RETENTION_TTL / RETENTION_QUOTA override per category,
+# e.g. RETENTION_TTL="human-videos=3d" RETENTION_QUOTA="surveillance-anomaly-outputs=20G".
+RETENTION_DEFAULT_TTLS = {
+    category: parse_duration("7d") if category.endswith(("-inputs", "human-videos"))
+    else parse_duration("90d") if category.endswith("-logs")
+    else parse_duration("30d")
+    for category in FILE_CATEGORY_MAP
+}
+# Derived files that can be rebuilt (comparison images, only while their upload
+# outlives them, see _comparison_rebuildable) or duplicate a kept MP4 (HLS)
+HLS_COPIES = ("*.m3u8", "*_[0-9][0-9][0-9][0-9][0-9].ts")
+RETENTION_COMPACT = {
+    "drones-reports": ("*_comparison.jpg",),
+    "suspicious-videos": HLS_COPIES,
+    "surveillance-anomaly-outputs": HLS_COPIES,
+    "surveillance-weapon-outputs": HLS_COPIES,
+    "surveillance-face-outputs": HLS_COPIES,
+}
+DRONE_IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def _comparison_source(comparison_path: Path) -> Path | None:
+    """The stored drone upload a comparison image was built from, if it is still kept."""
+
+    stem = comparison_path.name[: -len("_comparison.jpg")]
+    for path in DRONE_UPLOAD_DIR.glob(f"{stem}.*"):
+        if path.is_file():
+            return path
+    return UPLOAD_STORES[DRONE_UPLOAD_DIR].find(stem, DRONE_IMAGE_SUFFIXES)
+
+
+def _comparison_rebuildable(comparison_path: Path) -> bool:
+    """Whether a comparison can be rebuilt for as long as its report is kept.
+
+    Its upload expires with the ``drones-inputs`` TTL; compacting a comparison whose
+    upload goes first would leave ``comparison_url`` dead for the rest of the report's life.
+    """
+
+    source = _comparison_source(comparison_path)
+    if source is None:
+        return False
+    ttls = {policy.category: policy.ttl for policy in RETENTION.policies}
+    input_ttl, report_ttl = ttls.get("drones-inputs"), ttls.get("drones-reports")
+    if input_ttl is None:
+        return True
+    if report_ttl is None:
+        return False
+    try:
+        return source.stat().st_mtime + input_ttl >= comparison_path.stat().st_mtime + report_ttl
+    except OSError:
+        return False
+
+
+RETENTION = RetentionManager(
+    policies_from_env(
+        FILE_CATEGORY_MAP,
+        RETENTION_DEFAULT_TTLS,
+        RETENTION_COMPACT,
+        compact_if={"drones-reports": _comparison_rebuildable},
+    ),
+    is_busy=ARTIFACTS.is_pending,
+    on_sweep=lambda: [store.prune() for store in UPLOAD_STORES.values()],
+)
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -216,6 +703,9 @@ async def root():
             "POST /surveillance/weapon/detect": "Weapon detection (AI Surveillance)",
             "POST /surveillance/face/recognize": "Face recognition per watchlist (AI Surveillance)",
             "GET /border/files/{category}/{filename}": "Download processed outputs (image/video/log)",
+            "GET /jobs/{job_id}": "Status and result of a streamed analysis",
+            "GET /jobs/{job_id}/events": "Server-sent progress, detections and alerts of a streamed analysis",
+            "POST /jobs/{job_id}/cancel": "Stop a streamed analysis early",
         },
     }
 
@@ -225,8 +715,9 @@ async def classify_emails():
     Extract unseen emails from Gmail and classify them for phishing detection.
     Returns: List of emails with sender info and classification status.
     """
+    email_classify = await _load("email", "Email classifier")
     try:
-        results = email_extract()
+        results = email_classify.email_extract()
         return {
             "status": "success",
             "message": f"Processed {len(results)} emails",
@@ -246,14 +737,15 @@ async def predict_intrusion(file: UploadFile = File(...)):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
     
+    ids = await _load("ids", "Intrusion detection model")
     try:
         # Read the uploaded file
-        contents = await file.read()
+        contents = await _read_upload(file)
         csv_string = contents.decode('utf-8')
         csv_file = io.StringIO(csv_string)
         
         # Get predictions using our IDS module
-        predictions = predict_from_csv(csv_file)
+        predictions = ids.predict_from_csv(csv_file)
         
         # Convert predictions to list for JSON serialization
         predictions_list = predictions.tolist() if hasattr(predictions, 'tolist') else list(predictions)
@@ -270,36 +762,43 @@ async def predict_intrusion(file: UploadFile = File(...)):
 
 
 @app.post("/border/drones/detect")
-async def detect_drones(file: UploadFile = File(...)):
-    """Upload an image and run drone detection."""
+async def detect_drones(request: Request, file: UploadFile = File(...), render: bool = True):
+    """Upload an image and run drone detection.
+
+    ``render=false`` skips the annotated and side-by-side images and returns metadata only.
+    """
 
     if not _is_image(file.filename or "", file.content_type):
         raise HTTPException(status_code=400, detail="Only image files are allowed for drone detection.")
 
     try:
-        data = await file.read()
-        detector = _get_drone_detector()
-        image_path = _store_upload(data, DRONE_UPLOAD_DIR, file.filename, ".jpg")
-        annotated_path = DRONE_OUTPUT_DIR / f"{image_path.stem}_annotated.jpg"
-        comparison_path = DRONE_OUTPUT_DIR / f"{image_path.stem}_comparison.jpg"
-
-        detection_result = await run_in_threadpool(detector, str(image_path), str(annotated_path))
+        data = await _read_upload(file)
+        detector = await _get_drone_detector()
+        frame = _decode_upload(data)
+        upload = _stage_upload(data, DRONE_UPLOAD_DIR, file.filename, ".jpg")
+        annotated_path = DRONE_OUTPUT_DIR / f"{upload.stem}_annotated.jpg"
+        comparison_path = DRONE_OUTPUT_DIR / f"{upload.stem}_comparison.jpg"
+
+        started_at = time.time()
+        # The detector draws on the frame it gets; keep the original for the composite
+        async with _profiling(request, "drone") as profile, _admitted("drone", PRIORITY_IMAGE):
+            detection_result = await _analyze(
+                detector,
+                frame.copy() if render else frame,
+                str(annotated_path) if render else None,
+                write=False,
+            )
+        annotated_frame = None
         if isinstance(detection_result, dict):
             detections = detection_result.get("detections", [])
             summary = detection_result.get("summary")
-            annotated_written = detection_result.get("annotated_path")
+            annotated_frame = detection_result.get("annotated_frame")
         else:
             detections = detection_result
             summary = None
-            annotated_written = None
 
-        if annotated_written:
-            try:
-                annotated_candidate = Path(annotated_written)
-                if annotated_candidate.exists():
-                    annotated_path = annotated_candidate
-            except Exception:  # pragma: no cover - defensive path parsing
-                pass
+        if annotated_frame is not None:
+            ARTIFACTS.write_image(annotated_path, annotated_frame)
 
         summary_payload: dict[str, Any] = summary if isinstance(summary, dict) else {
             "detections_count": len(detections),
@@ -308,39 +807,41 @@ async def detect_drones(file: UploadFile = File(...)):
         }
 
         report_payload = {
-            "filename": image_path.name,
+            "filename": upload.name,
             "generated_at": datetime.utcnow().isoformat(),
             "detections": detections,
             "summary": summary_payload,
         }
 
-        report_path = DRONE_OUTPUT_DIR / f"{image_path.stem}_detections.json"
+        report_path = DRONE_OUTPUT_DIR / f"{upload.stem}_detections.json"
         _write_json(report_path, report_payload)
 
-        side_by_side = _create_side_by_side_image(image_path, annotated_path, comparison_path) if annotated_path.exists() else None
+        comparison_written = (
+            _queue_side_by_side_image(frame, annotated_frame, comparison_path)
+            if render and annotated_frame is not None
+            else None
+        )
 
-        label_set: list[str] = []
-        for item in detections:
-            if not isinstance(item, dict):
-                continue
-            label_value = item.get("label")
-            if not isinstance(label_value, str):
-                continue
-            label_set.append(label_value)
-        label_set = sorted(set(label_set))
+        label_set = sorted({item.label for item in detections})
+        _index_analysis(
+            "drone", None, DRONE_OUTPUT_DIR, started_at, file.filename, upload.name,
+            artifact=f"/border/files/drones-reports/{report_path.name}", events=detections,
+        )
 
-        return {
+        return _respond(request, _with_profile({
             "status": "success",
             "filename": file.filename,
             "summary": summary_payload,
             "detections_count": len(detections),
             "detections": detections,
             "labels": label_set,
-            "image_url": f"/border/files/drones-inputs/{image_path.name}",
-            "output_url": f"/border/files/drones-reports/{annotated_path.name}" if annotated_path.exists() else None,
-            "comparison_url": f"/border/files/drones-reports/{comparison_path.name}" if side_by_side else None,
+            "image_url": f"/border/files/drones-inputs/{upload.name}",
+            "output_url": f"/border/files/drones-reports/{annotated_path.name}" if annotated_frame is not None else None,
+            "comparison_url": f"/border/files/drones-reports/{comparison_path.name}" if comparison_written else None,
             "report_url": f"/border/files/drones-reports/{report_path.name}",
-        }
+        }, profile, "drone"))
+    except HTTPException:
+        raise
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover - defensive
@@ -348,282 +849,562 @@ async def detect_drones(file: UploadFile = File(...)):
 
 
 @app.post("/border/humans/detect")
-async def detect_humans(file: UploadFile = File(...)):
+async def detect_humans(
+    request: Request,
+    file: UploadFile = File(...),
+    stream: bool = STREAM_PARAM,
+    deadline: float | None = DEADLINE_PARAM,
+    max_frames: int | None = MAX_FRAMES_PARAM,
+):
     """Upload a video and run human detection."""
 
     content_type = file.content_type or ""
     if not content_type.startswith("video/"):
         raise HTTPException(status_code=400, detail="Only video files are allowed for human detection.")
 
-    try:
-        data = await file.read()
-        detector = _get_human_detector()
-        video_path = _store_upload(data, HUMAN_UPLOAD_DIR, file.filename, ".mp4")
-        detections = detector(str(video_path), conf_threshold=0.6, play_alarm_flag=False)
-        stats = {
-            "total_detections": len(detections),
-            "unique_frames": len({item.get("frame_number") for item in detections if "frame_number" in item}),
-        }
-        preview = detections[:10]
-        log_path = HUMAN_LOG_DIR / f"{video_path.stem}_detections.json"
-        log_path.write_text(json.dumps(detections, indent=2, ensure_ascii=False))
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "stats": stats,
-            "preview_detections": preview,
-            "video_url": f"/border/files/human-videos/{video_path.name}",
-            "log_url": f"/border/files/human-logs/{log_path.name}",
-        }
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover - defensive
-        raise HTTPException(status_code=500, detail=f"Human detection failed: {str(exc)}") from exc
+    data = await _read_upload(file)
+    token = CancellationToken(deadline=deadline, max_frames=max_frames)
+
+    async def run(progress: ProgressCallback | None = None) -> dict[str, Any]:
+        started_at = time.time()
+        try:
+            detector = await _get_human_detector()
+            upload = await run_in_threadpool(_store_upload, data, HUMAN_UPLOAD_DIR, file.filename, ".mp4")
+            result = await _analyze(
+                detector,
+                str(upload.path),
+                conf_threshold=0.6,
+                play_alarm_flag=False,
+                progress=progress,
+                cancel=token,
+                detection_log=HUMAN_LOG_DIR / f"{upload.stem}_detections",
+            )
+            _index_analysis("human", result, HUMAN_LOG_DIR, started_at, file.filename, upload.name)
+            stats = {
+                "frames_processed": result["frames_processed"],
+                "total_detections": result["total_detections"],
+                "unique_frames": result["unique_frames"],
+                "detection_log_rows": result["detection_log_rows"],
+                **stop_summary(token),
+            }
+            return {
+                "status": "success",
+                "filename": file.filename,
+                "stats": stats,
+                "preview_detections": result["preview_detections"],
+                "video_url": f"/border/files/human-videos/{upload.name}",
+                "log_url": _detection_log_url(result, "human-logs"),
+            }
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except Exception as exc:  # pragma: no cover - defensive
+            raise HTTPException(status_code=500, detail=f"Human detection failed: {str(exc)}") from exc
+
+    return await _dispatch(
+        request, token, run, "human", PRIORITY_VIDEO, stream=stream, kind="border-humans"
+    )
 
 
 @app.post("/border/suspicious/detect")
-async def detect_suspicious_activity(file: UploadFile = File(...)):
-    """Upload a video and run suspicious activity (shoplifting) detection."""
+async def detect_suspicious_activity(
+    request: Request,
+    file: UploadFile = File(...),
+    render: bool = True,
+    output_mode: Literal["full", "clips"] = "full",
+    hls: bool = False,
+    stream: bool = STREAM_PARAM,
+    deadline: float | None = DEADLINE_PARAM,
+    max_frames: int | None = MAX_FRAMES_PARAM,
+):
+    """Upload a video and run suspicious activity (shoplifting) detection.
+
+    ``render=false`` skips writing the annotated video and returns the summary only.
+    ``output_mode=clips`` writes short clips around flagged frames instead of the full video.
+    ``hls=true`` also writes an HLS playlist of the annotated video (``hls_url``).
+    """
 
     content_type = file.content_type or ""
     if not content_type.startswith("video/"):
         raise HTTPException(status_code=400, detail="Only video files are allowed for suspicious activity detection.")
 
-    try:
-        data = await file.read()
-        detector = _get_suspicious_detector()
-        input_video = _store_upload(data, SUSPICIOUS_UPLOAD_DIR, file.filename, ".mp4")
-        detection_result = await run_in_threadpool(detector, str(input_video))
-
-        if isinstance(detection_result, dict):
-            output_path = Path(detection_result.get("output_path", ""))
-            summary = detection_result.get("summary") or {}
-        else:
-            output_path = Path(detection_result)
-            summary = {}
-
-        summary_payload: dict[str, Any] = {
-            "frames_processed": int(summary.get("frames_processed", 0) or 0),
-            "frames_with_events": int(summary.get("frames_with_events", 0) or 0),
-            "detections_total": int(summary.get("detections_total", 0) or 0),
-            "alert_events": int(summary.get("frames_with_events", 0) or 0),
-            "suspicious_percentage": float(summary.get("suspicious_percentage", 0.0) or 0.0),
-            "labels_detected": list(summary.get("labels_detected", [])) if summary.get("labels_detected") else [],
-        }
+    data = await _read_upload(file)
+    token = CancellationToken(deadline=deadline, max_frames=max_frames)
+    upload_name = _upload_path(data, SUSPICIOUS_UPLOAD_DIR, file.filename, ".mp4").name
+    hls_url = _live_hls_url(hls and render and output_mode == "full", upload_name, "_output", "suspicious-videos")
+
+    async def run(progress: ProgressCallback | None = None) -> dict[str, Any]:
+        started_at = time.time()
+        try:
+            detector = await _get_suspicious_detector()
+            upload = await run_in_threadpool(
+                _store_upload, data, SUSPICIOUS_UPLOAD_DIR, file.filename, ".mp4", upload_name
+            )
+            detection_result = await _analyze(
+                detector,
+                str(upload.path),
+                render=render,
+                output_mode=output_mode,
+                hls=hls,
+                progress=_with_hls_url(progress, "suspicious-videos"),
+                cancel=token,
+                detection_log=SUSPICIOUS_LOG_DIR / f"{upload.stem}_detections",
+                output_stem=upload.stem,
+            )
 
-        log_path = SUSPICIOUS_LOG_DIR / f"{input_video.stem}_summary.json"
-        _write_json(log_path, summary_payload)
-        stats = {
-            "input_video_url": f"/border/files/suspicious-inputs/{input_video.name}",
-            "output_size_bytes": output_path.stat().st_size if output_path.exists() else None,
-        }
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "summary": summary_payload,
-            "labels": summary_payload.get("labels_detected", []),
-            "stats": stats,
-            "output_url": f"/border/files/suspicious-videos/{output_path.name}",
-            "video_url": f"/border/files/suspicious-videos/{output_path.name}",
-            "log_url": f"/border/files/suspicious-logs/{log_path.name}",
-        }
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover - defensive
-        raise HTTPException(status_code=500, detail=f"Suspicious activity detection failed: {str(exc)}") from exc
+            if isinstance(detection_result, dict):
+                raw_output = detection_result.get("output_path")
+                output_path = Path(raw_output) if raw_output else None
+                summary = detection_result.get("summary") or {}
+            else:
+                output_path = Path(detection_result)
+                summary = {}
+            output_url = f"/border/files/suspicious-videos/{output_path.name}" if output_path is not None else None
+
+            summary_payload: dict[str, Any] = {
+                "frames_processed": int(summary.get("frames_processed", 0) or 0),
+                "frames_with_events": int(summary.get("frames_with_events", 0) or 0),
+                "detections_total": int(summary.get("detections_total", 0) or 0),
+                "alert_events": int(summary.get("frames_with_events", 0) or 0),
+                "suspicious_percentage": float(summary.get("suspicious_percentage", 0.0) or 0.0),
+                "labels_detected": list(summary.get("labels_detected", [])) if summary.get("labels_detected") else [],
+                **stop_summary(token),
+            }
+            if summary.get("clips") is not None:
+                summary_payload["clips"] = summary["clips"]
+                summary_payload["clip_index"] = summary.get("clip_index")
+            if summary.get("hls_playlist") is not None:
+                summary_payload["hls_playlist"] = summary["hls_playlist"]
+            if summary.get("detection_log") is not None:
+                summary_payload["detection_log"] = summary["detection_log"]
+                summary_payload["detection_log_rows"] = summary.get("detection_log_rows", 0)
+            _index_analysis(
+                "suspicious", summary_payload, SUSPICIOUS_LOG_DIR, started_at, file.filename, upload.name
+            )
+            clip_index_url = _attach_clip_urls(summary_payload, "suspicious-videos")
+
+            log_path = SUSPICIOUS_LOG_DIR / f"{upload.stem}_summary.json"
+            _write_json(log_path, summary_payload)
+            stats = {
+                "input_video_url": f"/border/files/suspicious-inputs/{upload.name}",
+                "output_size_bytes": output_path.stat().st_size if output_path is not None and output_path.exists() else None,
+            }
+            return {
+                "status": "success",
+                "filename": file.filename,
+                "summary": summary_payload,
+                "labels": summary_payload.get("labels_detected", []),
+                "stats": stats,
+                "output_url": output_url,
+                "video_url": output_url,
+                "clip_index_url": clip_index_url,
+                "hls_url": _hls_url(summary_payload, "suspicious-videos"),
+                "log_url": f"/border/files/suspicious-logs/{log_path.name}",
+                "detection_log_url": _detection_log_url(summary_payload, "suspicious-logs"),
+            }
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except Exception as exc:  # pragma: no cover - defensive
+            raise HTTPException(status_code=500, detail=f"Suspicious activity detection failed: {str(exc)}") from exc
+
+    return await _dispatch(
+        request, token, run, "suspicious", PRIORITY_VIDEO, stream=stream, kind="border-suspicious",
+        accepted={"hls_url": hls_url} if hls_url else None,
+    )
 
 
 @app.post("/surveillance/anomaly/detect")
-async def detect_surveillance_anomaly(file: UploadFile = File(...)):
-    """Upload an image or video and run restricted-area anomaly detection."""
+async def detect_surveillance_anomaly(
+    request: Request,
+    file: UploadFile = File(...),
+    camera_id: str | None = None,
+    detect_every: int = 1,
+    render: bool = True,
+    output_mode: Literal["full", "clips"] = "full",
+    hls: bool = False,
+    stream: bool = STREAM_PARAM,
+    deadline: float | None = DEADLINE_PARAM,
+    max_frames: int | None = MAX_FRAMES_PARAM,
+):
+    """Upload an image or video and run restricted-area anomaly detection.
+
+    ``camera_id`` selects the zone config in ``Backend/Survilleance/zones/<camera_id>.json``.
+    For videos, ``detect_every`` runs the model on every Nth frame and tracks in between.
+    ``render=false`` skips drawing and the annotated output and returns metadata only.
+    ``output_mode=clips`` writes short clips around restricted events instead of the full video.
+    ``hls=true`` also writes an HLS playlist of the annotated video (``hls_url``).
+    """
 
     filename = file.filename or "upload"
     if not (_is_video(filename, file.content_type) or _is_image(filename, file.content_type)):
         raise HTTPException(status_code=400, detail="Only image or video files are allowed for anomaly detection.")
 
-    data = await file.read()
+    data = await _read_upload(file)
+    token = CancellationToken(deadline=deadline, max_frames=max_frames)
     is_video = _is_video(filename, file.content_type)
+    upload_name = _upload_path(data, SURV_ANOMALY_UPLOAD_DIR, filename, ".mp4").name if is_video else ""
+    hls_url = _live_hls_url(
+        is_video and hls and render and output_mode == "full", upload_name, "_annotated", "surveillance-anomaly-outputs"
+    )
 
-    try:
-        if is_video:
-            input_path = _store_upload(data, SURV_ANOMALY_UPLOAD_DIR, filename, ".mp4")
-            output_path = SURV_ANOMALY_OUTPUT_DIR / f"{input_path.stem}_annotated.mp4"
-            summary = await run_in_threadpool(
-                anomaly_detection.analyze_video,
-                str(input_path),
-                str(output_path),
-            )
-        else:
-            input_path = _store_upload(data, SURV_ANOMALY_UPLOAD_DIR, filename, ".jpg")
-            output_path = SURV_ANOMALY_OUTPUT_DIR / f"{input_path.stem}_annotated.jpg"
-            summary = await run_in_threadpool(
-                anomaly_detection.analyze_image,
-                str(input_path),
-                str(output_path),
+    async def run(progress: ProgressCallback | None = None) -> dict[str, Any]:
+        started_at = time.time()
+        anomaly_detection = await _load("anomaly", "Anomaly detector")
+        try:
+            if is_video:
+                upload = await run_in_threadpool(
+                    _store_upload, data, SURV_ANOMALY_UPLOAD_DIR, filename, ".mp4", upload_name
+                )
+                output_path = SURV_ANOMALY_OUTPUT_DIR / f"{upload.stem}_annotated.mp4"
+                summary = await _analyze(
+                    anomaly_detection.analyze_video,
+                    str(upload.path),
+                    str(output_path),
+                    camera_id=camera_id,
+                    detect_every=detect_every,
+                    render=render,
+                    output_mode=output_mode,
+                    hls=hls,
+                    progress=_with_hls_url(progress, "surveillance-anomaly-outputs"),
+                    cancel=token,
+                    detection_log=SURV_ANOMALY_LOG_DIR / f"{upload.stem}_detections",
+                )
+            else:
+                frame = _decode_upload(data)
+                upload = _stage_upload(data, SURV_ANOMALY_UPLOAD_DIR, filename, ".jpg")
+                output_path = SURV_ANOMALY_OUTPUT_DIR / f"{upload.stem}_annotated.jpg"
+                summary = await _analyze(
+                    anomaly_detection.analyze_image,
+                    frame,
+                    str(output_path),
+                    camera_id=camera_id,
+                    render=render,
+                    write=False,
+                )
+                _persist_annotated(summary, output_path)
+
+            clip_index_url = _attach_clip_urls(summary, "surveillance-anomaly-outputs")
+            log_path = SURV_ANOMALY_LOG_DIR / f"{upload.stem}_summary.json"
+            _write_json(log_path, summary)
+            _index_analysis(
+                "anomaly", summary, SURV_ANOMALY_LOG_DIR, started_at, camera_id or filename, upload.name,
+                artifact=f"/border/files/surveillance-anomaly-logs/{log_path.name}",
+                # tracked runs carry enter/exit/dwell/line events; images their restricted hits
+                events=summary.get("zone_events") or ([] if is_video else summary.get("restricted_events", [])),
             )
 
-        log_path = SURV_ANOMALY_LOG_DIR / f"{input_path.stem}_summary.json"
-        _write_json(log_path, summary)
-
-        return {
-            "status": "success",
-            "filename": filename,
-            "media_type": "video" if is_video else "image",
-            "summary": summary,
-            "input_url": f"/border/files/surveillance-anomaly-inputs/{input_path.name}",
-            "output_url": f"/border/files/surveillance-anomaly-outputs/{output_path.name}",
-            "log_url": f"/border/files/surveillance-anomaly-logs/{log_path.name}",
-        }
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover - defensive
-        raise HTTPException(status_code=500, detail=f"Surveillance anomaly detection failed: {exc}") from exc
+            return {
+                "status": "success",
+                "filename": filename,
+                "media_type": "video" if is_video else "image",
+                "summary": summary,
+                "input_url": f"/border/files/surveillance-anomaly-inputs/{upload.name}",
+                "output_url": f"/border/files/surveillance-anomaly-outputs/{output_path.name}" if render and not clip_index_url else None,
+                "clip_index_url": clip_index_url,
+                "hls_url": _hls_url(summary, "surveillance-anomaly-outputs"),
+                "log_url": f"/border/files/surveillance-anomaly-logs/{log_path.name}",
+                "detection_log_url": _detection_log_url(summary, "surveillance-anomaly-logs"),
+            }
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except Exception as exc:  # pragma: no cover - defensive
+            raise HTTPException(status_code=500, detail=f"Surveillance anomaly detection failed: {exc}") from exc
+
+    return await _dispatch(
+        request, token, run, "anomaly", PRIORITY_VIDEO if is_video else PRIORITY_IMAGE, stream=stream, kind="surveillance-anomaly",
+        accepted={"hls_url": hls_url} if hls_url else None,
+    )
 
 
 @app.post("/surveillance/weapon/detect")
-async def detect_surveillance_weapons(file: UploadFile = File(...)):
-    """Upload an image or video and run weapon detection."""
+async def detect_surveillance_weapons(
+    request: Request,
+    file: UploadFile = File(...),
+    camera_id: str | None = None,
+    render: bool = True,
+    output_mode: Literal["full", "clips"] = "full",
+    hls: bool = False,
+    stream: bool = STREAM_PARAM,
+    deadline: float | None = DEADLINE_PARAM,
+    max_frames: int | None = MAX_FRAMES_PARAM,
+):
+    """Upload an image or video and run weapon detection.
+
+    ``camera_id`` names the camera the footage came from; events are indexed under it.
+    ``render=false`` skips drawing and the annotated output and returns metadata only.
+    ``output_mode=clips`` writes short clips around weapon sightings instead of the full video.
+    ``hls=true`` also writes an HLS playlist of the annotated video (``hls_url``).
+    """
 
     filename = file.filename or "upload"
     if not (_is_video(filename, file.content_type) or _is_image(filename, file.content_type)):
         raise HTTPException(status_code=400, detail="Only image or video files are allowed for weapon detection.")
 
-    data = await file.read()
+    data = await _read_upload(file)
+    token = CancellationToken(deadline=deadline, max_frames=max_frames)
     is_video = _is_video(filename, file.content_type)
+    upload_name = _upload_path(data, SURV_WEAPON_UPLOAD_DIR, filename, ".mp4").name if is_video else ""
+    hls_url = _live_hls_url(
+        is_video and hls and render and output_mode == "full", upload_name, "_annotated", "surveillance-weapon-outputs"
+    )
 
-    try:
-        if is_video:
-            input_path = _store_upload(data, SURV_WEAPON_UPLOAD_DIR, filename, ".mp4")
-            output_path = SURV_WEAPON_OUTPUT_DIR / f"{input_path.stem}_annotated.mp4"
-            summary = await run_in_threadpool(
-                weapon_detection.analyze_video,
-                str(input_path),
-                str(output_path),
-            )
-        else:
-            input_path = _store_upload(data, SURV_WEAPON_UPLOAD_DIR, filename, ".jpg")
-            output_path = SURV_WEAPON_OUTPUT_DIR / f"{input_path.stem}_annotated.jpg"
-            summary = await run_in_threadpool(
-                weapon_detection.analyze_image,
-                str(input_path),
-                str(output_path),
+    async def run(progress: ProgressCallback | None = None) -> dict[str, Any]:
+        started_at = time.time()
+        weapon_detection = await _load("weapon", "Weapon detector")
+        try:
+            if is_video:
+                upload = await run_in_threadpool(
+                    _store_upload, data, SURV_WEAPON_UPLOAD_DIR, filename, ".mp4", upload_name
+                )
+                output_path = SURV_WEAPON_OUTPUT_DIR / f"{upload.stem}_annotated.mp4"
+                summary = await _analyze(
+                    weapon_detection.analyze_video,
+                    str(upload.path),
+                    str(output_path),
+                    render=render,
+                    output_mode=output_mode,
+                    hls=hls,
+                    progress=_with_hls_url(progress, "surveillance-weapon-outputs"),
+                    cancel=token,
+                    detection_log=SURV_WEAPON_LOG_DIR / f"{upload.stem}_detections",
+                )
+            else:
+                frame = _decode_upload(data)
+                upload = _stage_upload(data, SURV_WEAPON_UPLOAD_DIR, filename, ".jpg")
+                output_path = SURV_WEAPON_OUTPUT_DIR / f"{upload.stem}_annotated.jpg"
+                summary = await _analyze(
+                    weapon_detection.analyze_image,
+                    frame,
+                    str(output_path),
+                    render=render,
+                    write=False,
+                )
+                _persist_annotated(summary, output_path)
+
+            clip_index_url = _attach_clip_urls(summary, "surveillance-weapon-outputs")
+            log_path = SURV_WEAPON_LOG_DIR / f"{upload.stem}_summary.json"
+            _write_json(log_path, summary)
+            _index_analysis(
+                "weapon", summary, SURV_WEAPON_LOG_DIR, started_at, camera_id or filename, upload.name,
+                artifact=f"/border/files/surveillance-weapon-logs/{log_path.name}",
+                events=[] if is_video else summary.get("weapon_alerts", []),
             )
 
-        log_path = SURV_WEAPON_LOG_DIR / f"{input_path.stem}_summary.json"
-        _write_json(log_path, summary)
-
-        return {
-            "status": "success",
-            "filename": filename,
-            "media_type": "video" if is_video else "image",
-            "summary": summary,
-            "input_url": f"/border/files/surveillance-weapon-inputs/{input_path.name}",
-            "output_url": f"/border/files/surveillance-weapon-outputs/{output_path.name}",
-            "log_url": f"/border/files/surveillance-weapon-logs/{log_path.name}",
-        }
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover
-        raise HTTPException(status_code=500, detail=f"Surveillance weapon detection failed: {exc}") from exc
+            return {
+                "status": "success",
+                "filename": filename,
+                "media_type": "video" if is_video else "image",
+                "summary": summary,
+                "input_url": f"/border/files/surveillance-weapon-inputs/{upload.name}",
+                "output_url": f"/border/files/surveillance-weapon-outputs/{output_path.name}" if render and not clip_index_url else None,
+                "clip_index_url": clip_index_url,
+                "hls_url": _hls_url(summary, "surveillance-weapon-outputs"),
+                "log_url": f"/border/files/surveillance-weapon-logs/{log_path.name}",
+                "detection_log_url": _detection_log_url(summary, "surveillance-weapon-logs"),
+            }
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except Exception as exc:  # pragma: no cover
+            raise HTTPException(status_code=500, detail=f"Surveillance weapon detection failed: {exc}") from exc
+
+    return await _dispatch(
+        request, token, run, "weapon", PRIORITY_VIDEO if is_video else PRIORITY_IMAGE, stream=stream, kind="surveillance-weapon",
+        accepted={"hls_url": hls_url} if hls_url else None,
+    )
 
 
 @app.post("/surveillance/face/recognize")
-async def recognize_surveillance_faces(file: UploadFile = File(...)):
-    """Upload an image or video and run face recognition against known faces."""
+async def recognize_surveillance_faces(
+    request: Request,
+    file: UploadFile = File(...),
+    camera_id: str | None = None,
+    render: bool = True,
+    output_mode: Literal["full", "clips"] = "full",
+    hls: bool = False,
+    stream: bool = STREAM_PARAM,
+    deadline: float | None = DEADLINE_PARAM,
+    max_frames: int | None = MAX_FRAMES_PARAM,
+):
+    """Upload an image or video and run face recognition against known faces.
+
+    ``camera_id`` names the camera the footage came from; events are indexed under it.
+    ``render=false`` skips drawing and the annotated output and returns metadata only.
+    ``output_mode=clips`` writes short clips around recognised faces instead of the full video.
+    ``hls=true`` also writes an HLS playlist of the annotated video (``hls_url``).
+    """
 
     filename = file.filename or "upload"
     if not (_is_video(filename, file.content_type) or _is_image(filename, file.content_type)):
         raise HTTPException(status_code=400, detail="Only image or video files are allowed for face recognition.")
 
-    data = await file.read()
+    data = await _read_upload(file)
+    token = CancellationToken(deadline=deadline, max_frames=max_frames)
     is_video = _is_video(filename, file.content_type)
+    upload_name = _upload_path(data, SURV_FACE_UPLOAD_DIR, filename, ".mp4").name if is_video else ""
+    hls_url = _live_hls_url(
+        is_video and hls and render and output_mode == "full", upload_name, "_annotated", "surveillance-face-outputs"
+    )
 
     known_faces_dir = SURV_KNOWN_FACES_DIR
 
-    try:
-        if is_video:
-            input_path = _store_upload(data, SURV_FACE_UPLOAD_DIR, filename, ".mp4")
-            output_path = SURV_FACE_OUTPUT_DIR / f"{input_path.stem}_annotated.mp4"
-            summary = await run_in_threadpool(
-                face_recognition.recognize_video,
-                str(input_path),
-                str(output_path),
-                str(known_faces_dir),
-            )
-        else:
-            input_path = _store_upload(data, SURV_FACE_UPLOAD_DIR, filename, ".jpg")
-            output_path = SURV_FACE_OUTPUT_DIR / f"{input_path.stem}_annotated.jpg"
-            summary = await run_in_threadpool(
-                face_recognition.recognize_image,
-                str(input_path),
-                str(output_path),
-                str(known_faces_dir),
-            )
-
-        # Ensure summary is JSON serializable
-        def make_json_safe(obj):
-            """Recursively convert object to JSON-safe format"""
-            if obj is None or isinstance(obj, (str, bool)):
-                return obj
-            elif isinstance(obj, (int, float)):
-                # Handle numpy types
-                return float(obj) if hasattr(obj, 'dtype') else obj
-            elif isinstance(obj, (list, tuple)):
-                return [make_json_safe(item) for item in obj]
-            elif isinstance(obj, dict):
-                return {str(k): make_json_safe(v) for k, v in obj.items()}
+    async def run(progress: ProgressCallback | None = None) -> dict[str, Any]:
+        started_at = time.time()
+        face_recognition = await _load("face", "Face recognition")
+        try:
+            if is_video:
+                upload = await run_in_threadpool(
+                    _store_upload, data, SURV_FACE_UPLOAD_DIR, filename, ".mp4", upload_name
+                )
+                output_path = SURV_FACE_OUTPUT_DIR / f"{upload.stem}_annotated.mp4"
+                summary = await _analyze(
+                    face_recognition.recognize_video,
+                    str(upload.path),
+                    str(output_path),
+                    str(known_faces_dir),
+                    render=render,
+                    output_mode=output_mode,
+                    hls=hls,
+                    progress=_with_hls_url(progress, "surveillance-face-outputs"),
+                    cancel=token,
+                    detection_log=SURV_FACE_LOG_DIR / f"{upload.stem}_detections",
+                )
             else:
-                # Convert everything else to string
-                return str(obj)
-
-        safe_summary = make_json_safe(summary)
+                frame = _decode_upload(data)
+                upload = _stage_upload(data, SURV_FACE_UPLOAD_DIR, filename, ".jpg")
+                output_path = SURV_FACE_OUTPUT_DIR / f"{upload.stem}_annotated.jpg"
+                summary = await _analyze(
+                    face_recognition.recognize_image,
+                    frame,
+                    str(output_path),
+                    str(known_faces_dir),
+                    render=render,
+                    write=False,
+                )
+                _persist_annotated(summary, output_path)
+
+            clip_index_url = _attach_clip_urls(summary, "surveillance-face-outputs")
         
-        log_path = SURV_FACE_LOG_DIR / f"{input_path.stem}_summary.json"
-        _write_json(log_path, safe_summary)
+            log_path = SURV_FACE_LOG_DIR / f"{upload.stem}_summary.json"
+            _write_json(log_path, summary)
+            _index_analysis(
+                "face", summary, SURV_FACE_LOG_DIR, started_at, camera_id or filename, upload.name,
+                artifact=f"/border/files/surveillance-face-logs/{log_path.name}",
+                events=[] if is_video else summary.get("detections", []),
+                kind="face",
+                flagged_only=False,
+            )
         
-        # Ensure we have the expected structure
-        if isinstance(safe_summary, dict):
-            # Add counts for easy access
-            if "detections" in safe_summary:
-                detections = safe_summary["detections"]
-                if isinstance(detections, list):
-                    safe_summary["faces_detected"] = len(detections)
-                    safe_summary["known_faces"] = sum(1 for det in detections if det.get("authorized", False))
-                    safe_summary["unknown_faces"] = sum(1 for det in detections if not det.get("authorized", False))
+            # Ensure we have the expected structure
+            if isinstance(summary, dict):
+                # Add counts for easy access
+                if "detections" in summary:
+                    detections = summary["detections"]
+                    if isinstance(detections, list):
+                        summary["faces_detected"] = len(detections)
+                        summary["known_faces"] = sum(1 for det in detections if det.authorized)
+                        summary["unknown_faces"] = len(detections) - summary["known_faces"]
             
-            # For video processing results
-            if "authorized_events" in safe_summary:
-                events = safe_summary["authorized_events"]
-                if isinstance(events, list):
-                    safe_summary["known_faces"] = len(events)
-                    safe_summary["faces_detected"] = safe_summary.get("detections_total", len(events))
-                    safe_summary["unknown_faces"] = safe_summary.get("faces_detected", 0) - safe_summary.get("known_faces", 0)
-        else:
-            safe_summary = {"message": str(summary), "faces_detected": 0, "known_faces": 0, "unknown_faces": 0}
+                # For video processing results
+                if "authorized_events" in summary:
+                    events = summary["authorized_events"]
+                    if isinstance(events, list):
+                        summary["known_faces"] = len(events)
+                        summary["faces_detected"] = summary.get("detections_total", len(events))
+                        summary["unknown_faces"] = summary.get("faces_detected", 0) - summary.get("known_faces", 0)
+            else:
+                summary = {"message": str(summary), "faces_detected": 0, "known_faces": 0, "unknown_faces": 0}
+
+            return {
+                "status": "success",
+                "filename": filename,
+                "media_type": "video" if is_video else "image",
+                "summary": summary,
+                "input_url": f"/border/files/surveillance-face-inputs/{upload.name}",
+                "output_url": f"/border/files/surveillance-face-outputs/{output_path.name}" if render and not clip_index_url else None,
+                "clip_index_url": clip_index_url,
+                "hls_url": _hls_url(summary, "surveillance-face-outputs"),
+                "log_url": f"/border/files/surveillance-face-logs/{log_path.name}",
+                "detection_log_url": _detection_log_url(summary, "surveillance-face-logs"),
+            }
+        except ValueError as exc:
+            print(f"[ERROR] ValueError in face recognition: {exc}")
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except Exception as exc:  # pragma: no cover
+            print(f"[ERROR] Exception in face recognition: {exc}")
+            print(f"[ERROR] Exception type: {type(exc)}")
+            import traceback
+            print(f"[ERROR] Traceback: {traceback.format_exc()}")
+            raise HTTPException(status_code=500, detail=f"Surveillance face recognition failed: {exc}") from exc
+
+    return await _dispatch(
+        request, token, run, "face", PRIORITY_VIDEO if is_video else PRIORITY_IMAGE, stream=stream, kind="surveillance-face",
+        accepted={"hls_url": hls_url} if hls_url else None,
+    )
 
-        return {
-            "status": "success",
-            "filename": filename,
-            "media_type": "video" if is_video else "image",
-            "summary": safe_summary,
-            "input_url": f"/border/files/surveillance-face-inputs/{input_path.name}",
-            "output_url": f"/border/files/surveillance-face-outputs/{output_path.name}",
-            "log_url": f"/border/files/surveillance-face-logs/{log_path.name}",
-        }
-    except ValueError as exc:
-        print(f"[ERROR] ValueError in face recognition: {exc}")
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover
-        print(f"[ERROR] Exception in face recognition: {exc}")
-        print(f"[ERROR] Exception type: {type(exc)}")
-        import traceback
-        print(f"[ERROR] Traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Surveillance face recognition failed: {exc}") from exc
+
+MEDIA_TYPE_OVERRIDES = {
+    ".mp4": "video/mp4",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".json": "application/json",
+    ".csv": "text/csv",
+    ".parquet": "application/vnd.apache.parquet",
+    ".npy": "application/octet-stream",
+}
+FILE_CACHE_CONTROL = "private, max-age=3600"
+
+
+def _media_type_for(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix in MEDIA_TYPE_OVERRIDES:
+        return MEDIA_TYPE_OVERRIDES[suffix]
+    guessed, _ = mimetypes.guess_type(path.name)
+    return guessed or "application/octet-stream"
 
 
-@app.get("/border/files/{category}/{filename}")
-async def download_processed_file(category: str, filename: str):
-    """Serve processed media/log files produced by detection endpoints."""
+def _file_etag(stat_result) -> str:
+    """Strong validator derived from size and nanosecond mtime."""
+
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+def _regenerate_comparison(comparison_path: Path) -> bool:
+    stem = comparison_path.name[: -len("_comparison.jpg")]
+    annotated_path = comparison_path.with_name(f"{stem}_annotated.jpg")
+    source = _comparison_source(comparison_path)
+    if source is None or not annotated_path.is_file():
+        return False
+    original = cv2.imread(str(source))
+    annotated = cv2.imread(str(annotated_path))
+    if original is None or annotated is None:
+        return False
+    if _queue_side_by_side_image(original, annotated, comparison_path) is None:
+        return False
+    return ARTIFACTS.wait(comparison_path)
+
+
+@app.api_route("/border/files/{category}/{filename}", methods=["GET", "HEAD"])
+async def download_processed_file(category: str, filename: str, request: Request):
+    """Serve processed media/log files produced by detection endpoints.
+
+    Supports byte ranges (``Range``/``If-Range``) for seeking in videos and answers
+    ``If-None-Match``/``If-Modified-Since`` with ``304 Not Modified``.
+    """
 
     directory = FILE_CATEGORY_MAP.get(category)
     if directory is None:
@@ -634,29 +1415,204 @@ async def download_processed_file(category: str, filename: str):
         raise HTTPException(status_code=400, detail="Invalid filename")
 
     file_path = directory / safe_name
+    store = UPLOAD_STORES.get(directory)
+    if store is not None and not file_path.is_file():
+        # Legacy uploads are flat files; newer ones resolve through the blob store
+        file_path = store.resolve(safe_name) or file_path
+
+    if ARTIFACTS.is_pending(file_path):
+        # Outputs are persisted after the response; give a queued write a moment to land
+        await run_in_threadpool(ARTIFACTS.wait, file_path)
+
+    if not file_path.is_file() and category == "drones-reports" and safe_name.endswith("_comparison.jpg"):
+        # Comparison images are compacted away by retention; rebuild from input + annotated image
+        await run_in_threadpool(_regenerate_comparison, file_path)
 
     if not file_path.exists() or not file_path.is_file():
         raise HTTPException(status_code=404, detail="File not found")
 
-    suffix = file_path.suffix.lower()
-    if suffix in {".jpg", ".jpeg"}:
-        media_type = "image/jpeg"
-    elif suffix == ".png":
-        media_type = "image/png"
-    elif suffix in {".mp4", ".mov", ".avi"}:
-        media_type = "video/mp4"
-    elif suffix == ".csv":
-        media_type = "text/csv"
-    else:
-        media_type = "application/octet-stream"
+    stat_result = file_path.stat()
+    etag = _file_etag(stat_result)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        # live HLS playlists grow while the video is processed
+        "Cache-Control": "no-cache" if file_path.suffix.lower() == ".m3u8" else FILE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path=str(file_path),
+        media_type=_media_type_for(file_path),
+        filename=safe_name,
+        headers=headers,
+        stat_result=stat_result,
+    )
+
+@app.get("/border/files/{category}/{filename}/detections")
+async def query_detection_log(
+    category: str,
+    filename: str,
+    request: Request,
+    frame_start: int | None = None,
+    frame_end: int | None = None,
+    label: list[str] | None = Query(None),
+    min_confidence: float | None = None,
+    flagged: bool | None = None,
+    limit: int = Query(QUERY_LIMIT, ge=1, le=100_000),
+):
+    """Filter rows of a columnar detection log (``detection_log_url``) without downloading it."""
+
+    directory = FILE_CATEGORY_MAP.get(category)
+    if directory is None or not category.endswith("-logs"):
+        raise HTTPException(status_code=404, detail="Unknown log category")
+
+    safe_name = Path(filename).name
+    if safe_name != filename or Path(safe_name).suffix not in (".parquet", ".npy"):
+        raise HTTPException(status_code=400, detail="Invalid detection log name")
+
+    log_path = directory / safe_name
+    if not log_path.is_file():
+        raise HTTPException(status_code=404, detail="Detection log not found")
+
+    rows = await run_in_threadpool(
+        query_log,
+        log_path,
+        frame_start=frame_start,
+        frame_end=frame_end,
+        labels=label,
+        min_confidence=min_confidence,
+        flagged=flagged,
+        limit=limit,
+    )
+    return _respond(request, {"log": safe_name, "count": len(rows), "rows": rows})
+
+
+def _parse_time(value: str | None, name: str) -> float | None:
+    """Epoch seconds or an ISO-8601 timestamp (naive values are taken as UTC)."""
+
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected epoch seconds or ISO-8601") from exc
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+@app.get("/events")
+async def query_events(
+    request: Request,
+    module: str | None = None,
+    label: list[str] | None = Query(None),
+    kind: str | None = None,
+    source: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    min_confidence: float | None = None,
+    limit: int = Query(EVENT_QUERY_LIMIT, ge=1, le=10_000),
+    offset: int = Query(0, ge=0),
+):
+    """Search indexed detection events across all modules, newest first.
+
+    e.g. ``/events?module=weapon&source=camera-3&since=2024-05-01T00:00:00``.
+    """
+
+    rows = await run_in_threadpool(
+        EVENT_INDEX.query,
+        module=module,
+        labels=label,
+        kind=kind,
+        source=source,
+        since=_parse_time(since, "since"),
+        until=_parse_time(until, "until"),
+        min_confidence=min_confidence,
+        limit=limit,
+        offset=offset,
+    )
+    return _respond(request, {"count": len(rows), "offset": offset, "events": rows})
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """Status (and final result once done) of a job started with ``stream=true``."""
+
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return _respond(request, job.to_dict())
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Stop a streamed analysis; it finishes with a partial result (``stop_reason=cancelled``)."""
+
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return {"job_id": job.id, "cancelled": job.cancel(), "status": job.status}
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events: ``status``, ``progress``, ``detections``, ``alert`` and finally ``result`` or ``error``."""
+
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+    async def event_stream():
+        async for event in job.events():
+            yield _sse(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, stage, model and queue metrics."""
+
+    return Response(content=METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
-    return FileResponse(path=str(file_path), media_type=media_type, filename=safe_name)
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "AI Threat Intelligence API"}
 
+
+@app.get("/health/live")
+async def health_live():
+    """Liveness: the process is serving requests; never waits for models to load."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: ``200`` once the warm-up components are loaded, ``503`` until then (or if one failed)."""
+    ready = COMPONENTS.ready
+    failed = any(COMPONENTS[name].state == FAILED for name in COMPONENTS.required)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "failed" if failed else "starting",
+            "components": COMPONENTS.status(),
+        },
+    )
+
 if __name__ == "__main__":
     print("Starting AI Threat Intelligence API...")
     print("Server will be available at: http://localhost:8000")
@@ -0,0 +1,4 @@
+"""Reproducible latency / throughput benchmarks for the detectors and the HTTP API.
+
+Run ``python -m benchmarks --help`` from the repository root.
+"""
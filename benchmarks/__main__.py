@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.cases import http_cases, inprocess_cases, prepare_inputs
+from benchmarks.harness import (
+    RESULTS_DIR,
+    compare,
+    environment,
+    format_table,
+    latest_results,
+    load_results,
+    run_case,
+    save_results,
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measure p50/p95/p99 latency and throughput of every detector, in-process and over HTTP.",
+    )
+    parser.add_argument("--mode", choices=("inprocess", "http", "both"), default="inprocess")
+    parser.add_argument("--cases", nargs="*", help="Only run cases whose name contains one of these strings")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed calls per case before timing")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel callers (throughput under load)")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API address for --mode http")
+    parser.add_argument("--synthetic", action="store_true", help="Use generated media instead of the bundled samples")
+    parser.add_argument("--video-frames", type=int, default=120, help="Length of the synthetic video")
+    parser.add_argument("--no-render", action="store_true", help="Metadata only: skip drawing and writing outputs")
+    parser.add_argument("--baseline", help="Result file to compare against, or 'latest'")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown before failing")
+    parser.add_argument("--no-save", action="store_true", help="Do not store this run under benchmarks/results")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as work_dir:
+        inputs = prepare_inputs(Path(work_dir), synthetic=args.synthetic, video_frames=args.video_frames)
+        render = not args.no_render
+        cases = []
+        if args.mode in ("inprocess", "both"):
+            cases.extend(inprocess_cases(inputs, render=render))
+        if args.mode in ("http", "both"):
+            cases.extend(http_cases(inputs, args.base_url, render=render))
+        if args.cases:
+            cases = [case for case in cases if any(pattern in case.name for pattern in args.cases)]
+
+        results = []
+        for case in cases:
+            print(f"[bench] {case.mode}:{case.name} ...", file=sys.stderr, flush=True)
+            results.append(run_case(case, args.repeat, args.warmup, args.concurrency))
+
+    meta = {
+        **environment(),
+        "args": vars(args),
+        "inputs": {"video": str(inputs.video), "video_frames": inputs.video_frames, "image": str(inputs.image)},
+    }
+    print(format_table(results))
+
+    saved = None
+    if not args.no_save:
+        saved = save_results(results, meta)
+        print(f"\nResults saved to {saved}")
+
+    if not args.baseline:
+        return 0
+    baseline_path = latest_results(RESULTS_DIR, exclude=saved) if args.baseline == "latest" else Path(args.baseline)
+    if baseline_path is None or not baseline_path.exists():
+        print("No baseline to compare against")
+        return 0
+    regressions = compare(load_results(baseline_path), results, args.tolerance)
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%} against {baseline_path.name}")
+        return 0
+    print(f"\nRegressions against {baseline_path.name}:")
+    print(json.dumps(regressions, indent=2))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
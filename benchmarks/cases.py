@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks import media
+from benchmarks.harness import BenchCase, Run
+
+
+@dataclass
+class Inputs:
+    video: Path
+    video_frames: int
+    image: Path
+    large_image: Path
+    csv: Path
+    csv_rows: int
+    emails: List[str]
+    work_dir: Path
+
+
+def prepare_inputs(work_dir: Path, synthetic: bool = False, video_frames: int = 120, emails: int = 50) -> Inputs:
+    """Bundled sample media where present (unless ``synthetic``), generated media otherwise."""
+
+    work_dir.mkdir(parents=True, exist_ok=True)
+    video = media.BUNDLED_VIDEO
+    if synthetic or not video.exists():
+        video = media.synthetic_video(work_dir / f"synthetic_{video_frames}.mp4", frames=video_frames)
+    image = media.BUNDLED_DRONE_IMAGE
+    if synthetic or not image.exists():
+        image = media.synthetic_sky(work_dir / "synthetic_sky_720p.jpg", size=(1280, 720))
+    return Inputs(
+        video=video,
+        video_frames=media.frame_count(video),
+        image=image,
+        large_image=media.synthetic_sky(work_dir / "synthetic_sky_4k.jpg"),
+        csv=media.BUNDLED_CSV,
+        csv_rows=media.csv_rows(media.BUNDLED_CSV),
+        emails=media.synthetic_emails(emails),
+        work_dir=work_dir,
+    )
+
+
+def _output(inputs: Inputs, name: str, suffix: str) -> Callable[[], Path]:
+    """A fresh output path per call so every run writes like a real request."""
+
+    counter = itertools.count()
+    return lambda: inputs.work_dir / "outputs" / f"{name}_{next(counter)}{suffix}"
+
+
+def _frames(summary: Any, fallback: int) -> int:
+    if isinstance(summary, dict):
+        return int(summary.get("frames_processed") or fallback)
+    return fallback
+
+
+def inprocess_cases(inputs: Inputs, render: bool = True) -> List[BenchCase]:
+    """Module functions called directly; imports and model loads happen in ``setup``."""
+
+    def ids() -> Run:
+        from Backend.AIThreatIntelligence.IDS import predict_from_csv
+
+        return lambda: len(predict_from_csv(str(inputs.csv)))
+
+    def classifier() -> Run:
+        from Backend.AIThreatIntelligence.classifier import classifier as classify
+
+        def run() -> int:
+            for text in inputs.emails:
+                classify(text)
+            return len(inputs.emails)
+
+        return run
+
+    def anomaly_video() -> Run:
+        from Backend.Survilleance.app.Anomly_detection import analyze_video
+
+        output = _output(inputs, "anomaly", ".mp4")
+        return lambda: _frames(
+            analyze_video(inputs.video, output_path=output() if render else None, render=render), inputs.video_frames
+        )
+
+    def weapon_video() -> Run:
+        from Backend.Survilleance.app.Weapon_detection import analyze_video
+
+        output = _output(inputs, "weapon", ".mp4")
+        return lambda: _frames(
+            analyze_video(inputs.video, output_path=output() if render else None, render=render), inputs.video_frames
+        )
+
+    def face_video() -> Run:
+        from Backend.Survilleance.app.Face_Recognition import recognize_video
+
+        output = _output(inputs, "face", ".mp4")
+        return lambda: _frames(
+            recognize_video(inputs.video, output_path=output() if render else None, render=render), inputs.video_frames
+        )
+
+    def humans_video() -> Run:
+        from Backend.BorderAnomly.HUMAN_DETECTION.detector import detect_humans
+
+        def run() -> int:
+            detect_humans(str(inputs.video))
+            return inputs.video_frames
+
+        return run
+
+    def drones(image: Path, tiled: bool | None) -> Run:
+        from Backend.BorderAnomly.drones.detector import detect_drones
+        from Backend.common.images import load_frame
+
+        output = _output(inputs, "drones", ".jpg")
+
+        def run() -> int:
+            # Decode per call like a request would; detect_drones draws onto the frame
+            frame = load_frame(str(image))
+            detect_drones(frame, output_path=str(output()) if render else None, write=False, tiled=tiled)
+            return 1
+
+        return run
+
+    return [
+        BenchCase("ids_predict_from_csv", "inprocess", "rows", ids),
+        BenchCase("classifier", "inprocess", "emails", classifier),
+        BenchCase("anomaly_analyze_video", "inprocess", "frames", anomaly_video),
+        BenchCase("weapon_analyze_video", "inprocess", "frames", weapon_video),
+        BenchCase("face_recognize_video", "inprocess", "frames", face_video),
+        BenchCase("human_detect_humans", "inprocess", "frames", humans_video),
+        BenchCase("drones_detect", "inprocess", "images", lambda: drones(inputs.image, False)),
+        BenchCase("drones_detect_4k_full", "inprocess", "images", lambda: drones(inputs.large_image, False)),
+        BenchCase("drones_detect_4k_tiled", "inprocess", "images", lambda: drones(inputs.large_image, True)),
+    ]
+
+
+# The email classifier has no upload endpoint (/email-classify reads the mailbox), so it is
+# only benchmarked in-process
+HTTP_ENDPOINTS: Dict[str, tuple] = {
+    "ids_predict": ("/ids-predict", "csv", "rows", "text/csv"),
+    "drones_detect": ("/border/drones/detect", "image", "images", "image/jpeg"),
+    "humans_detect": ("/border/humans/detect", "video", "frames", "video/mp4"),
+    "suspicious_detect": ("/border/suspicious/detect", "video", "frames", "video/mp4"),
+    "anomaly_detect": ("/surveillance/anomaly/detect", "video", "frames", "video/mp4"),
+    "weapon_detect": ("/surveillance/weapon/detect", "video", "frames", "video/mp4"),
+    "face_recognize": ("/surveillance/face/recognize", "video", "frames", "video/mp4"),
+}
+
+
+def http_cases(inputs: Inputs, base_url: str, render: bool = True, timeout: float = 600.0) -> List[BenchCase]:
+    """The same work through the running API (upload, scheduling, encoding included)."""
+
+    sources = {
+        "csv": (inputs.csv, inputs.csv_rows),
+        "image": (inputs.image, 1),
+        "video": (inputs.video, inputs.video_frames),
+    }
+
+    def endpoint(path: str, kind: str, content_type: str) -> Run:
+        import httpx
+
+        source, units = sources[kind]
+        data = source.read_bytes()
+        client = httpx.Client(base_url=base_url, timeout=timeout)
+        params = {} if render or kind == "csv" else {"render": "false"}
+
+        def run() -> int:
+            response = client.post(path, params=params, files={"file": (source.name, data, content_type)})
+            response.raise_for_status()
+            return units
+
+        return run
+
+    return [
+        BenchCase(name, "http", unit, lambda path=path, kind=kind, content_type=content_type: endpoint(path, kind, content_type))
+        for name, (path, kind, unit, content_type) in HTTP_ENDPOINTS.items()
+    ]
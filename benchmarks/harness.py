@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = Path(os.getenv("BENCH_RESULTS_DIR", str(REPO_DIR / "benchmarks" / "results")))
+# Settings that change performance and therefore belong to every result file
+RELEVANT_ENV = (
+    "INFERENCE_BACKEND",
+    "INFERENCE_INT8",
+    "DETECTOR_IMGSZ",
+    "DRONE_TILING",
+    "BATCH_MAX_SIZE",
+    "ARTIFACT_FSYNC",
+    "VIDEO_ENCODER",
+    "OMP_NUM_THREADS",
+)
+
+# A call returns how many units (frames, rows, emails, images) it processed
+Run = Callable[[], int]
+
+
+@dataclass
+class BenchCase:
+    """``setup()`` loads models / media (untimed) and returns the callable to time."""
+
+    name: str
+    mode: str
+    unit: str
+    setup: Callable[[], Run]
+    description: str = ""
+
+
+@dataclass
+class CaseResult:
+    name: str
+    mode: str
+    unit: str
+    calls: int = 0
+    units: int = 0
+    concurrency: int = 1
+    setup_ms: float = 0.0
+    mean_ms: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    throughput: float = 0.0  # units per second of wall time
+    error: str | None = None
+    latencies_ms: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def key(self) -> str:
+        return f"{self.mode}:{self.name}"
+
+
+def run_case(case: BenchCase, repeat: int, warmup: int = 1, concurrency: int = 1) -> CaseResult:
+    """Time ``repeat`` calls after ``warmup`` untimed ones; ``concurrency`` > 1 issues
+    calls from that many threads (throughput is then measured under load)."""
+
+    result = CaseResult(case.name, case.mode, case.unit, concurrency=max(1, concurrency))
+    try:
+        started = time.perf_counter()
+        run = case.setup()
+        result.setup_ms = round(1000 * (time.perf_counter() - started), 2)
+        for _ in range(max(0, warmup)):
+            run()
+
+        def timed() -> tuple[float, int]:
+            call_started = time.perf_counter()
+            units = run()
+            return time.perf_counter() - call_started, units
+
+        wall_started = time.perf_counter()
+        if result.concurrency == 1:
+            samples = [timed() for _ in range(repeat)]
+        else:
+            with ThreadPoolExecutor(result.concurrency) as pool:
+                samples = list(pool.map(lambda _: timed(), range(repeat)))
+        wall = time.perf_counter() - wall_started
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+        if os.getenv("BENCH_TRACEBACK"):
+            traceback.print_exc()
+        return result
+
+    latencies = np.array([seconds for seconds, _ in samples]) * 1000.0
+    result.calls = len(samples)
+    result.units = int(sum(units for _, units in samples))
+    result.latencies_ms = [round(value, 3) for value in latencies.tolist()]
+    result.mean_ms = round(float(latencies.mean()), 3)
+    result.p50_ms, result.p95_ms, result.p99_ms = (
+        round(float(value), 3) for value in np.percentile(latencies, [50, 95, 99])
+    )
+    result.throughput = round(result.units / wall, 3) if wall > 0 else 0.0
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "env": {name: os.environ[name] for name in RELEVANT_ENV if name in os.environ},
+    }
+
+
+def save_results(results: Sequence[CaseResult], meta: Dict[str, Any], directory: Path = RESULTS_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = directory / f"{stamp}-{meta.get('commit') or 'nocommit'}.json"
+    path.write_text(json.dumps({"meta": meta, "results": [asdict(result) for result in results]}, indent=2))
+    return path
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Any]]:
+    payload = json.loads(Path(path).read_text())
+    return {f"{item['mode']}:{item['name']}": item for item in payload["results"]}
+
+
+def latest_results(directory: Path = RESULTS_DIR, exclude: Path | None = None) -> Path | None:
+    candidates = sorted(path for path in directory.glob("*.json") if path != exclude)
+    return candidates[-1] if candidates else None
+
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]],
+    results: Sequence[CaseResult],
+    tolerance: float = 0.15,
+) -> List[Dict[str, Any]]:
+    """Cases whose p50 / p95 latency grew or whose throughput fell by more than ``tolerance``."""
+
+    regressions: List[Dict[str, Any]] = []
+    for result in results:
+        before = baseline.get(result.key)
+        if result.error or not before or before.get("error"):
+            continue
+        for metric, worse in (("p95_ms", 1), ("p50_ms", 1), ("throughput", -1)):
+            old, new = float(before.get(metric) or 0.0), float(getattr(result, metric))
+            if old <= 0:
+                continue
+            change = (new - old) / old
+            if worse * change > tolerance:
+                regressions.append({"case": result.key, "metric": metric, "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+def format_table(results: Sequence[CaseResult]) -> str:
+    header = f"{'case':<36}{'calls':>6}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'throughput':>18}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        if result.error:
+            lines.append(f"{result.key:<36}  skipped: {result.error}")
+            continue
+        rate = f"{result.throughput:.2f} {result.unit}/s"
+        lines.append(
+            f"{result.key:<36}{result.calls:>6}{result.p50_ms:>11.1f}{result.p95_ms:>11.1f}{result.p99_ms:>11.1f}{rate:>18}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from benchmarks.harness import REPO_DIR
+
+SEED = 1234
+BUNDLED_VIDEO = REPO_DIR / "Backend" / "BorderAnomly" / "uploads" / "istockphoto-1391833001-640_adpp_is.mp4"
+BUNDLED_DRONE_IMAGE = REPO_DIR / "Backend" / "BorderAnomly" / "drones" / "d2.jpeg"
+BUNDLED_CSV = REPO_DIR / "Backend" / "AIThreatIntelligence" / "Datasets" / "df_sample_500.csv"
+
+_EMAIL_TEMPLATES = (
+    "Your account has been suspended. Verify your password at http://secure-login.example.com now",
+    "Hi team, the quarterly report is attached. Let me know if you have questions before Friday.",
+    "Congratulations! You won a $1000 gift card. Click here to claim your prize within 24 hours.",
+    "Reminder: the patrol schedule for next week has been updated in the shared drive.",
+    "Urgent wire transfer needed today, reply with the bank details and keep this confidential.",
+    "Minutes from yesterday's meeting are below, please review the action items.",
+)
+
+
+def synthetic_video(path: Path, frames: int = 120, size: Tuple[int, int] = (1280, 720), fps: float = 25.0) -> Path:
+    """Deterministic test clip: textured background with a few moving blobs."""
+
+    path = Path(path)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(SEED)
+    width, height = size
+    background = rng.integers(60, 200, (height // 8, width // 8, 3), dtype=np.uint8)
+    background = cv2.resize(background, (width, height), interpolation=cv2.INTER_CUBIC)
+    movers = rng.uniform([0, 0, -6, -4], [width, height, 6, 4], (5, 4))
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    try:
+        for _ in range(frames):
+            frame = background.copy()
+            movers[:, :2] = (movers[:, :2] + movers[:, 2:]) % (width, height)
+            for x, y, _, _ in movers:
+                cv2.rectangle(frame, (int(x), int(y)), (int(x) + 60, int(y) + 140), (30, 30, 30), -1)
+                cv2.circle(frame, (int(x) + 30, int(y) - 20), 20, (40, 40, 40), -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def synthetic_sky(path: Path, size: Tuple[int, int] = (3840, 2160), targets: int = 6) -> Path:
+    """4K sky gradient with a few small dark targets (distant drones)."""
+
+    path = Path(path)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(SEED)
+    width, height = size
+    gradient = np.linspace(235, 150, height, dtype=np.float32)[:, None, None]
+    frame = np.broadcast_to(gradient * np.array([1.0, 0.85, 0.6], dtype=np.float32), (height, width, 3)).astype(np.uint8)
+    frame = np.ascontiguousarray(frame)
+    for x, y in rng.integers([0, 0], [width - 40, height // 2], (targets, 2)):
+        cv2.rectangle(frame, (int(x), int(y)), (int(x) + 18, int(y) + 6), (25, 25, 25), -1)
+        cv2.line(frame, (int(x) - 6, int(y)), (int(x) + 24, int(y)), (25, 25, 25), 1)
+    cv2.imwrite(str(path), frame)
+    return path
+
+
+def synthetic_emails(count: int = 50) -> List[str]:
+    rng = np.random.default_rng(SEED)
+    return [_EMAIL_TEMPLATES[index] for index in rng.integers(0, len(_EMAIL_TEMPLATES), count)]
+
+
+def frame_count(path: Path) -> int:
+    cap = cv2.VideoCapture(str(path))
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    finally:
+        cap.release()
+
+
+def csv_rows(path: Path) -> int:
+    with open(path, "rb") as handle:
+        return max(0, sum(1 for _ in handle) - 1)
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from Backend.common import profiling
+from Backend.common.batching import MicroBatcher
+
+
+class SlowModel:
+    """Records every batch and fails if it is ever entered concurrently."""
+
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.batches = []
+        self._inside = threading.Lock()
+
+    def __call__(self, items, **kwargs):
+        assert self._inside.acquire(blocking=False), "model called concurrently"
+        try:
+            self.batches.append((list(items), kwargs))
+            time.sleep(self.seconds)
+            return [(item, kwargs.get("conf")) for item in items]
+        finally:
+            self._inside.release()
+
+
+def _call_concurrently(batcher, calls):
+    results = {}
+
+    def call(index, item, kwargs):
+        results[index] = batcher(item, **kwargs)
+
+    threads = []
+    for index, (item, kwargs) in enumerate(calls):
+        thread = threading.Thread(target=call, args=(index, item, kwargs))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.002)
+    for thread in threads:
+        thread.join()
+    return [results[index] for index in range(len(calls))]
+
+
+def test_lone_call_runs_without_waiting():
+    model = SlowModel(seconds=0)
+    batcher = MicroBatcher(model)
+    started = time.perf_counter()
+    assert batcher("a", conf=0.5) == ("a", 0.5)
+    assert time.perf_counter() - started < 0.02
+    assert model.batches == [(["a"], {"conf": 0.5})]
+
+
+def test_calls_arriving_while_busy_share_the_next_batch():
+    model = SlowModel()
+    batcher = MicroBatcher(model, max_batch=8)
+    results = _call_concurrently(batcher, [(index, {"conf": 0.5}) for index in range(6)])
+
+    assert results == [(index, 0.5) for index in range(6)]
+    assert [len(items) for items, _ in model.batches] == [1, 5]
+    assert batcher.stats() == {"batches": 2, "items": 6, "mean_batch": 3.0}
+
+
+def test_only_equal_keyword_arguments_share_a_batch():
+    model = SlowModel()
+    batcher = MicroBatcher(model)
+    calls = [("first", {"conf": 0.5})] + [(index, {"conf": 0.25 if index % 2 else 0.5}) for index in range(4)]
+    results = _call_concurrently(batcher, calls)
+
+    assert results[0] == ("first", 0.5)
+    assert results[1:] == [(index, 0.25 if index % 2 else 0.5) for index in range(4)]
+    batches = sorted((kwargs["conf"], items) for items, kwargs in model.batches[1:])
+    assert batches == [(0.25, [1, 3]), (0.5, [0, 2])]
+
+
+def test_map_splits_large_batches():
+    model = SlowModel(seconds=0)
+    batcher = MicroBatcher(model, max_batch=4)
+    assert batcher.map(list(range(10)), conf=1.0) == [(index, 1.0) for index in range(10)]
+    assert [len(items) for items, _ in model.batches] == [4, 4, 2]
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    def broken(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(broken)
+    with pytest.raises(RuntimeError, match="boom"):
+        batcher("x")
+    assert batcher.stats()["batches"] == 0
+
+
+def test_batch_time_is_shared_between_callers():
+    model = SlowModel()
+    batcher = MicroBatcher(model)
+    sessions = [profiling.ProfileSession(f"call-{index}") for index in range(6)]
+
+    def call(index):
+        context = profiling.activate(sessions[index])
+        try:
+            batcher(index)
+        finally:
+            profiling.deactivate(context)
+
+    threads = []
+    for index in range(6):
+        thread = threading.Thread(target=call, args=(index,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.002)
+    for thread in threads:
+        thread.join()
+
+    assert [len(items) for items, _ in model.batches] == [1, 5]
+    # The lone first call pays for its batch; the five others split theirs, and
+    # whoever ran it notes the four items it ran for the others
+    assert sessions[0].batch_share == pytest.approx(0.05, abs=0.02)
+    assert sessions[0].batch_others == 0
+    assert [session.batch_share for session in sessions[1:]] == pytest.approx([0.01] * 5, abs=0.005)
+    assert sum(session.batch_others for session in sessions) == pytest.approx(0.04, abs=0.02)
@@ -0,0 +1,87 @@
+from Backend.common.blob_store import BlobStore
+
+
+def test_identical_uploads_share_one_blob(tmp_path):
+    store = BlobStore(tmp_path)
+    first = store.put(b"frame bytes", "a.MP4")
+    second = store.put(b"frame bytes", "b.mp4")
+
+    assert not first.deduplicated and second.deduplicated
+    assert first.path == second.path and first.digest == second.digest
+    assert first.path.suffix == ".mp4" and first.stem == "a" and first.size == 11
+    # Two levels of hash-prefixed shards
+    assert first.path.relative_to(tmp_path).parts[:2] == (first.digest[:2], first.digest[2:4])
+    assert first.path.read_bytes() == b"frame bytes"
+    assert not list(first.path.parent.glob(".*.tmp"))
+
+
+def test_resolve_maps_public_names_to_blobs(tmp_path):
+    store = BlobStore(tmp_path)
+    stored = store.put(b"one", "clip.mp4")
+    assert store.resolve("clip.mp4") == stored.path
+    assert store.resolve("unknown.mp4") is None
+
+    # Re-using a name points it at the new content
+    replaced = store.put(b"two", "clip.mp4")
+    assert store.resolve("clip.mp4") == replaced.path != stored.path
+
+    # The mapping survives a restart
+    assert BlobStore(tmp_path).resolve("clip.mp4") == replaced.path
+
+
+def test_custom_writer_only_runs_for_new_blobs(tmp_path):
+    store = BlobStore(tmp_path)
+    written = []
+
+    def writer(path, data):
+        written.append(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    store.put(b"payload", "a.jpg", writer=writer)
+    store.put(b"payload", "b.jpg", writer=writer)
+    assert len(written) == 1
+
+
+
+def test_blobs_still_being_written_are_not_written_again(tmp_path):
+    queued = {}
+    store = BlobStore(tmp_path, is_pending=lambda path: path in queued)
+
+    first = store.put(b"payload", "a.jpg", writer=queued.__setitem__)
+    # The queued write has not reached the disk yet
+    second = store.put(b"payload", "b.jpg", writer=queued.__setitem__)
+
+    assert not first.deduplicated and second.deduplicated
+    assert list(queued) == [first.path] and not first.path.exists()
+    assert store.resolve("b.jpg") == first.path
+
+def test_prune_forgets_names_of_deleted_blobs(tmp_path):
+    store = BlobStore(tmp_path)
+    gone = store.put(b"old", "old.mp4")
+    store.put(b"new", "new.mp4")
+    gone.path.unlink()
+
+    assert store.prune() == 1
+    assert store.resolve("old.mp4") is None
+    assert store.resolve("new.mp4") is not None
+    assert store.prune() == 0
+    # The emptied shard directories go too, shared ones stay
+    assert not gone.path.parent.exists() and not gone.path.parent.parent.exists()
+    assert store.resolve("new.mp4").parent.is_dir()
+
+
+def test_find_matches_the_suffix_in_any_case(tmp_path):
+    store = BlobStore(tmp_path)
+    upload = store.put(b"pixels", "IMG_1.JPG")
+    store.put(b"notes", "IMG_1.txt")
+    store.put(b"other", "IMGx1.jpg")
+
+    assert store.find("IMG_1", (".jpg", ".png")) == upload.path
+    assert store.find("IMG_1", (".png",)) is None
+    assert store.find("IMGx1", (".jpg",)) == store.resolve("IMGx1.jpg")
+    assert store.find("img_1") is None
+
+    # A deleted blob is not found, and "_" does not match the "x" of IMGx1.jpg
+    upload.path.unlink()
+    assert store.find("IMG_1", (".jpg",)) is None
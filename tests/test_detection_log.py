@@ -0,0 +1,57 @@
+import math
+
+import pytest
+
+from Backend.common.detection_log import DetectionLog, iter_log_chunks, query_log
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    # flush_rows=2 spreads the rows over several chunks, so filters and limits cross chunks
+    log = DetectionLog(tmp_path / "clip_detections", fps=10.0, flush_rows=2)
+    log.append(0, [{"label": "person", "confidence": 0.9, "bbox": [0, 0, 10, 10], "track_id": 1}], [True])
+    log.append(1, [{"label": "car", "confidence": 0.4, "bbox": [5, 5, 20, 20]}], [False])
+    log.append(5, [
+        {"label": "person", "confidence": 0.6, "bbox": [1, 1, 11, 11], "track_id": 1},
+        {"label": "truck", "bbox": [30, 30, 60, 60]},
+    ], [False, True])
+    log.append(9, [{"label": "car", "confidence": 0.8, "bbox": [7, 7, 9, 9]}], [True])
+    summary = log.close()
+    assert summary["detection_log_rows"] == 5
+    return log.path
+
+
+def test_rows_round_trip_in_chunks(log_path):
+    chunks = list(iter_log_chunks(log_path))
+    assert len(chunks) > 1
+    rows = query_log(log_path)
+    assert [row["frame"] for row in rows] == [0, 1, 5, 5, 9]
+    first = rows[0]
+    assert first["label"] == "person" and first["track"] == 1 and first["flagged"]
+    assert first["time_sec"] == pytest.approx(0.0)
+    assert rows[2]["time_sec"] == pytest.approx(0.5)
+    assert (rows[0]["x1"], rows[0]["y2"]) == (0, 10)
+    # Missing values: no track id -> -1, no confidence -> NaN
+    assert rows[1]["track"] == -1
+    assert math.isnan(rows[3]["confidence"])
+
+
+def test_frame_range_is_inclusive(log_path):
+    assert [row["frame"] for row in query_log(log_path, frame_start=1, frame_end=5)] == [1, 5, 5]
+
+
+def test_label_confidence_and_flag_filters(log_path):
+    assert [row["frame"] for row in query_log(log_path, labels=["car"])] == [1, 9]
+    assert [row["label"] for row in query_log(log_path, min_confidence=0.6)] == ["person", "person", "car"]
+    assert [row["label"] for row in query_log(log_path, flagged=True)] == ["person", "truck", "car"]
+    assert [row["frame"] for row in query_log(log_path, labels=["person", "car"], flagged=False)] == [1, 5]
+
+
+def test_limit_stops_the_scan(log_path):
+    assert [row["frame"] for row in query_log(log_path, limit=3)] == [0, 1, 5]
+
+
+def test_empty_log_is_readable(tmp_path):
+    log = DetectionLog(tmp_path / "empty_detections")
+    assert log.close()["detection_log_rows"] == 0
+    assert query_log(log.path) == []
@@ -0,0 +1,73 @@
+import pytest
+
+from Backend.common.detection_log import DetectionLog
+from Backend.common.event_index import EventIndex
+
+T0 = 1_700_000_000.0
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = EventIndex(tmp_path / "events.sqlite3")
+    index.add(
+        "weapon",
+        [
+            {"label": "pistol", "confidence": 0.9, "bbox": [1, 2, 3, 4], "frame_index": 0},
+            {"label": "knife", "confidence": 0.4, "frame_index": 20},
+        ],
+        kind="alert",
+        source="gate-cam",
+        upload="a.mp4",
+        ts=T0,
+        fps=10.0,
+    )
+    index.add("anomaly", [{"label": "person", "confidence": 0.7, "event": "enter", "time_sec": 5.0}], source="yard", ts=T0)
+    index.flush()
+    return index
+
+
+def test_query_filters_and_order(index):
+    rows = index.query()
+    assert [row["ts"] for row in rows] == sorted((row["ts"] for row in rows), reverse=True)
+    assert [row["label"] for row in rows] == ["person", "knife", "pistol"]
+
+    assert [row["label"] for row in index.query(module="weapon")] == ["knife", "pistol"]
+    assert [row["label"] for row in index.query(labels=["pistol", "person"])] == ["person", "pistol"]
+    assert [row["label"] for row in index.query(min_confidence=0.5)] == ["person", "pistol"]
+    assert [row["label"] for row in index.query(source="yard")] == ["person"]
+    assert [row["label"] for row in index.query(kind="enter")] == ["person"]
+    assert [row["label"] for row in index.query(since=T0 + 1, until=T0 + 4)] == ["knife"]
+    assert [row["label"] for row in index.query(limit=1, offset=1)] == ["knife"]
+
+
+def test_event_fields_are_stored(index):
+    pistol = index.query(labels=["pistol"])[0]
+    assert (pistol["x1"], pistol["y1"], pistol["x2"], pistol["y2"]) == (1, 2, 3, 4)
+    assert pistol["frame"] == 0 and pistol["upload"] == "a.mp4" and pistol["kind"] == "alert"
+    # frame 20 at 10 fps is two seconds into the upload
+    assert index.query(labels=["knife"])[0]["ts"] == pytest.approx(T0 + 2.0)
+
+
+def test_add_log_indexes_flagged_rows_in_the_background(index, tmp_path):
+    log = DetectionLog(tmp_path / "cam_detections", fps=5.0, flush_rows=1)
+    log.append(10, [{"label": "drone", "confidence": 0.8, "bbox": [0, 0, 4, 4]}], [True])
+    log.append(11, [{"label": "bird", "confidence": 0.3, "bbox": [0, 0, 4, 4]}], [False])
+    log.close()
+
+    assert index.add_log("drone", log.path, source="sky", ts=T0 + 100) is None
+    index.flush()
+    rows = index.query(module="drone")
+    assert [(row["label"], row["frame"], row["source"]) for row in rows] == [("drone", 10, "sky")]
+    assert rows[0]["ts"] == pytest.approx(T0 + 102.0)
+
+    index.add_log("drone", log.path, kind="detection", flagged_only=False, ts=T0 + 200)
+    index.flush()
+    assert sorted(row["label"] for row in index.query(module="drone", kind="detection")) == ["bird", "drone"]
+
+
+def test_missing_log_does_not_stop_indexing(index, tmp_path):
+    index.add_log("face", tmp_path / "gone.npy")
+    index.add("face", [{"label": "alice", "confidence": 0.99}], ts=T0 + 50)
+    index.flush()
+    assert [row["label"] for row in index.query(module="face")] == ["alice"]
+    assert index.queued == 0
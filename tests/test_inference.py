@@ -0,0 +1,30 @@
+import numpy as np
+
+from Backend.common.inference import CALIBRATION_DIRS, calibration_images, letterbox
+
+
+def test_calibration_images_come_from_the_models_own_domain():
+    weapon = calibration_images("weapon")
+    assert weapon and all(CALIBRATION_DIRS["weapon"][0] in path.parents for path in weapon)
+    assert not set(weapon) & set(calibration_images("drones"))
+    assert calibration_images("suspicious") == []
+    assert len(calibration_images("drones", limit=1)) == 1
+
+
+def test_site_footage_is_looked_up_per_model(tmp_path, monkeypatch):
+    (tmp_path / "weapon").mkdir()
+    (tmp_path / "weapon" / "gate.PNG").write_bytes(b"")
+    (tmp_path / "drones").mkdir()
+    (tmp_path / "drones" / "sky.jpg").write_bytes(b"")
+    monkeypatch.setenv("INFERENCE_CALIBRATION_DIR", str(tmp_path))
+    assert calibration_images("weapon")[0] == tmp_path / "weapon" / "gate.PNG"
+    assert calibration_images("suspicious") == []
+
+
+def test_letterbox_pads_to_a_square_rgb_tensor():
+    image = np.zeros((20, 40, 3), dtype=np.uint8)
+    image[..., 2] = 255  # red in BGR
+    tensor = letterbox(image, imgsz=32)
+    assert tensor.shape == (3, 32, 32) and tensor.dtype == np.float32
+    assert tensor[0, 16, 16] == 1.0 and tensor[2, 16, 16] == 0.0
+    assert np.allclose(tensor[:, 0, 0], 114 / 255)
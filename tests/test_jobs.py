@@ -0,0 +1,69 @@
+import asyncio
+
+from Backend.common import jobs
+from Backend.common.jobs import Job, JobRegistry
+
+
+def _collect(job):
+    async def collect():
+        return [event async for event in job.events()]
+
+    return asyncio.run(collect())
+
+
+def test_late_subscriber_of_a_finished_job_gets_the_result():
+    job = Job("drone")
+    job.start()
+    job.publish({"type": "progress", "frames_processed": 3})
+    job.finish({"ok": True})
+
+    events = _collect(job)
+    assert [event["type"] for event in events] == ["status", "progress", "result"]
+    assert [event["seq"] for event in events] == [1, 2, 3]
+    assert events[-1]["result"] == {"ok": True}
+    assert job.finished and job.finished_at is not None and job.frames_processed == 3
+
+
+def test_live_subscriber_stops_after_the_terminal_event():
+    async def scenario():
+        job = Job("face")
+        job.start()
+        events = []
+
+        async def read():
+            async for event in job.events():
+                events.append(event["type"])
+
+        reader = asyncio.create_task(read())
+        await asyncio.sleep(0)
+        job.publish({"type": "alert", "label": "intruder"})
+        job.fail("boom", status_code=422)
+        await asyncio.wait_for(reader, 1)
+        return job, events
+
+    job, events = asyncio.run(scenario())
+    assert events == ["status", "alert", "error"]
+    assert job.status == "failed" and job.error == {"detail": "boom", "status_code": 422}
+
+
+def test_alerts_outlive_the_per_frame_history(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_HISTORY_LIMIT", 3)
+    job = Job("weapon")
+    job.start()
+    job.publish({"type": "alert", "label": "pistol", "frame_index": 0})
+    for frame in range(10):
+        job.publish({"type": "detections", "frame_index": frame})
+    job.finish({})
+
+    events = _collect(job)
+    assert [event["type"] for event in events] == ["status", "alert", "detections", "detections", "detections", "result"]
+    assert [event["frame_index"] for event in events if event["type"] == "detections"] == [7, 8, 9]
+
+
+def test_cancel_only_running_jobs():
+    registry = JobRegistry()
+    job = registry.create("human")
+    assert registry.get(job.id) is job
+    assert job.cancel("client") and job.token.reason == "client"
+    job.finish({})
+    assert not job.cancel()
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from Backend.Survilleance.app.Object_tracking import ByteTracker, Track, ZoneAnalytics, greedy_match, iou_matrix
+from Backend.Survilleance.app.Restricted_zones import zone_set_from_dict
+
+NAMES = {0: "person", 1: "car"}
+ZONES = zone_set_from_dict({
+    "zones": [
+        {"name": "yard", "rect": [0, 0, 50, 50], "dwell_seconds": 2},
+        {"name": "gate", "rect": [150, 150, 200, 200]},
+    ],
+    "lines": [{"name": "fence", "points": [[100, 0], [100, 200]]}],
+})
+SHAPE = (200, 200)
+
+
+def _boxes(*boxes):
+    boxes = np.array(boxes, dtype=np.float32).reshape(-1, 4)
+    return boxes, np.full(len(boxes), 0.9, dtype=np.float32), np.zeros(len(boxes), dtype=np.int64)
+
+
+def _track(center, track_id=1, class_id=0):
+    x, y = center
+    return Track(track_id, np.array([x - 5, y - 5, x + 5, y + 5], dtype=np.float32), class_id, 0.9, first_frame=0)
+
+
+def test_iou_and_greedy_match():
+    a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    b = np.array([[20, 20, 30, 30], [0, 0, 10, 5]], dtype=np.float32)
+    scores = iou_matrix(a, b)
+    assert scores[0, 1] == pytest.approx(0.5) and scores[1, 0] == pytest.approx(1.0)
+    assert greedy_match(scores, 0.3) == [(1, 0), (0, 1)]
+    assert greedy_match(scores, 0.6) == [(1, 0)]
+
+
+def test_track_ids_persist_and_new_tracks_need_confirmation():
+    tracker = ByteTracker(min_hits=2)
+    visible, _ = tracker.step(*_boxes([0, 0, 10, 10]))
+    assert [track.track_id for track in visible] == [1]
+
+    visible, _ = tracker.step(*_boxes([2, 0, 12, 10], [100, 100, 110, 110]))
+    # The newcomer is not reported until it has been matched twice
+    assert [track.track_id for track in visible] == [1]
+
+    visible, _ = tracker.step(*_boxes([4, 0, 14, 10], [101, 100, 111, 110]))
+    assert sorted(track.track_id for track in visible) == [1, 2]
+    assert tracker.tracks_created == 2
+
+
+def test_low_confidence_detections_keep_tracks_alive_but_never_start_them():
+    tracker = ByteTracker(high_thresh=0.5, low_thresh=0.1)
+    tracker.step(*_boxes([0, 0, 10, 10]))
+    visible, _ = tracker.step(np.array([[1, 0, 11, 10], [50, 50, 60, 60]]), np.array([0.2, 0.3]), np.array([0, 0]))
+    assert [track.track_id for track in visible] == [1]
+    assert tracker.tracks_created == 1
+
+
+def test_classes_do_not_match_each_other():
+    tracker = ByteTracker()
+    tracker.step(*_boxes([0, 0, 10, 10]))
+    tracker.step(np.array([[0, 0, 10, 10]]), np.array([0.9]), np.array([1]))
+    assert tracker.tracks_created == 2
+
+
+def test_lost_tracks_coast_then_are_removed():
+    tracker = ByteTracker(max_missed=2)
+    tracker.step(*_boxes([0, 0, 10, 10]))
+    tracker.step(*_boxes([4, 0, 14, 10]))
+    visible, removed = tracker.step()
+    # Skipped frames move the track by its velocity without counting a miss
+    assert visible[0].bbox[0] > 4 and visible[0].missed == 0
+
+    empty = _boxes()
+    for _ in range(2):
+        visible, removed = tracker.step(*empty)
+        assert visible == [] and removed == []
+    visible, removed = tracker.step(*empty)
+    assert [track.track_id for track in removed] == [1] and tracker.tracks == []
+
+
+def test_dwell_alert_uses_stream_time():
+    analytics = ZoneAnalytics(ZONES, NAMES, fps=30)
+    track = _track((20, 20))
+    enter = analytics.update([track], [], 0, SHAPE, time_sec=0.0)
+    assert [(event["event"], event["zone"]) for event in enter] == [("enter", "yard")]
+    # A zone with a dwell threshold only alerts once the object has stayed long enough
+    assert not analytics.is_alert(enter[0])
+
+    # 30 frames, but only 1.9 s of stream time (e.g. a variable frame rate source)
+    assert analytics.update([track], [], 30, SHAPE, time_sec=1.9) == []
+    dwell = analytics.update([track], [], 31, SHAPE, time_sec=2.1)
+    assert [(event["event"], event["dwell_sec"], event["time_sec"]) for event in dwell] == [("dwell", 2.1, 2.1)]
+    assert analytics.is_alert(dwell[0])
+    assert analytics.update([track], [], 40, SHAPE, time_sec=3.0) == []
+
+    exits = analytics.finish([track], 50, time_sec=4.0)
+    assert [(event["event"], event["dwell_sec"]) for event in exits] == [("exit", 4.0)]
+
+
+def test_frame_index_fallback_and_enter_alerts():
+    analytics = ZoneAnalytics(ZONES, NAMES, fps=10)
+    track = _track((175, 175))
+    enter = analytics.update([track], [], 20, SHAPE)
+    assert enter[0]["zone"] == "gate" and enter[0]["time_sec"] == 2.0
+    assert analytics.is_alert(enter[0])
+    exits = analytics.update([_track((120, 120))], [], 25, SHAPE)
+    assert [(event["event"], event["dwell_sec"]) for event in exits] == [("exit", 0.5)]
+
+    with pytest.raises(ValueError):
+        ZoneAnalytics(ZONES, NAMES, fps=0).update([track], [], 1, SHAPE)
+
+
+def test_line_crossings_are_counted_per_direction():
+    analytics = ZoneAnalytics(ZONES, NAMES, fps=10)
+    analytics.update([_track((90, 100))], [], 0, SHAPE)
+    events = analytics.update([_track((110, 100))], [], 1, SHAPE)
+    assert [(event["event"], event["line"], event["direction"]) for event in events] == [("line_cross", "fence", "out")]
+    analytics.update([_track((90, 100))], [], 2, SHAPE)
+    # Moving along the line does not cross it
+    analytics.update([_track((90, 150))], [], 3, SHAPE)
+    assert analytics.line_counts == {"fence": {"in": 1, "out": 1}}
@@ -0,0 +1,24 @@
+import cv2
+import numpy as np
+
+from Backend.common.rendering import OverlayRenderer
+
+
+def _static(layer):
+    cv2.line(layer, (0, 5), (19, 5), (0, 0, 0), 1)
+    cv2.line(layer, (0, 10), (19, 10), (0, 0, 255), 1)
+
+
+def test_cached_static_overlay_matches_direct_drawing():
+    renderer = OverlayRenderer(static=_static)
+    for value in (100, 0, 255):
+        frame = np.full((20, 20, 3), value, dtype=np.uint8)
+        expected = frame.copy()
+        _static(expected)
+        assert np.array_equal(renderer.render(frame, []), expected)
+
+
+def test_black_strokes_on_grayscale_frames_are_kept():
+    renderer = OverlayRenderer(static=lambda layer: cv2.line(layer, (0, 5), (19, 5), 0, 1))
+    frame = renderer.render(np.full((20, 20), 100, dtype=np.uint8), [])
+    assert (frame[5] == 0).all() and (frame[6] == 100).all()
@@ -0,0 +1,80 @@
+import json
+import os
+
+import numpy as np
+
+from Backend.Survilleance.app.Restricted_zones import clear_zone_cache, load_zone_set, zone_set_from_dict
+
+CONFIG = {
+    "frame_size": [100, 50],
+    "zones": [
+        {"name": "gate", "rect": [0, 0, 40, 40]},
+        {"name": "yard", "rect": [20, 10, 80, 40], "classes": ["person"], "dwell_seconds": 2},
+    ],
+    "lines": [{"name": "fence", "points": [[50, 0], [50, 50]]}],
+}
+NAMES = {0: "person", 1: "car"}
+
+
+def test_mask_sets_one_bit_per_zone():
+    zones = zone_set_from_dict(CONFIG, camera_id="cam")
+    mask = zones.mask_for((50, 100))
+    assert mask.dtype == np.uint8 and mask.shape == (50, 100)
+    assert mask[5, 5] == 0b01
+    assert mask[20, 30] == 0b11
+    assert mask[20, 60] == 0b10
+    assert mask[45, 90] == 0
+    assert zones.mask_for((50, 100)) is mask
+
+
+def test_polygons_scale_to_the_frame():
+    zones = zone_set_from_dict(CONFIG)
+    mask = zones.mask_for((100, 200))
+    # (60, 40) in the 100x50 reference frame is inside "yard" only
+    assert mask[40 * 2, 60 * 2] == 0b10
+    assert zones.scaled_lines((100, 200))[0].tolist() == [[100, 0], [100, 100]]
+
+
+def test_match_honours_zone_classes_and_frame_bounds():
+    zones = zone_set_from_dict(CONFIG)
+    centers = np.array([[30, 20], [30, 20], [60, 20], [-5, 20], [150, 20]])
+    class_ids = np.array([0, 1, 1, 0, 0])
+    bits = zones.match(centers, class_ids, NAMES, (50, 100))
+    assert bits.tolist() == [0b11, 0b01, 0, 0, 0]
+    assert zones.membership(bits).tolist() == [[True, True], [True, False], [False, False], [False, False], [False, False]]
+
+
+def test_class_bits_follow_the_names_not_the_object():
+    zones = zone_set_from_dict(CONFIG)
+    names = dict(NAMES)
+    assert zones.class_bits(names).tolist() == [0b11, 0b01]
+    # A reloaded model may reuse the same dict (and id) with other classes
+    names.clear()
+    names.update({0: "car", 1: "person"})
+    assert zones.class_bits(names).tolist() == [0b01, 0b11]
+    assert zones.class_bits(["person", "car"]).tolist() == [0b11, 0b01]
+
+
+def test_many_zones_widen_the_mask():
+    config = {"zones": [{"rect": [index, 0, index + 1, 1]} for index in range(20)]}
+    zones = zone_set_from_dict(config)
+    assert zones.mask_for((4, 40)).dtype == np.uint32
+    assert zones.zones[19].name == "zone_19"
+
+
+def test_zone_files_reload_when_they_change(tmp_path):
+    clear_zone_cache()
+    default = {"zones": [{"rect": [0, 0, 1, 1]}]}
+    assert load_zone_set("cam", default, tmp_path).zones[0].name == "zone_0"
+
+    path = tmp_path / "cam.json"
+    path.write_text(json.dumps(CONFIG))
+    zones = load_zone_set("cam", default, tmp_path)
+    assert [zone.name for zone in zones.zones] == ["gate", "yard"]
+    assert zones.zones[1].dwell_seconds == 2.0
+    assert load_zone_set("cam", default, tmp_path) is zones
+
+    path.write_text(json.dumps({"zones": [{"name": "dock", "rect": [0, 0, 5, 5]}]}))
+    os.utime(path, ns=(0, 0))
+    assert load_zone_set("cam", default, tmp_path).zones[0].name == "dock"
+    clear_zone_cache()
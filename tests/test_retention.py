@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from Backend.common.retention import (
+    RetentionManager,
+    RetentionPolicy,
+    parse_duration,
+    parse_size,
+    policies_from_env,
+)
+
+NOW = 1_700_000_000.0
+
+
+def _file(directory, name, size, age):
+    path = directory / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (NOW - age, NOW - age))
+    return path
+
+
+def test_sweep_compacts_expires_and_keeps_fresh_files(tmp_path):
+    outputs = tmp_path / "outputs"
+    compare = _file(outputs, "clip_compare.jpg", 10, age=7200)
+    old = _file(outputs, "nested/old.mp4", 20, age=100_000)
+    kept = _file(outputs, "recent.mp4", 30, age=7200)
+    fresh = _file(outputs, "writing.mp4", 40, age=10)
+    hidden = _file(outputs, ".uploads.sqlite3", 50, age=100_000)
+    policy = RetentionPolicy("outputs", outputs, ttl=86400, compact=("*_compare.jpg",), compact_after=3600)
+    sweeps = []
+    manager = RetentionManager([policy], min_age=60, on_sweep=lambda: sweeps.append(1))
+
+    stats = manager.run_once(now=NOW)["outputs"]
+
+    assert not compare.exists() and not old.exists()
+    assert kept.exists() and fresh.exists() and hidden.exists()
+    assert stats == {"compacted": 1, "expired": 1, "evicted": 0, "freed_bytes": 30, "bytes": 70, "files": 2}
+    assert sweeps == [1] and manager.last_run["outputs"] is stats
+
+
+def test_compaction_skips_files_compact_if_rejects(tmp_path):
+    outputs = tmp_path / "outputs"
+    rebuildable = _file(outputs, "a_compare.jpg", 10, age=7200)
+    orphan = _file(outputs, "b_compare.jpg", 10, age=7200)
+    policy = RetentionPolicy(
+        "outputs", outputs, compact=("*_compare.jpg",), compact_after=3600,
+        compact_if=lambda path: path.name.startswith("a"),
+    )
+
+    stats = RetentionManager([policy], min_age=60).run_once(now=NOW)["outputs"]
+
+    assert not rebuildable.exists() and orphan.exists()
+    assert stats["compacted"] == 1
+
+
+def test_quota_evicts_oldest_first_but_spares_busy_and_fresh_files(tmp_path):
+    inputs = tmp_path / "inputs"
+    busy = _file(inputs, "busy.mp4", 100, age=5000)
+    oldest = _file(inputs, "a.mp4", 100, age=4000)
+    middle = _file(inputs, "b.mp4", 100, age=3000)
+    newest = _file(inputs, "c.mp4", 100, age=2000)
+    fresh = _file(inputs, "d.mp4", 100, age=1)
+    policy = RetentionPolicy("inputs", inputs, max_bytes=150)
+    manager = RetentionManager([policy], min_age=60, is_busy=lambda path: path.name == "busy.mp4")
+
+    stats = manager.apply(policy, now=NOW)
+
+    assert busy.exists() and fresh.exists()
+    assert not oldest.exists() and not middle.exists() and not newest.exists()
+    # Busy and fresh files cannot go, so the directory stays over quota
+    assert stats["evicted"] == 3 and stats["bytes"] == 200 and stats["files"] == 2
+
+
+def test_missing_directory_is_empty(tmp_path):
+    manager = RetentionManager([RetentionPolicy("gone", tmp_path / "gone", ttl=1)])
+    assert manager.run_once(now=NOW)["gone"]["files"] == 0
+
+
+def test_parsers():
+    assert parse_duration("90") == 90
+    assert parse_duration("30m") == 1800
+    assert parse_duration("7d") == 7 * 86400
+    assert parse_size("500M") == 500 * 1024 ** 2
+    assert parse_size("2GiB") == 2 * 1024 ** 3
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+
+def test_policies_from_env_overrides_defaults(tmp_path, monkeypatch):
+    monkeypatch.setenv("RETENTION_TTL", "videos=3d")
+    monkeypatch.setenv("RETENTION_QUOTA", "uploads=1G")
+    monkeypatch.setenv("RETENTION_COMPACT_AFTER", "2h")
+    policies = policies_from_env(
+        {"videos": tmp_path / "v", "uploads": tmp_path / "u"},
+        {"videos": 86400, "uploads": None},
+        compact={"videos": ["*.ts"]},
+    )
+    videos, uploads = policies
+    assert (videos.ttl, videos.max_bytes, videos.compact, videos.compact_after) == (3 * 86400, None, ("*.ts",), 7200)
+    assert (uploads.ttl, uploads.max_bytes, uploads.compact) == (None, 1024 ** 3, ())
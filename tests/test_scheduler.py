@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from Backend.common.scheduler import PRIORITY_IMAGE, PRIORITY_VIDEO, Overloaded, Scheduler, limits_from_env
+
+
+def test_full_wait_queue_is_rejected_with_retry_after():
+    async def scenario():
+        scheduler = Scheduler({"drone": 1}, max_waiting=1)
+        scheduler.pools["drone"].avg_seconds = 4.0
+        async with scheduler.slot("drone"):
+            waiter = asyncio.create_task(_hold(scheduler, "drone"))
+            await asyncio.sleep(0)
+            assert scheduler.stats()["drone"]["waiting"] == 1
+
+            with pytest.raises(Overloaded) as excinfo:
+                scheduler.check("drone")
+            with pytest.raises(Overloaded):
+                async with scheduler.slot("drone"):
+                    pass
+        await waiter
+        return excinfo.value
+
+    exc = asyncio.run(scenario())
+    assert exc.pool == "drone"
+    # one waiting + one active + the rejected request, 4 s each, one at a time
+    assert exc.retry_after == 12
+
+
+def test_images_overtake_queued_videos():
+    async def scenario():
+        scheduler = Scheduler({"anomaly": 1}, video_limit=4)
+        order = []
+
+        async def run(name, priority):
+            async with scheduler.slot("anomaly", priority):
+                order.append(name)
+
+        async with scheduler.slot("anomaly"):
+            tasks = [asyncio.create_task(run("video", PRIORITY_VIDEO))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(run("image", PRIORITY_IMAGE)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["image", "video"]
+    assert stats["anomaly"]["active"] == 0 and stats["video"]["active"] == 0
+
+
+def test_video_pool_caps_concurrent_videos():
+    async def scenario():
+        scheduler = Scheduler({"weapon": 8}, video_limit=1, video_max_waiting=0)
+        async with scheduler.slot("weapon", PRIORITY_VIDEO):
+            with pytest.raises(Overloaded) as excinfo:
+                scheduler.check("weapon", PRIORITY_VIDEO)
+            scheduler.check("weapon", PRIORITY_IMAGE)
+        return excinfo.value
+
+    assert asyncio.run(scenario()).pool == "video"
+
+
+def test_limits_from_env_overrides_defaults():
+    limits = limits_from_env({"drone": 8, "face": 1}, "drone=2, face=x,human=3")
+    assert limits == {"drone": 2, "face": 1, "human": 3}
+
+
+async def _hold(scheduler, model):
+    async with scheduler.slot(model):
+        pass
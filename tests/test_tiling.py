@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from Backend.common.tiling import is_textured, merge_boxes, tile_regions
+
+
+def test_tiles_overlap_and_end_at_the_frame_edge():
+    regions = tile_regions((1080, 1920, 3), tile=640, overlap=0.2)
+    xs = sorted({x1 for x1, _, _, _ in regions})
+    ys = sorted({y1 for _, y1, _, _ in regions})
+    assert xs == [0, 512, 1024, 1280]
+    assert ys == [0, 440]
+    assert len(regions) == len(xs) * len(ys)
+    assert all(x2 - x1 == 640 and y2 - y1 == 640 for x1, y1, x2, y2 in regions)
+    assert max(x2 for _, _, x2, _ in regions) == 1920
+    assert max(y2 for _, _, _, y2 in regions) == 1080
+
+
+def test_small_frame_is_one_region():
+    assert tile_regions((480, 600), tile=640) == [(0, 0, 600, 480)]
+
+
+def test_flat_tiles_are_not_textured():
+    flat = np.full((64, 64, 3), 128, dtype=np.uint8)
+    assert not is_textured(flat)
+    dotted = flat.copy()
+    dotted[30:33, 30:33] = 0
+    assert is_textured(dotted)
+
+
+def test_merge_joins_split_halves_per_class():
+    xyxy = [[0, 0, 14, 20], [6, 0, 20, 20], [100, 100, 110, 110], [0, 0, 10, 20]]
+    boxes, scores, classes = merge_boxes(xyxy, [0.9, 0.6, 0.5, 0.4], [0, 0, 0, 1], threshold=0.5)
+
+    # The two class-0 halves become their union with the best score; the class-1
+    # box on top of them and the distant box are left alone
+    np.testing.assert_array_equal(boxes, [[0, 0, 20, 20], [100, 100, 110, 110], [0, 0, 10, 20]])
+    assert scores.tolist() == pytest.approx([0.9, 0.5, 0.4])
+    assert classes.tolist() == [0, 0, 1]
+
+
+def test_merge_keeps_boxes_below_the_threshold():
+    boxes, scores, _ = merge_boxes([[0, 0, 10, 10], [8, 0, 18, 10]], [0.5, 0.7], [2, 2], threshold=0.5)
+    np.testing.assert_array_equal(boxes, [[8, 0, 18, 10], [0, 0, 10, 10]])
+    assert scores.tolist() == pytest.approx([0.7, 0.5])
+
+
+def test_merge_of_nothing_is_empty():
+    boxes, scores, classes = merge_boxes(np.zeros((0, 4)), [], [])
+    assert boxes.shape == (0, 4) and len(scores) == 0 and len(classes) == 0
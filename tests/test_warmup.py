@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from Backend.common.warmup import FAILED, PENDING, READY, Component, Components
+
+
+def _components(order, fail=(), gate=None):
+    def warm(name):
+        def load(module):
+            if gate is not None and name == "slow":
+                gate.wait(5)
+            order.append(name)
+            if name in fail:
+                raise RuntimeError(f"{name} weights missing")
+
+        return load
+
+    return Components(Component(name, "json", warm(name)) for name in ("drone", "face", "slow"))
+
+
+def _wait(components):
+    components._thread.join(5)
+    assert not components._thread.is_alive()
+
+
+def test_component_loads_once_and_reports_failures():
+    calls = []
+    component = Component("json", "json", calls.append)
+    assert component.state == PENDING and component.module is None
+    assert component.load() is component.load()
+    assert len(calls) == 1 and component.state == READY and component.seconds is not None
+
+    broken = Component("missing", "no_such_module_here")
+    with pytest.raises(ImportError):
+        broken.load()
+    assert broken.status()["state"] == FAILED and "ModuleNotFoundError" in broken.status()["error"]
+
+
+def test_ready_once_every_warmed_component_loaded():
+    order = []
+    components = _components(order)
+    assert not components.ready
+    components.start()
+    _wait(components)
+    assert components.ready and order == ["drone", "face", "slow"]
+
+
+def test_failed_required_component_keeps_readiness_down():
+    components = _components([], fail={"face"})
+    components.start()
+    _wait(components)
+    assert not components.ready
+    assert components.status()["face"]["state"] == FAILED
+    assert components["slow"].state == READY
+
+
+def test_required_components_warm_first_and_gate_readiness():
+    order = []
+    components = _components(order, fail={"slow"})
+    components.start(["slow", "drone", "face"], required=["face", "drone", "unknown"])
+    _wait(components)
+    assert components.required == ["drone", "face"]
+    assert order == ["drone", "face", "slow"]
+    # The optional component failed, readiness does not depend on it
+    assert components.ready
+
+
+def test_nothing_to_warm_is_ready():
+    components = _components([])
+    components.start([])
+    _wait(components)
+    assert components.ready and components["drone"].state == PENDING
+
+
+def test_stop_skips_components_not_loaded_yet():
+    order = []
+    gate = threading.Event()
+    components = _components(order, gate=gate)
+    components.start(["slow", "drone"], required=["slow", "drone"])
+    # "slow" is loading when the stop request arrives
+    components.stop(timeout=0)
+    gate.set()
+    _wait(components)
+    assert order == ["slow"]
+    assert components["drone"].state == PENDING and not components.ready